@@ -0,0 +1,149 @@
+# Local Static Asset Cache
+# ========================
+#
+# Routed Playwright contexts run without the browser HTTP cache and crawl4ai
+# scans with CacheMode.BYPASS, so every page of a crawl downloaded the same
+# site JS/CSS bundles, fonts and GTM container again. AssetCache is an
+# on-disk, content-addressed store the NetworkInterceptor answers static
+# assets from:
+#   - bodies are stored once per content hash under objects/, and a small
+#     JSON entry per URL (index/) points at the body with status, headers and
+#     the time it was stored
+#   - an entry is served for max_age_s seconds after it was stored, after
+#     which the asset is fetched again (and re-stored)
+#   - only GET requests for scripts, stylesheets, fonts and images with a 200
+#     response are cached; documents, fetch/XHR calls, analytics hits and
+#     responses marked no-store never are. On analytics hosts only scripts
+#     (gtm.js, gtag/js) are cached, so pixel hits are not replayed
+# The store is shared by every context and every run that points at the same
+# directory, so after the first page of a crawl mostly the HTML goes over the
+# network.
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+from app.agents.scanning_pages.interception import ANALYTICS_HOSTS, host_matches
+from app.agents.scanning_pages.network_capture import is_ga4_hit_url
+
+CACHEABLE_RESOURCE_TYPES = ("script", "stylesheet", "font", "image")
+
+DEFAULT_MAX_AGE_S = 6 * 3600
+
+# Response headers replayed from the cache. Bodies are stored decoded, so
+# content-encoding / content-length are deliberately not among them.
+KEPT_HEADERS = (
+    "content-type",
+    "cache-control",
+    "etag",
+    "last-modified",
+    "access-control-allow-origin",
+    "timing-allow-origin",
+)
+
+
+class AssetCache:
+    def __init__(
+        self,
+        directory: str,
+        max_age_s: float = DEFAULT_MAX_AGE_S,
+        resource_types: Iterable[str] = CACHEABLE_RESOURCE_TYPES,
+    ):
+        """
+        directory: root of the store (objects/ and index/ are created in it).
+        max_age_s: freshness window of a stored asset, in seconds.
+        """
+        self.directory = directory
+        self.max_age_s = max_age_s
+        self.resource_types = frozenset(resource_types)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0   # Bytes answered from the store.
+        self.bytes_fetched = 0  # Bytes of cacheable assets fetched from the network.
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "index"), exist_ok=True)
+
+    def cacheable(self, url: str, resource_type: str, method: str = "GET") -> bool:
+        """Whether a request may be answered from, and stored in, the cache."""
+        parsed = urlparse(url)
+        if method != "GET" or parsed.scheme not in ("http", "https"):
+            return False
+        if resource_type not in self.resource_types or is_ga4_hit_url(url):
+            return False
+        if host_matches(parsed.hostname or "", ANALYTICS_HOSTS):
+            return resource_type == "script"
+        return True
+
+    def _entry_path(self, url: str) -> str:
+        return os.path.join(self.directory, "index", hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """The fresh cached response for a URL (status, headers, body), or None."""
+        entry = None
+        path = self._entry_path(url)
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+        body = None
+        if entry and entry.get("url") == url and time.time() - entry["stored_at"] <= self.max_age_s:
+            try:
+                with open(self._object_path(entry["sha256"]), "rb") as f:
+                    body = f.read()
+            except OSError:
+                body = None
+        with self._lock:
+            if body is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.bytes_served += len(body)
+        return {"status": entry["status"], "headers": entry["headers"], "body": body}
+
+    def store(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> bool:
+        """Store a fetched asset; returns False if the response must not be cached."""
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        with self._lock:
+            self.bytes_fetched += len(body or b"")
+        if status != 200 or body is None or "no-store" in headers.get("cache-control", "").lower():
+            return False
+        digest = hashlib.sha256(body).hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp = f"{object_path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, object_path)
+        entry = {
+            "url": url,
+            "sha256": digest,
+            "status": status,
+            "headers": {name: headers[name] for name in KEPT_HEADERS if name in headers},
+            "stored_at": time.time(),
+        }
+        path = self._entry_path(url)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes_served": self.bytes_served,
+                "bytes_fetched": self.bytes_fetched,
+            }
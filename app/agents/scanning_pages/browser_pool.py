@@ -0,0 +1,213 @@
+# Warm Browser Pool
+# =================
+#
+# Keeps a small set of pre-launched browsers alive across scans (and, when
+# held through st.cache_resource, across Streamlit reruns) so short scans do
+# not pay cold browser start-up. The pool is agnostic of the browser library:
+# callers supply callables to create, dispose, health-check, reset and
+# measure a browser.
+#   - lease() hands out one browser exclusively; unhealthy ones are replaced
+#   - reset() runs between leases so scans do not share cookies/storage
+#   - a browser is recycled once it has served max_pages pages or its
+#     process tree exceeds max_rss_mb, so long runs do not slow down as the
+#     browser leaks memory
+
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, List, Optional, Set
+
+
+def process_tree_rss_mb(pid: int) -> float:
+    """Resident memory (MB) of a process and all of its children; 0 if unknown."""
+    try:
+        import psutil
+    except ImportError:
+        return 0.0
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return 0.0
+    total = 0
+    for proc in processes:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+BROWSER_PROCESS_NAMES = ("chrome", "chromium", "headless_shell")
+
+
+def browser_root_pids(pid: int) -> Set[int]:
+    """
+    Pids of the browser processes launched under `pid` (directly or via a
+    driver process), excluding their own renderer/GPU children. Empty if
+    unknown.
+    """
+    try:
+        import psutil
+    except ImportError:
+        return set()
+
+    def is_browser(proc) -> bool:
+        name = proc.name().lower()
+        return any(marker in name for marker in BROWSER_PROCESS_NAMES)
+
+    roots = set()
+    try:
+        for proc in psutil.Process(pid).children(recursive=True):
+            try:
+                parent = proc.parent()
+                if is_browser(proc) and not (parent and is_browser(parent)):
+                    roots.add(proc.pid)
+            except psutil.Error:
+                continue
+    except psutil.Error:
+        return set()
+    return roots
+
+
+class PooledBrowser:
+    """A browser owned by the pool plus its usage counters."""
+
+    def __init__(self, resource: Any):
+        self.resource = resource
+        self.pages = 0     # Pages served over the browser's lifetime.
+        self.leases = 0
+
+
+class BrowserLease:
+    """Handle given to a scan; count pages with `lease.pages += 1`."""
+
+    def __init__(self, browser: PooledBrowser):
+        self.browser = browser
+        self.resource = browser.resource
+        self.pages = 0
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        dispose: Callable[[Any], None],
+        size: int = 2,
+        max_pages: int = 100,
+        max_rss_mb: Optional[float] = 1500,
+        health_check: Optional[Callable[[Any], bool]] = None,
+        reset: Optional[Callable[[Any], None]] = None,
+        rss_of: Optional[Callable[[Any], float]] = None,
+        prelaunch: bool = True,
+    ):
+        self.factory = factory
+        self.dispose = dispose
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.health_check = health_check
+        self.reset = reset
+        self.rss_of = rss_of
+        self._idle: "queue.Queue[PooledBrowser]" = queue.Queue()
+        self._slots = threading.BoundedSemaphore(self.size)  # Limits live leases.
+        self._lock = threading.Lock()
+        self._all: List[PooledBrowser] = []
+        self.recycled = 0
+        self._closed = False
+        if prelaunch:
+            for _ in range(self.size):
+                self._idle.put(self._launch())
+
+    def _launch(self) -> PooledBrowser:
+        browser = PooledBrowser(self.factory())
+        with self._lock:
+            self._all.append(browser)
+        return browser
+
+    def _retire(self, browser: PooledBrowser):
+        with self._lock:
+            if browser in self._all:
+                self._all.remove(browser)
+        try:
+            self.dispose(browser.resource)
+        except Exception:
+            pass
+
+    def _healthy(self, browser: PooledBrowser) -> bool:
+        if not self.health_check:
+            return True
+        try:
+            return bool(self.health_check(browser.resource))
+        except Exception:
+            return False
+
+    def _needs_recycle(self, browser: PooledBrowser) -> bool:
+        if self.max_pages and browser.pages >= self.max_pages:
+            return True
+        if self.max_rss_mb and self.rss_of:
+            try:
+                return self.rss_of(browser.resource) > self.max_rss_mb
+            except Exception:
+                return False
+        return False
+
+    def _acquire(self, timeout: Optional[float]) -> PooledBrowser:
+        if self._closed:
+            raise RuntimeError("Browser pool is closed.")
+        if not self._slots.acquire(timeout=timeout if timeout is not None else -1):
+            raise TimeoutError("No browser became available in time.")
+        try:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                browser = self._launch()
+            if not self._healthy(browser):
+                self._retire(browser)
+                browser = self._launch()
+            browser.leases += 1
+            return browser
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, browser: PooledBrowser, pages: int):
+        try:
+            browser.pages += pages
+            if self._closed or self._needs_recycle(browser):
+                self._retire(browser)
+                self.recycled += 1
+                return
+            if self.reset:
+                try:
+                    self.reset(browser.resource)
+                except Exception:
+                    self._retire(browser)
+                    return
+            self._idle.put(browser)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """Borrow a healthy browser for one scan; it is reset or recycled on return."""
+        browser = self._acquire(timeout)
+        handle = BrowserLease(browser)
+        try:
+            yield handle
+        finally:
+            self._release(browser, handle.pages)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pages = [b.pages for b in self._all]
+        return {"live": len(pages), "idle": self._idle.qsize(), "pages": pages, "recycled": self.recycled}
+
+    def close(self):
+        """Dispose every idle browser; leased ones are disposed when returned."""
+        self._closed = True
+        while True:
+            try:
+                self._retire(self._idle.get_nowait())
+            except queue.Empty:
+                break
@@ -0,0 +1,220 @@
+# In-Page Capture Scripts
+# =======================
+#
+# JavaScript shared by both collectors to capture dataLayer pushes and GA4
+# fetch calls. Captured items go into fixed-capacity ring buffers exposed as
+# window.__ga4Capture, so memory and per-read cost stay constant on long
+# click sessions:
+#   - every item gets a monotonically increasing `seq`
+#   - read(name, sinceSeq, drain) returns only items at or after sinceSeq;
+#     with drain=true the returned items are released from the buffer
+#   - items overwritten before being read/drained are counted in `overflow`
+#   - waitFor(name, afterSeq, timeoutMs, quietMs) resolves in the page as soon
+#     as new items stop arriving, woken by the capture hooks themselves
+#   - console logging only happens when window.__ga4Capture.debug is true
+# window.collectedEvents / window.ga4Events remain as read-only snapshots.
+#
+# The scripts are meant to be registered as init scripts (Playwright
+# add_init_script, CDP Page.addScriptToEvaluateOnNewDocument) so they run
+# before any page script and also catch bootstrap pushes and page_view hits.
+# They are idempotent, so injecting them again after load is harmless.
+
+DEFAULT_BUFFER_CAPACITY = 1000
+
+DATA_LAYER_BUFFER = "dataLayer"
+GA4_BUFFER = "ga4"
+
+CAPTURE_CORE_JS = r"""
+(function(capacity, debug) {
+    if (window.__ga4Capture) return;
+
+    function RingBuffer(capacity) {
+        this.capacity = capacity;
+        this.items = new Array(capacity);
+        this.nextSeq = 0;     // seq the next pushed item will get
+        this.drainedSeq = 0;  // items below this seq were drained
+        this.overflow = 0;    // undrained items overwritten by newer ones
+    }
+    RingBuffer.prototype.oldestSeq = function() {
+        return Math.max(this.drainedSeq, this.nextSeq - this.capacity);
+    };
+    RingBuffer.prototype.push = function(item) {
+        if (this.nextSeq - this.drainedSeq >= this.capacity) this.overflow++;
+        item.seq = this.nextSeq;
+        this.items[this.nextSeq % this.capacity] = item;
+        this.nextSeq++;
+    };
+    RingBuffer.prototype.read = function(sinceSeq, drain) {
+        const since = Math.max(sinceSeq || 0, 0);
+        const start = Math.max(since, this.oldestSeq());
+        const events = [];
+        for (let seq = start; seq < this.nextSeq; seq++) {
+            events.push(this.items[seq % this.capacity]);
+        }
+        // Items in [since, start) that were overwritten before this read.
+        const missed = Math.max(Math.min(start, this.nextSeq - this.capacity) - since, 0);
+        if (drain) {
+            for (let seq = this.oldestSeq(); seq < this.nextSeq; seq++) {
+                this.items[seq % this.capacity] = undefined;
+            }
+            this.drainedSeq = this.nextSeq;
+        }
+        return { events: events, next_seq: this.nextSeq, overflow: this.overflow, missed: missed };
+    };
+
+    const buffers = { dataLayer: new RingBuffer(capacity), ga4: new RingBuffer(capacity) };
+    const waiters = [];
+    // Native timer even when fast-forward mode compresses page timers.
+    const later = function(fn, ms) { return (window.__ga4NativeSetTimeout || setTimeout)(fn, ms); };
+
+    const capture = {
+        debug: debug,
+        push: function(name, item) {
+            item.t = performance.now();  // For click-to-event latency.
+            buffers[name].push(item);
+            if (capture.debug) console.log('Captured ' + name + ' event:', item);
+            waiters.slice().forEach(function(waiter) { if (waiter.name === name) waiter.wake(); });
+        },
+        read: function(name, sinceSeq, drain) {
+            return buffers[name].read(sinceSeq, !!drain);
+        },
+        seq: function(name) {
+            return buffers[name].nextSeq;
+        },
+        totalSeq: function() {
+            return buffers.dataLayer.nextSeq + buffers.ga4.nextSeq;
+        },
+        stats: function() {
+            const out = {};
+            Object.keys(buffers).forEach(function(name) {
+                const b = buffers[name];
+                out[name] = { next_seq: b.nextSeq, buffered: b.nextSeq - b.oldestSeq(), overflow: b.overflow, capacity: b.capacity };
+            });
+            return out;
+        },
+        waitFor: function(name, afterSeq, timeoutMs, quietMs) {
+            return new Promise(function(resolve) {
+                let quietTimer = null;
+                const waiter = { name: name, wake: null };
+                const finish = function() {
+                    clearTimeout(capTimer);
+                    clearTimeout(quietTimer);
+                    const i = waiters.indexOf(waiter);
+                    if (i >= 0) waiters.splice(i, 1);
+                    resolve(buffers[name].read(afterSeq, false));
+                };
+                waiter.wake = function() {
+                    clearTimeout(quietTimer);
+                    quietTimer = later(finish, quietMs);
+                };
+                const capTimer = later(finish, timeoutMs);
+                waiters.push(waiter);
+                if (buffers[name].nextSeq > afterSeq) waiter.wake();
+                else if (window.__ga4Settle) {
+                    // Nothing yet: the quiet window starts now, not at the last
+                    // activity before the click.
+                    window.__ga4Settle.arm();
+                    window.__ga4Settle.waitForSettle(quietMs, timeoutMs).then(function() {
+                        if (quietTimer === null) finish();
+                    });
+                }
+            });
+        }
+    };
+    window.__ga4Capture = capture;
+
+    Object.defineProperty(window, 'collectedEvents', {
+        configurable: true,
+        get: function() { return buffers.dataLayer.read(0, false).events; }
+    });
+    Object.defineProperty(window, 'ga4Events', {
+        configurable: true,
+        get: function() { return buffers.ga4.read(0, false).events; }
+    });
+})(__CAPACITY__, __DEBUG__);
+"""
+
+DATA_LAYER_CAPTURE_JS = r"""
+(function() {
+    if (window.__ga4DataLayerHooked) return;
+    window.__ga4DataLayerHooked = true;
+
+    function hook(layer) {
+        if (!Array.isArray(layer) || layer.push.__ga4Captured) return layer;
+        // Entries already in the array (e.g. from `dataLayer = [{...}]` before
+        // the GTM snippet) never go through push, so record them here.
+        layer.forEach(function(entry) {
+            window.__ga4Capture.push('dataLayer', { timestamp: new Date().toISOString(), data: entry, bootstrap: true });
+        });
+        const originalPush = layer.push;
+        const patchedPush = function() {
+            window.__ga4Capture.push('dataLayer', { timestamp: new Date().toISOString(), data: arguments[0] });
+            return originalPush.apply(this, arguments);
+        };
+        patchedPush.__ga4Captured = true;
+        layer.push = patchedPush;
+        return layer;
+    }
+
+    // When run as an init script the page has not created its dataLayer yet
+    // and may later replace it wholesale, so hook every array assigned to it.
+    let current = hook(window.dataLayer || []);
+    try {
+        Object.defineProperty(window, 'dataLayer', {
+            configurable: true,
+            enumerable: true,
+            get: function() { return current; },
+            set: function(value) { current = hook(value); }
+        });
+    } catch (e) {
+        window.dataLayer = current;
+    }
+})();
+"""
+
+FETCH_CAPTURE_JS = r"""
+(function() {
+    if (window.fetch.__ga4Captured) return;
+    const originalFetch = window.fetch;
+    const patchedFetch = async function(resource, init) {
+        const url = typeof resource === 'string' ? resource : (resource && resource.url) || '';
+        if (url.includes('g/collect') || url.includes('mp/collect')) {
+            let body = "";
+            if (init && init.body) {
+                if (typeof init.body === 'string') {
+                    body = init.body;
+                } else if (init.body instanceof Blob) {
+                    body = await init.body.text();
+                }
+            }
+            window.__ga4Capture.push('ga4', { url: url, timestamp: new Date().toISOString(), body: body });
+        }
+        return originalFetch.apply(this, arguments);
+    };
+    patchedFetch.__ga4Captured = true;
+    window.fetch = patchedFetch;
+})();
+"""
+
+# Playwright evaluate: ([name, sinceSeq, drain]) -> read result.
+READ_BUFFER_FN = (
+    "([name, sinceSeq, drain]) => window.__ga4Capture"
+    " ? window.__ga4Capture.read(name, sinceSeq, drain)"
+    " : { events: [], next_seq: sinceSeq, overflow: 0, missed: 0 }"
+)
+
+
+def capture_core_js(capacity: int = DEFAULT_BUFFER_CAPACITY, debug: bool = False) -> str:
+    """Return the ring-buffer core script for the given capacity and debug flag."""
+    return CAPTURE_CORE_JS.replace("__CAPACITY__", str(int(capacity))).replace("__DEBUG__", "true" if debug else "false")
+
+
+def capture_scripts(capacity: int = DEFAULT_BUFFER_CAPACITY, debug: bool = False, include_fetch: bool = True) -> list:
+    """
+    Return the scripts to inject, in order: ring-buffer core, dataLayer hook and
+    (optionally) the GA4 fetch hook. All are idempotent within one document.
+    """
+    scripts = [capture_core_js(capacity, debug), DATA_LAYER_CAPTURE_JS]
+    if include_fetch:
+        scripts.append(FETCH_CAPTURE_JS)
+    return scripts
@@ -0,0 +1,237 @@
+# Click Target Discovery
+# ======================
+#
+# In-page discovery of the elements the collectors click. A single script
+# finds the visible buttons/anchors/spans in a section, applies the target-text
+# and class-snippet filters inside the browser, and returns each match together
+# with its metadata, so the caller needs one round trip instead of several
+# WebDriver calls per element.
+#
+# The Playwright helpers below support click fan-out: targets are listed once
+# per tab, addressed by index, and each click returns the capture-buffer
+# cursors taken just before it so the events that follow can be attributed.
+
+# JS function() -> string describing the page template: the AEM template meta,
+# the body classes and the component classes near the top of the DOM. Pages
+# built from the same template share it (see selector_cache.py).
+TEMPLATE_SIGNATURE_FN = r"""
+function() {
+    const meta = document.querySelector('meta[name="template"]');
+    const components = new Set();
+    document.querySelectorAll('body > *, body > * > *, body > * > * > *, body > * > * > * > *').forEach(function(el) {
+        const first = (el.getAttribute('class') || '').trim().split(/\s+/)[0];
+        if (first) components.add(el.tagName.toLowerCase() + '.' + first);
+    });
+    return [meta ? meta.content : '', document.body ? document.body.className : '', Array.from(components).sort().join(' ')].join('|');
+}
+"""
+
+# Class substrings that mark CTA-style elements worth clicking.
+DEFAULT_CLASS_SNIPPETS = ["primary-link icon-dx-search-inventory", "cta-content", "secondary-link", "cta"]
+
+# JS function(elements) -> Promise<[bool]>: which elements are visible.
+# Rendered size comes from one batched IntersectionObserver pass (computed in
+# the rendering pipeline, no forced layout per element); only elements with a
+# box get the style check (checkVisibility, or computed style as fallback).
+VISIBLE_FN = r"""
+function(elements) {
+    function styleVisible(el) {
+        if (el.checkVisibility) return el.checkVisibility({ opacityProperty: true, visibilityProperty: true });
+        const style = getComputedStyle(el);
+        return !(style.visibility === 'hidden' || style.display === 'none' || style.opacity === '0');
+    }
+    return new Promise(function(resolve) {
+        const sized = new Map();
+        let observer = null;
+        let done = false;
+        const finish = function() {
+            if (done) return;
+            done = true;
+            if (observer) observer.disconnect();
+            resolve(elements.map(function(el) {
+                const hasBox = sized.has(el) ? sized.get(el) : el.getClientRects().length > 0;
+                return hasBox && styleVisible(el);
+            }));
+        };
+        if (!elements.length || !window.IntersectionObserver) {
+            finish();
+            return;
+        }
+        observer = new IntersectionObserver(function(entries) {
+            entries.forEach(function(entry) {
+                sized.set(entry.target, entry.boundingClientRect.width > 0 && entry.boundingClientRect.height > 0);
+            });
+            if (sized.size >= elements.length) finish();
+        });
+        elements.forEach(function(el) { observer.observe(el); });
+        // Observer callbacks wait for a rendering frame; do not hang if none comes.
+        (window.__ga4NativeSetTimeout || setTimeout)(finish, 1000);
+    });
+}
+"""
+
+# JS function(el, text) -> the `info` of a click target (see CLICK_TARGETS_FN).
+ELEMENT_INFO_FN = r"""
+function(el, text) {
+    // Selector path from the nearest stable id (or body), used to recognise
+    // the same component across pages.
+    function selectorPath(el) {
+        const parts = [];
+        for (let node = el; node && node !== document.body && node.nodeType === 1; node = node.parentElement) {
+            if (node.id && !/\d/.test(node.id)) {
+                parts.unshift('#' + node.id);
+                return parts.join('>');
+            }
+            let index = 1;
+            for (let sib = node.previousElementSibling; sib; sib = sib.previousElementSibling) {
+                if (sib.tagName === node.tagName) index++;
+            }
+            parts.unshift(node.tagName.toLowerCase() + ':nth-of-type(' + index + ')');
+        }
+        return ['body'].concat(parts).join('>');
+    }
+    function templateSelector(el) {
+        const classes = (el.getAttribute('class') || '').split(/\s+/).filter(Boolean);
+        if (!classes.length) return null;
+        return el.tagName.toLowerCase() + classes.map(function(c) { return '.' + CSS.escape(c); }).join('');
+    }
+    return {
+        'tag_name': el.tagName.toLowerCase(),
+        'text': text,
+        'classes': el.getAttribute('class'),
+        'href': el.href || el.getAttribute('href'),
+        'data-target': el.getAttribute('data-target'),
+        'data-link-type': el.getAttribute('data-link-type'),
+        'aria-label': el.getAttribute('aria-label'),
+        'target': el.getAttribute('target'),
+        'path': selectorPath(el),
+        'selector': templateSelector(el)
+    };
+}
+"""
+
+# JS async function(sectionSelector, targetText, snippets, cachedSelectors)
+# -> [{element, info}]. `info` mirrors the keys GA4EventCollector.get_element_info
+# returns, plus the element's selector `path` (see component_registry.py) and a
+# template-level `selector` (tag + classes, see selector_cache.py; null when
+# the element has no class). With cachedSelectors only elements matching them
+# are considered instead of every button/anchor/span in the section. With
+# snippets null, classes are not filtered (only targetText, if given, is).
+CLICK_TARGETS_FN = r"""
+async function(sectionSelector, targetText, snippets, cachedSelectors) {
+    const elementInfo = (__ELEMENT_INFO_FN__);
+    const section = document.querySelector(sectionSelector);
+    if (!section) return [];
+    const query = cachedSelectors && cachedSelectors.length ? cachedSelectors.join(',') : 'button, a, span';
+    const wanted = targetText ? targetText.toUpperCase() : null;
+    const filtered = snippets !== null || wanted !== null;
+    const candidates = [];
+    for (const el of section.querySelectorAll(query)) {
+        const classes = el.getAttribute('class') || '';
+        const text = (el.innerText || '').trim();
+        const textMatch = wanted !== null && text.toUpperCase().includes(wanted);
+        if (filtered && !textMatch && !(snippets || []).some(function(s) { return classes.includes(s); })) continue;
+        candidates.push({ el: el, text: text });
+    }
+    const visible = await (__VISIBLE_FN__)(candidates.map(function(c) { return c.el; }));
+    return candidates.filter(function(c, i) { return visible[i]; }).map(function(c) {
+        return { element: c.el, info: elementInfo(c.el, c.text) };
+    });
+}
+""".replace("__VISIBLE_FN__", VISIBLE_FN.strip()).replace("__ELEMENT_INFO_FN__", ELEMENT_INFO_FN.strip())
+
+
+def find_click_targets(driver, section_selector="body", target_text=None, snippets=None, cache=None, class_filter=True):
+    """
+    Return the matching click targets in a section as [{"element", "info"}] using
+    one execute_script call. Elements whose text contains target_text, or whose
+    class contains one of the snippets, are kept; with class_filter=False the
+    snippets are ignored (e.g. when a ClickYieldModel picks the targets). With a
+    SelectorCache, pages of an already seen template only query that template's
+    cached CTA selectors.
+    """
+    if not class_filter:
+        snippets = None
+    else:
+        snippets = DEFAULT_CLASS_SNIPPETS if snippets is None else list(snippets)
+    key = selectors = None
+    if cache is not None:
+        signature = driver.execute_script(f"return ({TEMPLATE_SIGNATURE_FN})();")
+        key = cache.key(signature, section_selector, target_text, snippets)
+        selectors = cache.get(key)
+    targets = driver.execute_script(
+        f"return ({CLICK_TARGETS_FN}).apply(null, arguments);",
+        section_selector,
+        target_text or None,
+        snippets,
+        selectors,
+    ) or []
+    if cache is not None and selectors is None:
+        cache.put(key, [target["info"].get("selector") for target in targets])
+    return targets
+
+
+# Playwright evaluate: ([sectionSelector, targetText, snippets, cachedSelectors]) -> [info].
+# The matched elements are kept on window.__ga4ClickTargets so later calls can
+# click them by index; the property also marks the document, so a missing
+# value after a click means the page navigated away.
+LIST_CLICK_TARGETS_FN = (
+    "async ([sectionSelector, targetText, snippets, cachedSelectors]) => {"
+    f" window.__ga4ClickTargets = await ({CLICK_TARGETS_FN})(sectionSelector, targetText, snippets, cachedSelectors);"
+    " return window.__ga4ClickTargets.map(function(t) { return t.info; });"
+    " }"
+)
+
+# Playwright evaluate: ([index, expectedInfo]) -> {clicked, reason, cursor}.
+# Clicks one listed target after checking it still matches what was listed
+# (tabs load the page independently), and returns the capture buffer cursors
+# taken right before the click so the events that follow can be attributed,
+# plus the click's performance.now() (`clicked_at`) for latency measurement.
+CLICK_TARGET_AT_FN = r"""
+([index, expected]) => {
+    const targets = window.__ga4ClickTargets || [];
+    const target = targets[index];
+    if (!target || !target.element.isConnected) return { clicked: false, reason: 'missing' };
+    if (target.info.text !== expected.text || target.info.href !== expected.href) {
+        return { clicked: false, reason: 'changed' };
+    }
+    const cursor = {
+        dataLayer: window.__ga4Capture ? window.__ga4Capture.seq('dataLayer') : 0,
+        ga4: window.__ga4Capture ? window.__ga4Capture.seq('ga4') : 0
+    };
+    // Cancel the default action after the page's own handlers (GTM listens on
+    // document) have seen the click, so links do not navigate the tab away.
+    const keepPage = function(e) { e.preventDefault(); };
+    window.addEventListener('click', keepPage);
+    if (window.__ga4Settle) window.__ga4Settle.arm();
+    let clickedAt = null;
+    try {
+        target.element.scrollIntoView({ block: 'center' });
+        clickedAt = performance.now();
+        target.element.click();
+    } catch (e) {
+        return { clicked: false, reason: String(e) };
+    } finally {
+        window.removeEventListener('click', keepPage);
+    }
+    return { clicked: true, reason: null, cursor: cursor, clicked_at: clickedAt };
+}
+"""
+
+# Playwright evaluate: ([dataLayerSeq, ga4Seq]) -> {dataLayer, ga4} or null
+# when the document the targets were listed in is gone.
+READ_CLICK_EVENTS_FN = r"""
+([dataLayerSeq, ga4Seq]) => window.__ga4ClickTargets ? {
+    dataLayer: window.__ga4Capture.read('dataLayer', dataLayerSeq, false).events,
+    ga4: window.__ga4Capture.read('ga4', ga4Seq, false).events
+} : null
+"""
+
+
+def partition_targets(count: int, tabs: int) -> list:
+    """
+    Split target indexes 0..count-1 round-robin into at most `tabs` shares, so
+    neighbouring elements (often the same component) land in different tabs.
+    """
+    tabs = max(1, min(tabs, count))
+    return [list(range(tab, count, tabs)) for tab in range(tabs)] if count else []
@@ -0,0 +1,149 @@
+# Learned Click Yield
+# ===================
+#
+# Most visible buttons/anchors/spans never fire a dataLayer push or GA4 hit,
+# yet every scan clicked all of them that matched a hard-coded class snippet
+# list. ClickYieldModel learns from the scanner's own history instead: every
+# click outcome (fired anything or not) is counted in a frequency table under
+# three features of the element, from most to least specific:
+#   - path      host + selector path (the same element across pages of a site)
+#   - selector  tag + classes (the same component on any page)
+#   - text      tag + normalized text ("Find a dealer" links everywhere)
+# decide() backs off from the most specific feature with at least
+# min_observations clicks to the next one:
+#   - no feature with enough history: CLICK (explore)
+#   - a feature with history but no yield at all: SKIP, except that a
+#     sample_rate share is still clicked (SAMPLE) so elements that start
+#     firing are noticed
+#   - otherwise CLICK
+# rank() orders the kept candidates by their smoothed yield estimate,
+# (yields + 1) / (clicks + 2), so the likeliest CTAs are clicked first.
+# Counters track decisions, and skipped candidates are the clicks saved.
+# The table is a JSON file, rewritten atomically by save().
+
+import json
+import os
+import random
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+CLICK = "click"
+SAMPLE = "sample"
+SKIP = "skip"
+
+FEATURES = ("path", "selector", "text")
+
+DIGITS = re.compile(r"\d+")
+SPACES = re.compile(r"\s+")
+
+
+def element_features(page_url: str, info: Dict) -> Dict[str, Optional[str]]:
+    """Feature keys of a click target's info (None where the info lacks the feature)."""
+    tag = (info.get("tag_name") or "").lower()
+    text = SPACES.sub(" ", DIGITS.sub("0", (info.get("text") or "").lower())).strip()[:60]
+    host = (urlparse(page_url).hostname or "").lower()
+    return {
+        "path": f"{host}|{info['path']}" if info.get("path") else None,
+        "selector": info.get("selector") or None,
+        "text": f"{tag}|{text}" if text else None,
+    }
+
+
+class ClickYieldModel:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        min_observations: int = 5,
+        sample_rate: float = 0.1,
+        seed: Optional[int] = None,
+    ):
+        """
+        path: JSON file to load from and persist to (None keeps it in memory).
+        min_observations: clicks a feature needs before its yield is trusted.
+        sample_rate: share of zero-yield candidates that are clicked anyway.
+        """
+        self.path = path
+        self.min_observations = min_observations
+        self.sample_rate = sample_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # feature -> key -> [clicks, clicks that fired an event]
+        self._table: Dict[str, Dict[str, List[int]]] = {feature: {} for feature in FEATURES}
+        self.counters = Counter()  # CLICK / SAMPLE / SKIP decisions, "recorded" outcomes.
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                stored = json.load(f)
+            for feature in FEATURES:
+                self._table[feature].update(stored.get("table", {}).get(feature, {}))
+
+    def _evidence(self, features: Dict[str, Optional[str]]) -> Optional[Tuple[int, int]]:
+        """(clicks, yields) of the most specific feature with enough history."""
+        for feature in FEATURES:
+            key = features.get(feature)
+            counts = self._table[feature].get(key) if key else None
+            if counts and counts[0] >= self.min_observations:
+                return counts[0], counts[1]
+        return None
+
+    def score(self, page_url: str, info: Dict) -> float:
+        """Smoothed probability that clicking the element fires an event."""
+        with self._lock:
+            evidence = self._evidence(element_features(page_url, info))
+        clicks, yields = evidence or (0, 0)
+        return (yields + 1) / (clicks + 2)
+
+    def decide(self, page_url: str, info: Dict) -> str:
+        """CLICK, SAMPLE or SKIP for one candidate; counted in `counters`."""
+        with self._lock:
+            evidence = self._evidence(element_features(page_url, info))
+            if evidence is None or evidence[1] > 0:
+                decision = CLICK
+            elif self._random.random() < self.sample_rate:
+                decision = SAMPLE
+            else:
+                decision = SKIP
+            self.counters[decision] += 1
+        return decision
+
+    def rank(self, page_url: str, infos: List[Dict]) -> List[int]:
+        """Indexes of the candidates to click, likeliest first; skipped ones are left out."""
+        kept = [i for i, info in enumerate(infos) if self.decide(page_url, info) != SKIP]
+        scores = {i: self.score(page_url, infos[i]) for i in kept}
+        return sorted(kept, key=lambda i: -scores[i])
+
+    def record(self, page_url: str, info: Dict, fired: bool):
+        """Count one click outcome under every feature of the element."""
+        with self._lock:
+            for feature, key in element_features(page_url, info).items():
+                if key:
+                    counts = self._table[feature].setdefault(key, [0, 0])
+                    counts[0] += 1
+                    counts[1] += int(bool(fired))
+            self.counters["recorded"] += 1
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            payload = {"updated": datetime.now(timezone.utc).isoformat(), "table": self._table}
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "clicked": self.counters[CLICK],
+                "sampled": self.counters[SAMPLE],
+                "skipped": self.counters[SKIP],
+                "recorded": self.counters["recorded"],
+                "elements": len(self._table["path"]),
+            }
@@ -0,0 +1,98 @@
+# Shared Component Registry
+# =========================
+#
+# Header, footer and navigation CTAs repeat on every page of a site, so most
+# clicks of a multi-page scan re-trigger the same events. ComponentRegistry
+# fingerprints each click target by its selector path, text and href, and lets
+# only the first page of a host that meets a component click it. Later pages
+# skip the click and point at the first result instead, so their clicks only
+# cover page-specific content. Both collectors record such a skipped click the
+# same way (reused_click): the entry has no events of its own and the page's
+# dataLayer/ga4 lists hold only the page's own events; reports that need the
+# component's events (the GTM trigger report) use with_reused_events.
+#
+# One registry covers one scan; it is safe to share between threads and
+# asyncio tasks.
+
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+def component_fingerprint(info: Dict) -> str:
+    """Stable id for a click target from its selector path, text and href."""
+    text = " ".join((info.get("text") or "").split())
+    key = "\x1f".join([info.get("path") or "", text, info.get("href") or ""])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def reused_click(info: Dict, fingerprint: str, entry: Dict, **fields) -> Dict:
+    """
+    Click entry for a component that is not clicked again on this page: no
+    events of its own, the first page's url in reused_from and its result
+    (None until recorded) in reused_click. `fields` are added as is.
+    """
+    return dict(fields, info=info, dataLayer=[], ga4=[], component=fingerprint,
+                reused_from=entry["first_url"], reused_click=entry["click"])
+
+
+def with_reused_events(clicks: List[Dict]) -> List[Dict]:
+    """Clicks with every reused entry carrying the events of the component's first click."""
+    return [
+        dict(click, dataLayer=list((click["reused_click"] or {}).get("dataLayer", [])),
+             ga4=list((click["reused_click"] or {}).get("ga4", [])))
+        if "reused_from" in click else click
+        for click in clicks
+    ]
+
+
+class ComponentRegistry:
+    def __init__(self):
+        self._components: Dict[str, Dict[str, Dict]] = {}  # host -> fingerprint -> entry
+        self._lock = threading.Lock()
+        self.clicked = 0
+        self.reused = 0
+
+    def claim(self, page_url: str, info: Dict) -> Tuple[str, Optional[Dict]]:
+        """
+        Register a click target seen on page_url. Returns (fingerprint, entry):
+        entry is None if the caller is the first to see the component and should
+        click it, otherwise {"first_url", "click"} of the page that did ("click"
+        stays None until that page records its result).
+        """
+        fingerprint = component_fingerprint(info)
+        host = urlparse(page_url).netloc
+        with self._lock:
+            components = self._components.setdefault(host, {})
+            entry = components.get(fingerprint)
+            if entry is None:
+                components[fingerprint] = {"first_url": page_url, "click": None}
+                self.clicked += 1
+                return fingerprint, None
+            self.reused += 1
+            return fingerprint, dict(entry)
+
+    def record(self, page_url: str, fingerprint: str, click: Dict):
+        """Store the outcome of clicking a claimed component."""
+        host = urlparse(page_url).netloc
+        with self._lock:
+            entry = self._components.setdefault(host, {}).setdefault(fingerprint, {"first_url": page_url, "click": None})
+            entry["click"] = click
+
+    def lookup(self, page_url: str, fingerprint: str) -> Optional[Dict]:
+        """The recorded entry of a component on page_url's host, if any."""
+        with self._lock:
+            entry = self._components.get(urlparse(page_url).netloc, {}).get(fingerprint)
+            return dict(entry) if entry else None
+
+    def resolve(self, page_url: str, clicks: List[Dict]):
+        """Fill in reused_click of entries whose first page has recorded its result since the claim."""
+        for click in clicks:
+            if "reused_from" in click and click["reused_click"] is None:
+                click["reused_click"] = (self.lookup(page_url, click["component"]) or {}).get("click")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hosts = {host: len(components) for host, components in self._components.items()}
+        return {"hosts": hosts, "clicked": self.clicked, "reused": self.reused}
@@ -1,4 +1,3 @@
-
 # GA4 Event Collector with Crawl4AI (Mimicking Selenium)
 # =======================================================
 #
@@ -7,6 +6,19 @@
 # stores the current page URL to ensure valid context for all JS executions,
 # simulates user clicks to trigger further events, and finally displays both
 # sets of events via a Streamlit interface.
+#
+# The scanner modules import each other as app.agents.scanning_pages.*, so run
+# everything from the repository root: the Streamlit app with
+#   PYTHONPATH=. streamlit run app/agents/scanning_pages/crawl_4_ai.py
+#
+# Batch mode: pass URLs on the command line (or --urls-file) to scan many pages
+# concurrently on one shared browser, e.g.
+#   python -m app.agents.scanning_pages.crawl_4_ai --urls-file urls.txt --concurrency 8 --output events.jsonl
+#
+# Locale mode: scan one page across markets with consent accepted once, e.g.
+#   python -m app.agents.scanning_pages.crawl_4_ai \
+#       --path-template "https://www.rangerover.com/{locale}/range-rover/index.html" \
+#       --locales de-de,en-gb,fr-fr --matrix-csv matrix.csv
 
 import sys
 import asyncio
@@ -14,12 +26,72 @@ import asyncio
 if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
+import argparse
+import functools
 import json
+import os
+import threading
+import time
+import uuid
+from typing import AsyncIterator, Dict, Iterable, List, Optional
 import pandas as pd
 import streamlit as st
 from urllib.parse import urlparse, parse_qs
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
 
+from app.agents.scanning_pages.asset_cache import DEFAULT_MAX_AGE_S, AssetCache
+from app.agents.scanning_pages.browser_pool import BrowserPool, browser_root_pids, process_tree_rss_mb
+from app.agents.scanning_pages.capture_scripts import (
+    DATA_LAYER_BUFFER,
+    DEFAULT_BUFFER_CAPACITY,
+    GA4_BUFFER,
+    READ_BUFFER_FN,
+    capture_scripts,
+)
+from app.agents.scanning_pages.click_targets import (
+    CLICK_TARGET_AT_FN,
+    DEFAULT_CLASS_SNIPPETS,
+    LIST_CLICK_TARGETS_FN,
+    READ_CLICK_EVENTS_FN,
+    TEMPLATE_SIGNATURE_FN,
+    VISIBLE_FN,
+    partition_targets,
+)
+from app.agents.scanning_pages.click_yield import ClickYieldModel
+from app.agents.scanning_pages.component_registry import ComponentRegistry, reused_click, with_reused_events
+from app.agents.scanning_pages.fast_forward import LatencyStats, click_latency_ms, fast_forward_scripts
+from app.agents.scanning_pages.gtm_container import (
+    CONTAINER_IDS_FN,
+    LIST_PREDICTED_TARGETS_FN,
+    GtmContainers,
+    predictive_triggers,
+    trigger_report,
+)
+from app.agents.scanning_pages.har_replay import RECORD, REPLAY, HarArchive
+from app.agents.scanning_pages.interception import (
+    DEFAULT_PROFILE,
+    GA4Sinkhole,
+    NetworkInterceptor,
+    ResourceBlockingProfile,
+)
+from app.agents.scanning_pages.locale_fanout import (
+    ACCEPT_CONSENT_FN,
+    CONSENT_ACCEPT_SELECTORS,
+    event_matrix,
+    expand_locales,
+    storage_init_script,
+)
+from app.agents.scanning_pages.page_fingerprint import FingerprintStore, fetch_fingerprint
+from app.agents.scanning_pages.selector_cache import SelectorCache
+from app.agents.scanning_pages.settle import (
+    DEFAULT_CAP_MS,
+    DEFAULT_QUIET_MS,
+    SETTLE_JS,
+    settle_condition,
+    wait_for_settle_async,
+)
+from app.agents.scanning_pages.sinks import JsonlSink
+
 # ------------------------------------------------------------------
 # Helper Function: Parse GA4 Event
 # ------------------------------------------------------------------
@@ -69,62 +141,91 @@ def parse_ga4_event(event: dict) -> dict:
 # ------------------------------------------------------------------
 
 class GA4EventCollector:
-    def __init__(self):
+    def __init__(
+        self,
+        concurrency: int = 4,
+        quiet_ms: int = DEFAULT_QUIET_MS,
+        cap_ms: int = DEFAULT_CAP_MS,
+        buffer_capacity: int = DEFAULT_BUFFER_CAPACITY,
+        drain_on_read: bool = False,
+        debug: bool = False,
+        resource_profile: Optional[ResourceBlockingProfile] = None,
+        sinkhole_ga4: bool = False,
+        selector_cache: Optional[SelectorCache] = None,
+        har: Optional[HarArchive] = None,
+        asset_cache: Optional[AssetCache] = None,
+        fast_forward: bool = False,
+        gtm: Optional[GtmContainers] = None,
+        click_yield: Optional[ClickYieldModel] = None,
+    ):
         # Configure the headless browser via Crawl4AI.
         self.browser_config = BrowserConfig(headless=True, verbose=True)
         
-        # JavaScript override to capture dataLayer events.
-        self.data_layer_override = r"""
-        window.collectedEvents = [];
-        window.dataLayer = window.dataLayer || [];
-        let originalPush = window.dataLayer.push;
-        window.dataLayer.push = function() {
-            const event = arguments[0];
-            const cleanEvent = { timestamp: new Date().toISOString(), data: event };
-            window.collectedEvents.push(cleanEvent);
-            console.log('Captured dataLayer event:', cleanEvent);
-            return originalPush.apply(this, arguments);
-        };
-        """
+        # Request interception: with a resource_profile (e.g. DEFAULT_PROFILE),
+        # aborts heavy resources and denylisted hosts while always letting
+        # GTM/GA4 through; without one nothing is blocked.
+        # With sinkhole_ga4, GA4 hits are recorded and answered locally with a
+        # 204 instead of reaching Google Analytics; they then become the source
+        # of get_ga4_events (covering fetch, sendBeacon and XHR alike).
+        # With an asset_cache, static JS/CSS/fonts/images are served from a
+        # local on-disk store shared across pages and runs (see asset_cache.py).
+        self.sinkhole = GA4Sinkhole() if sinkhole_ga4 else None
+        # With a HAR archive in replay mode nothing may reach the network.
+        self.har = har
+        self.asset_cache = asset_cache
+        self.interceptor = NetworkInterceptor(
+            resource_profile,
+            sinkhole=self.sinkhole,
+            offline=bool(har and har.offline),
+            asset_cache=asset_cache,
+        )
         
-        # Enhanced fetch override to capture GA4 events (including POST bodies).
-        self.enhanced_fetch_override = r"""
-        (function() {
-            const originalFetch = window.fetch;
-            window.ga4Events = window.ga4Events || [];
-            window.fetch = async function(resource, init) {
-                let clonedBody = "";
-                if (init && init.body) {
-                    if (typeof init.body === 'string') {
-                        clonedBody = init.body;
-                    } else if (init.body instanceof Blob) {
-                        clonedBody = await init.body.text();
-                    }
-                    console.log("Captured fetch body:", clonedBody);
-                }
-                if (typeof resource === 'string' && (resource.includes('g/collect') || resource.includes('mp/collect'))) {
-                    console.log("Intercepted GA4 fetch call:", resource, clonedBody);
-                    window.ga4Events.push({
-                        url: resource,
-                        timestamp: new Date().toISOString(),
-                        body: clonedBody
-                    });
-                }
-                return originalFetch.apply(this, arguments);
-            };
-        })();
-        """
+        # Ring-buffered capture of dataLayer pushes and GA4 fetch calls
+        # (see capture_scripts.py). With drain_on_read, every read releases
+        # the returned events from the in-page buffers. The scripts are
+        # registered as context init scripts (see _on_page_context_created),
+        # so they run before the page's own scripts on every navigation and
+        # bootstrap pushes / page_view hits are captured without a reload.
+        self.capture_js = capture_scripts(capacity=buffer_capacity, debug=debug)
+        self.drain_on_read = drain_on_read
+        # Fast-forward mode: CSS animations/transitions cut to 1ms, short page
+        # timers compressed and reduced motion emulated, so pushes that wait on
+        # an animation or debounce fire right after the click (see fast_forward.py).
+        self.fast_forward = fast_forward
+        self.init_scripts = (fast_forward_scripts() if fast_forward else []) + self.capture_js + [SETTLE_JS]
         
         # Build the base run configuration with extended timeout settings.
         self.run_config = CrawlerRunConfig(
             cache_mode=CacheMode.BYPASS,
             page_timeout=60000,    # 60-second timeout
             wait_until="load",     # Wait for the load event
-            js_code=[self.data_layer_override, self.enhanced_fetch_override]
         )
         
+        # Settle detection: return once network, dataLayer and DOM are quiet
+        # for quiet_ms, never waiting longer than cap_ms.
+        self.quiet_ms = quiet_ms
+        self.cap_ms = cap_ms
+        self.settle_wait = settle_condition(quiet_ms, cap_ms)
+        
         self.crawler = AsyncWebCrawler(config=self.browser_config)
+        self.crawler.crawler_strategy.set_hook("on_page_context_created", self._on_page_context_created)
+        self.concurrency = concurrency  # Max pages scanned at once in batch mode.
+        # Per-template CTA selectors used by fan_out_clicks (see selector_cache.py).
+        self.selector_cache = selector_cache
+        # With GTM containers, fan_out_clicks clicks only the elements the page's
+        # container triggers accept and reports unfired triggers (see gtm_container.py).
+        self.gtm = gtm
+        # With a click-yield model, fan_out_clicks lists every visible
+        # button/anchor/span instead of filtering by class snippets, skips
+        # elements with a history of firing nothing and learns from every click
+        # (see click_yield.py).
+        self.click_yield = click_yield
         self.current_url = ""  # Will store the current page URL after loading
+        self.session_urls: Dict[str, str] = {}  # Page URL loaded in each session.
+        self.visited_origins = set()  # Origins whose storage reset_browser_state clears.
+        self.browser_pid: Optional[int] = None  # Set by CrawlerService for RSS checks.
+        # Consent storage state seeded into every context (see locale_fanout.py).
+        self.storage_state: Optional[Dict] = None
     
     async def start(self):
         """Initialize the crawler (open browser context)."""
@@ -133,51 +234,198 @@ class GA4EventCollector:
     async def close(self):
         """Close the crawler and browser context."""
         await self.crawler.__aexit__(None, None, None)
+
+    async def _on_page_context_created(self, page, context=None, **kwargs):
+        """Crawl4AI hook: prepare each browser context before navigation."""
+        if self.fast_forward:
+            await page.emulate_media(reduced_motion="reduce")
+        if context is not None:
+            await self.interceptor.install(context)
+            await self._install_init_scripts(context)
+            await self._seed_storage_state(context)
+            if self.har:
+                # Last, so archived responses take precedence over the interceptor.
+                await self.har.install(context)
+        return page
+
+    async def _install_init_scripts(self, context):
+        """Register the capture, settle and fast-forward scripts on a context (once per context)."""
+        if getattr(context, "_ga4_init_scripts", None) is self:
+            return
+        context._ga4_init_scripts = self
+        for script in self.init_scripts:
+            await context.add_init_script(script)
+
+    async def _seed_storage_state(self, context):
+        """Seed the shared consent storage state into a context (once per context)."""
+        if self.storage_state is None or getattr(context, "_ga4_storage_seeded", None) is self.storage_state:
+            return
+        if getattr(context, "_ga4_storage_script", None) is not self.storage_state:
+            # Init scripts cannot be removed, so register each state only once.
+            script = storage_init_script(self.storage_state)
+            if script:
+                await context.add_init_script(script)
+            context._ga4_storage_script = self.storage_state
+        if self.storage_state.get("cookies"):
+            await context.add_cookies(self.storage_state["cookies"])
+        context._ga4_storage_seeded = self.storage_state
+
+    async def capture_consent_state(self, url: str, selectors: Optional[List[str]] = None) -> Dict:
+        """
+        Load a page, accept its consent banner and return the context's storage
+        state (cookies + localStorage). "accepted_with" holds the selector of the
+        button that was clicked, or None if no banner was found.
+        """
+        session_id = f"consent-{uuid.uuid4().hex[:12]}"
+        try:
+            await self.load_page(url, session_id=session_id)
+            accepted = await self.evaluate(ACCEPT_CONSENT_FN, selectors or CONSENT_ACCEPT_SELECTORS, session_id=session_id)
+            if accepted:
+                await self.wait_for_settle(session_id=session_id)
+            state = await self.get_session_page(session_id).context.storage_state()
+        finally:
+            await self.release_session(session_id)
+        state["accepted_with"] = accepted
+        return state
+
+    async def is_healthy(self) -> bool:
+        """True while the underlying browser is still connected."""
+        browser = self.crawler.crawler_strategy.browser_manager.browser
+        return bool(browser and browser.is_connected())
+
+    async def reset_browser_state(self):
+        """
+        Clear cookies in every browser context, and the storage (localStorage,
+        IndexedDB, ...) of every origin scanned since the last reset, so the
+        next scan starts clean, and forget any seeded consent state.
+        sessionStorage goes with the pages, which release_session closes.
+        The HTTP cache is kept on purpose so static assets stay warm.
+        """
+        self.storage_state = None
+        origins, self.visited_origins = self.visited_origins, set()
+        for context in self.crawler.crawler_strategy.browser_manager.browser.contexts:
+            await context.clear_cookies()
+            context._ga4_storage_seeded = None
+            if not origins:
+                continue
+            page = await context.new_page()
+            try:
+                cdp = await context.new_cdp_session(page)
+                for origin in origins:
+                    await cdp.send("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+            finally:
+                await page.close()
     
-    async def load_page(self, url: str):
+    async def load_page(self, url: str, session_id="session1", page_timeout_ms: Optional[int] = None) -> float:
         """
-        Load the target page with injected JS and store the URL.
-        Wait a few seconds to allow initial events to fire.
+        Load the target page with injected JS into the given session and store the URL.
+        Waits until the page settles so initial events have fired. page_timeout_ms
+        overrides the run config's navigation timeout. Returns the load time in
+        seconds.
         """
-        await self.crawler.arun(url=url, config=self.run_config)
+        started = time.perf_counter()
+        config = self.run_config.clone(session_id=session_id, wait_for=self.settle_wait)
+        if page_timeout_ms:
+            config = config.clone(page_timeout=page_timeout_ms)
+        await self.crawler.arun(url=url, config=config)
         self.current_url = url
-        await asyncio.sleep(5)
+        self.session_urls[session_id] = url
+        parsed = urlparse(url)
+        if parsed.scheme in ("http", "https"):
+            self.visited_origins.add(f"{parsed.scheme}://{parsed.netloc}")
+        return time.perf_counter() - started
     
+    def get_session_page(self, session_id="session1"):
+        """
+        Return the live Playwright page held by a session.
+        Raises KeyError if the session has no loaded page (call load_page first).
+        """
+        sessions = self.crawler.crawler_strategy.browser_manager.sessions
+        if session_id not in sessions:
+            raise KeyError(f"No live page for session '{session_id}'; call load_page first.")
+        _, page, _ = sessions[session_id]
+        return page
+
+    async def evaluate(self, expression: str, arg=None, session_id="session1"):
+        """
+        Evaluate a JS expression or function directly on the session's live page.
+        This bypasses crawler.arun, so nothing is re-navigated and the captured
+        buffers stay intact; the value comes back already deserialized.
+        """
+        page = self.get_session_page(session_id)
+        return await page.evaluate(expression, arg)
+
+    async def evaluate_many(self, expressions: Dict[str, str], session_id="session1") -> Dict:
+        """
+        Evaluate several JS expressions in a single round trip and return
+        {name: value}. An expression that throws yields None for its name.
+        """
+        fields = ",".join(
+            f"{json.dumps(name)}: (() => {{ try {{ return ({expr}); }} catch (e) {{ return null; }} }})()"
+            for name, expr in expressions.items()
+        )
+        return await self.evaluate(f"() => ({{{fields}}})", session_id=session_id)
+
     async def run_js(self, script: str, session_id="session1"):
         """
-        Run arbitrary JavaScript in the current page context using arun().
-        Uses self.current_url as the URL context.
+        Run a JavaScript snippet (statements, may `return` a value) on the
+        session's live page and return its result.
         """
-        temp_config = self.run_config.clone()
-        temp_config.js_code = [script]
-        result = await self.crawler.arun(url=self.current_url, config=temp_config, session_id=session_id)
-        return result.extracted_content
+        return await self.evaluate(f"async () => {{ {script} }}", session_id=session_id)
+
+    async def wait_for_settle(self, session_id="session1") -> dict:
+        """Wait until the session's page has settled (see settle.py)."""
+        return await wait_for_settle_async(self.get_session_page(session_id), self.quiet_ms, self.cap_ms)
+
+    async def release_session(self, session_id: str):
+        """
+        Close the page held by a session.
+        Only the page is closed: sessions with the same run config share a browser
+        context, so closing the context (as crawler_strategy.kill_session does)
+        would tear down every other page scanning concurrently.
+        """
+        self.session_urls.pop(session_id, None)
+        sessions = self.crawler.crawler_strategy.browser_manager.sessions
+        entry = sessions.pop(session_id, None)
+        if entry:
+            _, page, _ = entry
+            if self.sinkhole:
+                self.sinkhole.forget(page)
+            await page.close()
     
-    async def get_data_layer_events(self, session_id="session1"):
+    async def read_buffer(self, name: str, since: int = 0, session_id="session1") -> Dict:
+        """
+        Read one in-page capture buffer from sequence number `since`.
+        Returns {"events", "next_seq", "overflow", "missed"}.
+        """
+        return await self.evaluate(READ_BUFFER_FN, [name, since, self.drain_on_read], session_id=session_id)
+
+    async def get_data_layer_events(self, session_id="session1", since: int = 0):
         """
-        Retrieve the dataLayer events captured on the page.
+        Retrieve the dataLayer events captured on the page (from seq `since`).
         """
-        raw = await self.run_js("return JSON.stringify(window.collectedEvents);", session_id=session_id)
-        if raw:
-            return json.loads(raw)
-        return []
+        return (await self.read_buffer(DATA_LAYER_BUFFER, since, session_id=session_id))["events"]
     
     async def trigger_clicks(self, target_text=None, session_id="session1"):
         """
         Simulate clicks on visible elements. Optionally filter by target text.
+        Returns {"clicks", "clicked_at", "wait_ms"}: the number of elements
+        clicked, performance.now() when clicking started and the settle wait
+        after the last click.
         """
         condition = ("if (text && text.toUpperCase().includes('" + target_text.upper() + "')) { return true; } else " if target_text else "")
         js_click = r"""
-        (function(){
-            const elements = Array.from(document.querySelectorAll("button, a, span")).filter(el => {
-                const style = window.getComputedStyle(el);
-                if (style.visibility === 'hidden' || style.display === 'none' || parseFloat(style.opacity) === 0)
-                    return false;
+        return await (async function(){
+            const candidates = Array.from(document.querySelectorAll("button, a, span")).filter(el => {
                 const text = el.innerText || "";
                 """ + condition + r"""
                 return true;
             });
+            // One batched visibility pass instead of a computed style per element.
+            const visible = await (""" + VISIBLE_FN + r""")(candidates);
+            const elements = candidates.filter((el, i) => visible[i]);
             console.log("Number of clickable elements:", elements.length);
+            const clickedAt = performance.now();
             elements.forEach(el => {
                 try {
                     el.scrollIntoView();
@@ -187,25 +435,393 @@ class GA4EventCollector:
                     console.log("Error clicking element:", e);
                 }
             });
+            if (window.__ga4Settle) window.__ga4Settle.arm();
+            return { clicks: elements.length, clicked_at: clickedAt };
         })();
         """
-        await self.run_js(js_click, session_id=session_id)
-        await asyncio.sleep(5)
+        clicked = await self.run_js(js_click, session_id=session_id) or {}
+        settle = await self.wait_for_settle(session_id=session_id)
+        return {"clicks": clicked.get("clicks", 0), "clicked_at": clicked.get("clicked_at"), "wait_ms": settle.get("waited_ms")}
     
-    async def get_ga4_events(self, session_id="session1"):
+    async def get_ga4_events(self, session_id="session1", since: int = 0):
         """
-        Retrieve the GA4 events captured by the fetch override.
+        Retrieve the GA4 events captured by the fetch override (from seq `since`),
+        or the hits recorded by the sinkhole (from index `since`) when enabled.
         """
-        raw = await self.run_js("return JSON.stringify(window.ga4Events);", session_id=session_id)
-        if raw:
-            return json.loads(raw)
-        return []
+        if self.sinkhole:
+            return self.sinkhole.hits_for(self.get_session_page(session_id), since)
+        return (await self.read_buffer(GA4_BUFFER, since, session_id=session_id))["events"]
+
+    async def get_captured_events(self, session_id="session1") -> Dict:
+        """
+        Read the dataLayer and GA4 buffers in one round trip.
+        Returns {"dataLayer": [...], "ga4": [...]}.
+        """
+        drain = "true" if self.drain_on_read else "false"
+        reads = await self.evaluate_many(
+            {name: f"window.__ga4Capture.read('{name}', 0, {drain})" for name in (DATA_LAYER_BUFFER, GA4_BUFFER)},
+            session_id=session_id,
+        )
+        captured = {name: (read or {}).get("events", []) for name, read in reads.items()}
+        if self.sinkhole:
+            captured[GA4_BUFFER] = self.sinkhole.hits_for(self.get_session_page(session_id))
+        return captured
+
+    async def fan_out_clicks(
+        self,
+        url: str,
+        target_text=None,
+        tabs: int = 4,
+        section_selector: str = "body",
+        snippets: Optional[List[str]] = None,
+        session_id: Optional[str] = None,
+        components: Optional[ComponentRegistry] = None,
+        page_timeout_ms: Optional[int] = None,
+    ) -> dict:
+        """
+        Click the CTA targets of one URL from several tabs at once. The targets
+        are listed in the first tab and split round-robin across `tabs` tabs of
+        the same page; each tab clicks its share one element at a time, so every
+        dataLayer push and GA4 hit that follows a click is attributed to it.
+        Link clicks are kept from navigating; if a tab navigates anyway, its
+        page is reloaded before the next click.
+
+        With a ComponentRegistry, components already clicked on another page of
+        the same host (shared header/footer/nav) are not clicked again; their
+        entries carry `reused_from` and the first page's result instead.
+
+        With GTM containers configured, the targets are the elements the page's
+        GTM click triggers accept (target_text, snippets and the selector cache
+        are not used) and the result gains "gtm", the trigger report. Pages
+        whose click triggers cannot be evaluated against the DOM (e.g. "All
+        Elements") fall back to the default targets.
+
+        With a click-yield model, snippets are not used either: the model drops
+        candidates that never fired anything, orders the rest by expected
+        yield and records every click outcome.
+
+        Returns {"dataLayer", "ga4", "clicks", "load_s"}: page-load events of the
+        first tab plus all click events, one entry per target with its info, tab,
+        events, `navigated` flag, error, `latency_ms` (click to first captured
+        event) and `wait_ms` (click to settled), and the first tab's load time.
+        """
+        session_id = session_id or f"fanout-{uuid.uuid4().hex[:12]}"
+        if self.click_yield is not None:
+            snippets = None
+        else:
+            snippets = DEFAULT_CLASS_SNIPPETS if snippets is None else list(snippets)
+        sessions = [session_id]
+        try:
+            load_s = await self.load_page(url, session_id=session_id, page_timeout_ms=page_timeout_ms)
+            cache_key = selectors = containers = triggers = None
+            if self.gtm is not None:
+                container_ids = await self.evaluate(CONTAINER_IDS_FN, session_id=session_id)
+                containers = await asyncio.get_running_loop().run_in_executor(None, self.gtm.load_all, container_ids or [])
+                triggers = predictive_triggers(containers)
+            if triggers:
+                listing = (LIST_PREDICTED_TARGETS_FN, [section_selector, triggers])
+            else:
+                if self.selector_cache is not None:
+                    signature = await self.evaluate(TEMPLATE_SIGNATURE_FN, session_id=session_id)
+                    cache_key = self.selector_cache.key(signature, section_selector, target_text, snippets)
+                    selectors = self.selector_cache.get(cache_key)
+                listing = (LIST_CLICK_TARGETS_FN, [section_selector, target_text, snippets, selectors])
+            targets = await self.evaluate(*listing, session_id=session_id)
+            if self.selector_cache is not None and not triggers and selectors is None:
+                self.selector_cache.put(cache_key, [info.get("selector") for info in targets])
+            page_load = await self.get_captured_events(session_id=session_id)
+            candidates = list(range(len(targets)))
+            if self.click_yield is not None:
+                candidates = self.click_yield.rank(url, targets)
+            to_click, fingerprints, reused = candidates, {}, []
+            if components:
+                to_click = []
+                for index in candidates:
+                    info = targets[index]
+                    fingerprints[index], entry = components.claim(url, info)
+                    if entry is None:
+                        to_click.append(index)
+                    else:
+                        reused.append(reused_click(info, fingerprints[index], entry, index=index, tab=None,
+                                                   navigated=False, error=None))
+            shares = [[to_click[i] for i in share] for share in partition_targets(len(to_click), tabs)]
+            sessions += [f"{session_id}-tab{tab}" for tab in range(1, len(shares))]
+            # Every tab lists with the same selectors so indexes line up.
+            await asyncio.gather(*(self._open_click_tab(url, sid, listing, page_timeout_ms) for sid in sessions[1:]))
+            per_tab = await asyncio.gather(*(
+                self._click_share(url, sid, share, targets, listing, page_timeout_ms)
+                for sid, share in zip(sessions, shares)
+            ))
+        finally:
+            for sid in sessions:
+                await self.release_session(sid)
+        clicked = [click for tab_clicks in per_tab for click in tab_clicks]
+        if self.click_yield is not None:
+            for click in clicked:
+                fired = bool(click["dataLayer"] or click["ga4"])
+                # Failed or navigating clicks without events tell nothing about yield.
+                if (click["error"] is None and not click["navigated"]) or fired:
+                    self.click_yield.record(url, click["info"], fired)
+            self.click_yield.save()
+        if components:
+            for click in clicked:
+                click["component"] = fingerprints[click["index"]]
+                components.record(url, click["component"], {"dataLayer": click["dataLayer"], "ga4": click["ga4"]})
+            components.resolve(url, reused)
+        clicks = sorted(clicked + reused, key=lambda click: click["index"])
+        result = {
+            "dataLayer": page_load[DATA_LAYER_BUFFER] + [e for click in clicked for e in click["dataLayer"]],
+            "ga4": page_load[GA4_BUFFER] + [e for click in clicked for e in click["ga4"]],
+            "clicks": clicks,
+            "load_s": round(load_s, 3),
+        }
+        if containers is not None:
+            # Reused components count with the events of their first click.
+            reported = with_reused_events(reused)
+            pushed = result["dataLayer"] + [e for click in reported for e in click["dataLayer"]]
+            result["gtm"] = trigger_report(containers, clicked + reported, pushed)
+        return result
+
+    async def _open_click_tab(self, url, session_id, listing, page_timeout_ms=None):
+        """Load the page in a session and list its click targets (listing: (js_fn, args))."""
+        await self.load_page(url, session_id=session_id, page_timeout_ms=page_timeout_ms)
+        await self.evaluate(*listing, session_id=session_id)
+
+    async def _click_share(self, url, session_id, indexes, targets, listing, page_timeout_ms=None) -> List[dict]:
+        """Click the given target indexes one by one in a single tab."""
+        clicks = []
+        for index in indexes:
+            click = {"index": index, "tab": session_id, "info": targets[index],
+                     "dataLayer": [], "ga4": [], "navigated": False, "error": None,
+                     "latency_ms": None, "wait_ms": None}
+            clicks.append(click)
+            page = self.get_session_page(session_id)
+            sinkhole_cursor = len(self.sinkhole.hits_for(page)) if self.sinkhole else 0
+            try:
+                outcome = await self.evaluate(CLICK_TARGET_AT_FN, [index, targets[index]], session_id=session_id)
+                if not outcome["clicked"]:
+                    click["error"] = outcome["reason"]
+                    continue
+                settle = await self.wait_for_settle(session_id=session_id)
+                click["wait_ms"] = settle.get("waited_ms")
+                cursor = outcome["cursor"]
+                events = await self.evaluate(READ_CLICK_EVENTS_FN, [cursor["dataLayer"], cursor["ga4"]], session_id=session_id)
+            except Exception as e:
+                # Usually "execution context was destroyed": the click navigated.
+                click["error"] = str(e)
+                events = None
+            if events is None:
+                click["navigated"] = True
+                await self._open_click_tab(url, session_id, listing, page_timeout_ms)
+            else:
+                click["dataLayer"] = events[DATA_LAYER_BUFFER]
+                click["ga4"] = events[GA4_BUFFER]
+                click["latency_ms"] = click_latency_ms(click["dataLayer"] + click["ga4"], outcome.get("clicked_at"))
+            if self.sinkhole:
+                # Sinkholed hits are recorded outside the page, so they survive
+                # a navigation and remain attributable.
+                click["ga4"] = self.sinkhole.hits_for(page, sinkhole_cursor)
+        return clicks
+
+    async def scan_page(self, url: str, target_text=None, session_id=None, tabs: int = 1,
+                        components: Optional[ComponentRegistry] = None, page_timeout_ms: Optional[int] = None) -> dict:
+        """
+        Scan a single URL in its own session: load it, trigger clicks and read the
+        dataLayer and GA4 buffers. With tabs > 1, a ComponentRegistry, a selector
+        cache, GTM containers or a click-yield model the clicks go through
+        fan_out_clicks and the result gains "clicks"; otherwise all targets are
+        clicked at once and "click_timing" holds that burst's latency and wait.
+        The result's "load_s" is the page load time (before clicks).
+        Errors are reported in the result instead of raised so one bad page does
+        not stop a batch.
+        """
+        session_id = session_id or f"scan-{uuid.uuid4().hex[:12]}"
+        started = time.perf_counter()
+        result = {"url": url, "session_id": session_id, "dataLayer": [], "ga4": [], "error": None}
+        try:
+            if tabs > 1 or components or self.selector_cache is not None or self.gtm is not None or self.click_yield is not None:
+                result.update(await self.fan_out_clicks(
+                    url, target_text=target_text, tabs=tabs, session_id=session_id, components=components,
+                    page_timeout_ms=page_timeout_ms,
+                ))
+            else:
+                result["load_s"] = round(await self.load_page(url, session_id=session_id, page_timeout_ms=page_timeout_ms), 3)
+                timing = await self.trigger_clicks(target_text=target_text, session_id=session_id)
+                result.update(await self.get_captured_events(session_id=session_id))
+                # All targets are clicked at once, so the page yields a single
+                # measurement covering timing["clicks"] clicks.
+                result["click_timing"] = {
+                    "clicks": timing["clicks"],
+                    "latency_ms": click_latency_ms(result["dataLayer"] + result["ga4"], timing["clicked_at"]),
+                    "wait_ms": timing["wait_ms"],
+                }
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            await self.release_session(session_id)
+            result["elapsed_s"] = round(time.perf_counter() - started, 3)
+        return result
+
+    async def scan_page_incremental(self, url: str, store: FingerprintStore, gtm_versions: Optional[Dict] = None,
+                                    target_text=None, **scan_kwargs) -> dict:
+        """
+        Fingerprint the page with a plain HTTP fetch first (see page_fingerprint.py)
+        and return the stored result, marked "reused", if nothing changed since
+        the last scan. Otherwise scan it fully and store the new fingerprint.
+        Pages that cannot be fetched without a browser are always scanned.
+        """
+        started = time.perf_counter()
+        try:
+            fingerprint = await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(fetch_fingerprint, url, gtm_versions=gtm_versions, target_text=target_text)
+            )
+        except Exception:
+            fingerprint = None
+        stored = store.unchanged(url, fingerprint) if fingerprint else None
+        if stored is not None:
+            return dict(stored, reused=True, elapsed_s=round(time.perf_counter() - started, 3))
+        result = await self.scan_page(url, target_text=target_text, **scan_kwargs)
+        if fingerprint and not result["error"]:
+            store.put(url, fingerprint, result)
+        result["reused"] = False
+        return result
+
+    async def scan_urls(self, urls: Iterable[str], target_text=None, concurrency: Optional[int] = None, tabs: int = 1,
+                        components: Optional[ComponentRegistry] = None,
+                        store: Optional[FingerprintStore] = None) -> AsyncIterator[dict]:
+        """
+        Scan many URLs on the shared browser with at most `concurrency` URLs in
+        flight at once (each using `tabs` tabs). Results are yielded as soon as
+        each page finishes, so the order is completion order, not input order.
+        Pass a ComponentRegistry to click shared components once per host, and a
+        FingerprintStore to skip pages that have not changed since the last run.
+        """
+        concurrency = max(1, concurrency or self.concurrency)
+        queue: asyncio.Queue = asyncio.Queue()
+        for url in urls:
+            queue.put_nowait(url)
+        results: asyncio.Queue = asyncio.Queue()
+        gtm_versions: Dict[str, str] = {}  # GTM container versions, fetched once per run.
+
+        async def worker():
+            while True:
+                try:
+                    url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    if store is not None:
+                        result = await self.scan_page_incremental(
+                            url, store, gtm_versions, target_text=target_text, tabs=tabs, components=components
+                        )
+                    else:
+                        result = await self.scan_page(url, target_text=target_text, tabs=tabs, components=components)
+                except Exception as e:
+                    # e.g. release_session failing in scan_page's finally. Every URL
+                    # must still put a result or the consumer below waits forever.
+                    result = {"url": url, "dataLayer": [], "ga4": [], "error": str(e)}
+                await results.put(result)
+
+        total = queue.qsize()
+        workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, total))]
+        try:
+            for _ in range(total):
+                yield await results.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def scan_locales(self, path_template: str, locales: Iterable[str], target_text=None,
+                           concurrency: Optional[int] = None, tabs: int = 1) -> dict:
+        """
+        Scan one page across locales in parallel (see locale_fanout.py). Consent
+        is accepted once on the first locale and its storage state is seeded into
+        every context, so no locale pays for the banner.
+        Returns {"consent": selector clicked or None, "results": {locale: result},
+        "matrix": per-locale event count DataFrame}.
+        """
+        urls = expand_locales(path_template, locales)
+        state = await self.capture_consent_state(next(iter(urls.values())))
+        self.storage_state = state
+        locale_of = {url: locale for locale, url in urls.items()}
+        results = {}
+        async for result in self.scan_urls(list(urls.values()), target_text=target_text, concurrency=concurrency, tabs=tabs):
+            results[locale_of[result["url"]]] = result
+        results = {locale: results[locale] for locale in urls}
+        return {"consent": state.get("accepted_with"), "results": results, "matrix": event_matrix(results)}
+
+# ------------------------------------------------------------------
+# Warm Crawler Service (shared across Streamlit reruns)
+# ------------------------------------------------------------------
+
+class CrawlerService:
+    """
+    Keeps warm GA4EventCollector browsers on a dedicated event-loop thread.
+    Playwright objects are bound to the loop that created them, and every
+    Streamlit rerun would otherwise start a fresh loop and browser. Collectors
+    come from a BrowserPool that health-checks them, clears cookies between
+    scans and recycles a browser after max_pages pages or max_rss_mb.
+    """
+
+    def __init__(self, size: int = 1, max_pages: int = 200, max_rss_mb: float = 3000, **collector_kwargs):
+        self.collector_kwargs = collector_kwargs
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="crawler-service", daemon=True)
+        self._thread.start()
+        self._launch_lock = threading.Lock()  # One browser launch at a time (see _create).
+        self.pool = BrowserPool(
+            factory=self._create,
+            dispose=lambda collector: self._call(collector.close()),
+            size=size,
+            max_pages=max_pages,
+            max_rss_mb=max_rss_mb,
+            health_check=lambda collector: self._call(collector.is_healthy()),
+            reset=lambda collector: self._call(collector.reset_browser_state()),
+            # Only the collector's own browser counts, not Streamlit or the
+            # other pooled browsers in this process tree.
+            rss_of=lambda collector: process_tree_rss_mb(collector.browser_pid) if collector.browser_pid else 0.0,
+        )
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def _create(self) -> GA4EventCollector:
+        collector = GA4EventCollector(**self.collector_kwargs)
+        # Playwright does not expose the browser pid: the collector's browser is
+        # the one that appears under this process while it starts.
+        with self._launch_lock:
+            before = browser_root_pids(os.getpid())
+            self._call(collector.start())
+            launched = browser_root_pids(os.getpid()) - before
+        collector.browser_pid = launched.pop() if len(launched) == 1 else None
+        return collector
+
+    def run(self, fn, pages: int = 1):
+        """Run `fn(collector)` (a coroutine function) on a leased warm collector."""
+        with self.pool.lease() as lease:
+            result = self._call(fn(lease.resource))
+            lease.pages += pages
+        return result
+
+    def scan(self, url: str, target_text=None) -> dict:
+        """Scan one URL on a warm collector (see GA4EventCollector.scan_page)."""
+        return self.run(lambda collector: collector.scan_page(url, target_text=target_text))
+
+    def close(self):
+        self.pool.close()
+        self.loop.call_soon_threadsafe(self.loop.stop)
 
 # ------------------------------------------------------------------
 # Streamlit Interface
 # ------------------------------------------------------------------
 
-async def main():
+@st.cache_resource
+def get_crawler_service() -> CrawlerService:
+    """Process-wide warm crawler service, shared across Streamlit reruns."""
+    return CrawlerService(size=1)
+
+def main():
     st.title("GA4 Event Collector (Mimicking Selenium)")
     st.write("Enter the URL from which to collect GA4 events.")
     
@@ -218,25 +834,248 @@ async def main():
         else:
             url_cleaned = url.strip()
             st.write("DEBUG: URL to crawl:", url_cleaned)
+            session_id = f"ui-{uuid.uuid4().hex[:12]}"
+            
+            async def collect(collector):
+                try:
+                    # Step 1: Load the page and capture initial dataLayer events.
+                    await collector.load_page(url_cleaned, session_id=session_id)
+                    dl_events = await collector.get_data_layer_events(session_id=session_id)
+                    # Step 2: Simulate clicks to trigger additional GA4 events.
+                    await collector.trigger_clicks(
+                        target_text=target_text if target_text.strip() else None, session_id=session_id
+                    )
+                    ge_events = await collector.get_ga4_events(session_id=session_id)
+                    return dl_events, ge_events
+                finally:
+                    await collector.release_session(session_id)
             
-            collector = GA4EventCollector()
-            await collector.start()
             try:
-                # Step 1: Load the page and capture initial dataLayer events.
-                await collector.load_page(url_cleaned)
-                dl_events = await collector.get_data_layer_events()
+                dl_events, ge_events = get_crawler_service().run(collect)
                 st.subheader("DataLayer Events")
                 st.json(dl_events)
-                
-                # Step 2: Simulate clicks to trigger additional GA4 events.
-                await collector.trigger_clicks(target_text=target_text if target_text.strip() else None)
-                ge_events = await collector.get_ga4_events()
                 st.subheader("GA4 Events")
                 st.json(ge_events)
             except Exception as e:
                 st.error(f"An error occurred: {e}")
-            finally:
-                await collector.close()
+
+# ------------------------------------------------------------------
+# Command-line batch mode
+# ------------------------------------------------------------------
+
+async def run_batch(urls, concurrency=4, target_text=None, output=None, sink_dir=None, parquet_dir=None, sinkhole_ga4=False, tabs=1,
+                    dedup_components=False, selector_cache=None, fingerprint_dir=None, record_har=None, replay_har=None,
+                    asset_cache=None, asset_max_age=DEFAULT_MAX_AGE_S, fast_forward=False, gtm_predict=False, gtm_fixtures=None,
+                    click_yield=None, block_resources=False):
+    """
+    Scan the URLs concurrently and write one JSON line per page as it completes.
+    With sink_dir, events are also streamed to rotating JSONL files there and
+    compacted to Parquet under parquet_dir (if given). With sinkhole_ga4, GA4
+    hits are recorded locally and never sent to Google Analytics. With tabs > 1,
+    each page's clicks are fanned out across that many tabs. With
+    dedup_components, shared header/footer/nav CTAs are clicked once per host.
+    selector_cache is a JSON file of per-template CTA selectors (see
+    selector_cache.py), reused and updated across runs. With fingerprint_dir,
+    pages whose fingerprint is unchanged since the last run reuse their stored
+    events instead of being scanned again. record_har stores the run's network
+    traffic in a HAR archive; replay_har re-runs the scan from one, offline.
+    asset_cache is a directory of static assets kept for asset_max_age seconds
+    and reused across pages and runs (see asset_cache.py). fast_forward cuts
+    animation and debounce waits after clicks (see fast_forward.py); every
+    page reports its click-to-event latency and wait (per click when clicked
+    per target, per page when all targets are clicked at once), summarised
+    with running statistics, so runs with and without it can be compared.
+    With gtm_predict, only elements the pages' GTM click triggers accept are
+    clicked and unfired triggers are reported (see gtm_container.py);
+    gtm_fixtures is a directory of <container id>.js files used instead of
+    fetching gtm.js. click_yield is a JSON file of per-element click outcomes
+    (see click_yield.py): elements that never fire are skipped, and the table
+    is updated as the run goes. block_resources applies DEFAULT_PROFILE
+    (images, media, fonts and denylisted hosts are aborted, analytics never).
+    Progress and throughput (pages/minute) are reported on stderr.
+    """
+    out = open(output, "w", encoding="utf-8") if output else sys.stdout
+    sink = JsonlSink(sink_dir, parquet_dir=parquet_dir) if sink_dir else None
+    assets = AssetCache(asset_cache, max_age_s=asset_max_age) if asset_cache else None
+    collector = GA4EventCollector(
+        concurrency=concurrency,
+        resource_profile=DEFAULT_PROFILE if block_resources else None,
+        sinkhole_ga4=sinkhole_ga4,
+        selector_cache=SelectorCache(selector_cache) if selector_cache else None,
+        har=HarArchive(replay_har, REPLAY) if replay_har else HarArchive(record_har, RECORD) if record_har else None,
+        asset_cache=assets,
+        fast_forward=fast_forward,
+        gtm=GtmContainers(fixture_dir=gtm_fixtures, asset_cache=assets) if gtm_predict or gtm_fixtures else None,
+        click_yield=ClickYieldModel(click_yield) if click_yield else None,
+    )
+    components = ComponentRegistry() if dedup_components else None
+    store = FingerprintStore(fingerprint_dir) if fingerprint_dir else None
+    await collector.start()
+    started = time.perf_counter()
+    done = 0
+    timings = LatencyStats()  # Running values only; click records are not kept.
+    try:
+        async for result in collector.scan_urls(urls, target_text=target_text, tabs=tabs, components=components, store=store):
+            done += 1
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            if sink:
+                sink.write_page(result["url"], result["dataLayer"], result["ga4"])
+            if not result.get("reused"):
+                for click in result.get("clicks") or []:
+                    timings.add(click)
+                if result.get("click_timing"):
+                    timings.add(result["click_timing"], count=result["click_timing"]["clicks"])
+            rate = done / max(time.perf_counter() - started, 1e-9) * 60
+            status = "error: " + result["error"] if result["error"] else f"{len(result['ga4'])} GA4 events"
+            if result.get("reused"):
+                status += ", unchanged"
+            if result.get("gtm"):
+                unfired = result["gtm"]["unfired"]
+                status += f", {len(result['clicks'])} predicted targets, {len(unfired)} unfired triggers"
+                if unfired:
+                    status += " (" + ", ".join(f"{t['id']} {t['event']}" for t in unfired) + ")"
+            print(f"[{done}/{len(urls)}] {result['url']} ({status}) - {rate:.1f} pages/min", file=sys.stderr)
+        if components:
+            stats = components.stats()
+            print(f"Shared components: {stats['clicked']} clicked, {stats['reused']} clicks skipped", file=sys.stderr)
+        if store:
+            print(f"Incremental: {store.scanned} pages scanned, {store.reused} unchanged", file=sys.stderr)
+        if timings.clicks:
+            summary = timings.summary()
+            latency, wait = summary["latency_ms"], summary["wait_ms"]
+            print(
+                f"Clicks: {summary['clicks']}, click-to-event latency median {latency['median']} ms "
+                f"(p95 {latency['p95']}, {latency['count']} measured), wait per click median {wait['median']} ms "
+                f"(p95 {wait['p95']}){' [fast-forward]' if fast_forward else ''}",
+                file=sys.stderr,
+            )
+        if collector.click_yield:
+            stats = collector.click_yield.stats()
+            print(
+                f"Click yield: {stats['clicked']} clicked, {stats['sampled']} sampled, "
+                f"{stats['skipped']} skipped (clicks saved), {stats['elements']} elements learned",
+                file=sys.stderr,
+            )
+        if collector.asset_cache:
+            stats = collector.asset_cache.stats()
+            print(
+                f"Asset cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['bytes_served'] / 1e6:.1f} MB served locally, {stats['bytes_fetched'] / 1e6:.1f} MB fetched",
+                file=sys.stderr,
+            )
+    finally:
+        await collector.close()
+        if sink:
+            sink.close()
+        if output:
+            out.close()
+
+
+async def run_locales(path_template, locales, concurrency=4, target_text=None, tabs=1, output=None, matrix_csv=None):
+    """
+    Scan one page template across locales (consent accepted once and shared),
+    write one JSON line per locale and print or save the per-locale event matrix.
+    """
+    collector = GA4EventCollector(concurrency=concurrency)
+    await collector.start()
+    try:
+        scan = await collector.scan_locales(path_template, locales, target_text=target_text, tabs=tabs)
+    finally:
+        await collector.close()
+    print(f"Consent accepted with: {scan['consent']}", file=sys.stderr)
+    out = open(output, "w", encoding="utf-8") if output else sys.stdout
+    try:
+        for locale, result in scan["results"].items():
+            out.write(json.dumps(dict(result, locale=locale), ensure_ascii=False) + "\n")
+    finally:
+        if output:
+            out.close()
+    if matrix_csv:
+        scan["matrix"].to_csv(matrix_csv)
+    else:
+        print(scan["matrix"].to_string(), file=sys.stderr)
+    return scan
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scan many URLs for dataLayer and GA4 events.")
+    parser.add_argument("urls", nargs="*", help="URLs to scan")
+    parser.add_argument("--urls-file", help="File with one URL per line")
+    parser.add_argument("--concurrency", type=int, default=4, help="Pages scanned at once (default: 4)")
+    parser.add_argument("--target-text", default=None, help="Only click elements containing this text")
+    parser.add_argument("--output", default=None, help="JSONL output file (default: stdout)")
+    parser.add_argument("--sink-dir", default=None, help="Stream events to rotating JSONL files in this directory")
+    parser.add_argument("--parquet-dir", default=None, help="Compact --sink-dir files into Parquet here")
+    parser.add_argument("--tabs", type=int, default=1, help="Tabs per URL to fan clicks out across (default: 1)")
+    parser.add_argument("--dedup-components", action="store_true", help="Click shared header/footer/nav CTAs once per site")
+    parser.add_argument("--selector-cache", default=None, help="JSON file caching CTA selectors per page template")
+    parser.add_argument("--fingerprint-dir", default=None, help="Skip pages unchanged since the last run (fingerprints stored here)")
+    parser.add_argument("--path-template", default=None, help="Locale mode: URL with a {locale} placeholder")
+    parser.add_argument("--locales", default=None, help="Locale mode: comma-separated locales, e.g. de-de,en-gb")
+    parser.add_argument("--matrix-csv", default=None, help="Locale mode: write the per-locale event matrix here")
+    parser.add_argument("--record-har", default=None, help="Record the scan's network traffic to this HAR file")
+    parser.add_argument("--replay-har", default=None, help="Replay the scan offline from this recorded HAR file")
+    parser.add_argument("--asset-cache", default=None, help="Serve static JS/CSS/fonts/images from a local cache in this directory")
+    parser.add_argument("--asset-max-age", type=float, default=DEFAULT_MAX_AGE_S,
+                        help=f"Seconds a cached asset stays fresh (default: {DEFAULT_MAX_AGE_S})")
+    parser.add_argument("--fast-forward", action="store_true", help="Disable animations and compress page timers to cut click waits")
+    parser.add_argument("--gtm-predict", action="store_true", help="Click only elements the page's GTM click triggers accept")
+    parser.add_argument("--gtm-fixtures", default=None, help="Directory of <GTM-ID>.js containers used instead of fetching gtm.js")
+    parser.add_argument("--click-yield", default=None, help="JSON file of learned click outcomes; skips elements that never fire")
+    parser.add_argument("--sinkhole-ga4", action="store_true", help="Record GA4 hits locally instead of sending them")
+    parser.add_argument("--block-resources", action="store_true",
+                        help="Abort images, media, fonts and denylisted third-party hosts (analytics is never blocked)")
+    return parser.parse_args(argv)
+
+
+def cli(argv=None):
+    args = parse_args(argv)
+    if args.path_template:
+        if not args.locales:
+            sys.exit("--path-template needs --locales.")
+        asyncio.run(run_locales(
+            args.path_template,
+            [locale.strip() for locale in args.locales.split(",") if locale.strip()],
+            concurrency=args.concurrency,
+            target_text=args.target_text,
+            tabs=args.tabs,
+            output=args.output,
+            matrix_csv=args.matrix_csv,
+        ))
+        return
+    urls = list(args.urls)
+    if args.urls_file:
+        with open(args.urls_file, encoding="utf-8") as f:
+            urls.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    if not urls:
+        sys.exit("No URLs given.")
+    asyncio.run(run_batch(
+        urls,
+        concurrency=args.concurrency,
+        target_text=args.target_text,
+        output=args.output,
+        sink_dir=args.sink_dir,
+        parquet_dir=args.parquet_dir,
+        sinkhole_ga4=args.sinkhole_ga4,
+        tabs=args.tabs,
+        dedup_components=args.dedup_components,
+        selector_cache=args.selector_cache,
+        fingerprint_dir=args.fingerprint_dir,
+        record_har=args.record_har,
+        replay_har=args.replay_har,
+        asset_cache=args.asset_cache,
+        asset_max_age=args.asset_max_age,
+        fast_forward=args.fast_forward,
+        gtm_predict=args.gtm_predict,
+        gtm_fixtures=args.gtm_fixtures,
+        click_yield=args.click_yield,
+        block_resources=args.block_resources,
+    ))
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if len(sys.argv) > 1:
+        cli()
+    else:
+        main()
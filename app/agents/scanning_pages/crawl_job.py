@@ -0,0 +1,370 @@
+# Sitemap-Driven Crawl Job
+# ========================
+#
+# Turns sitemap.xml files (sitemap indexes and .xml.gz included) and seed URLs
+# into a deduplicated URL frontier and schedules it onto a scan function, e.g.
+#   python -m app.agents.scanning_pages.crawl_job \
+#       --sitemap https://www.rangerover.com/sitemap.xml \
+#       --include "/*/range-rover/*" --checkpoint crawl.json --output events.jsonl
+#
+#   - include/exclude are glob patterns matched against the URL path
+#   - at most `concurrency` pages run at once, and at most
+#     `per_host_concurrency` of them on the same host
+#   - failed pages are retried up to max_attempts times with exponential
+#     backoff (plus jitter)
+#   - each host's page timeout adapts to its observed load times: a multiple of
+#     the 95th percentile, clamped to [min_timeout_s, max_timeout_s]
+#   - progress is checkpointed to JSON every `checkpoint_every` pages; running
+#     the same job again resumes with the pages that are not done yet
+
+import asyncio
+import fnmatch
+import gzip
+import json
+import os
+import random
+import sys
+import time
+import urllib.request
+import xml.etree.ElementTree as ET
+from collections import deque
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+DEFAULT_TIMEOUT_S = 60.0
+USER_AGENT = "Mozilla/5.0 (compatible; GA4EventsScanner/1.0)"
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used for deduplication: lower-case scheme/host, no fragment."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+def url_matches(url: str, include: Iterable[str] = (), exclude: Iterable[str] = ()) -> bool:
+    """True if the URL path matches an include pattern (if any) and no exclude pattern."""
+    path = urlsplit(url).path or "/"
+    include, exclude = list(include), list(exclude)
+    if include and not any(fnmatch.fnmatchcase(path, pattern) for pattern in include):
+        return False
+    return not any(fnmatch.fnmatchcase(path, pattern) for pattern in exclude)
+
+
+def fetch_bytes(url: str, timeout: float = 30) -> bytes:
+    """Fetch a URL (gzip-compressed sitemaps are decompressed)."""
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        data = response.read()
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    return data
+
+
+def parse_sitemap(data: bytes) -> Tuple[List[str], List[str]]:
+    """Parse a sitemap document into (page URLs, child sitemap URLs)."""
+    root = ET.fromstring(data)
+    locs = [el.text.strip() for el in root.iter() if el.tag.rsplit("}", 1)[-1] == "loc" and el.text]
+    if root.tag.rsplit("}", 1)[-1] == "sitemapindex":
+        return [], locs
+    return locs, []
+
+
+def discover_sitemap_urls(sitemaps: Iterable[str], fetch: Callable[[str], bytes] = fetch_bytes) -> List[str]:
+    """Page URLs of the given sitemaps, following sitemap indexes. Unreadable sitemaps are skipped."""
+    queue, seen, pages = deque(sitemaps), set(), []
+    while queue:
+        sitemap = queue.popleft()
+        if sitemap in seen:
+            continue
+        seen.add(sitemap)
+        try:
+            urls, children = parse_sitemap(fetch(sitemap))
+        except Exception as e:
+            print(f"Skipping sitemap {sitemap}: {e}", file=sys.stderr)
+            continue
+        pages.extend(urls)
+        queue.extend(children)
+    return pages
+
+
+class HostTimeouts:
+    """Adaptive per-host page timeouts from recent load times."""
+
+    def __init__(
+        self,
+        default_s: float = DEFAULT_TIMEOUT_S,
+        min_timeout_s: float = 15.0,
+        max_timeout_s: float = 120.0,
+        factor: float = 2.0,
+        percentile: float = 95,
+        window: int = 50,
+        min_samples: int = 5,
+    ):
+        self.default_s = default_s
+        self.min_timeout_s = min_timeout_s
+        self.max_timeout_s = max_timeout_s
+        self.factor = factor
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, deque] = {}
+
+    def observe(self, host: str, load_s: float):
+        self._samples.setdefault(host, deque(maxlen=self.window)).append(load_s)
+
+    def timeout_s(self, host: str) -> float:
+        samples = sorted(self._samples.get(host, ()))
+        if len(samples) < self.min_samples:
+            return self.default_s
+        index = min(len(samples) - 1, int(round(self.percentile / 100 * (len(samples) - 1))))
+        return max(self.min_timeout_s, min(self.max_timeout_s, samples[index] * self.factor))
+
+
+class UrlFrontier:
+    """Deduplicated, filtered URL set with per-URL status and attempt counts."""
+
+    def __init__(self, include: Iterable[str] = (), exclude: Iterable[str] = ()):
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.status: Dict[str, str] = {}
+        self.attempts: Dict[str, int] = {}
+        self.errors: Dict[str, str] = {}
+
+    def add(self, url: str) -> bool:
+        """Add a URL if it passes the filters and is new; returns whether it was added."""
+        url = normalize_url(url)
+        if url in self.status or not url_matches(url, self.include, self.exclude):
+            return False
+        self.status[url] = PENDING
+        self.attempts[url] = 0
+        return True
+
+    def pending(self) -> List[str]:
+        return [url for url, status in self.status.items() if status == PENDING]
+
+    def counts(self) -> Dict[str, int]:
+        counts = {PENDING: 0, DONE: 0, FAILED: 0}
+        for status in self.status.values():
+            counts[status] += 1
+        return counts
+
+    def to_dict(self) -> Dict:
+        return {
+            "include": self.include,
+            "exclude": self.exclude,
+            "status": self.status,
+            "attempts": self.attempts,
+            "errors": self.errors,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "UrlFrontier":
+        frontier = cls(state.get("include", ()), state.get("exclude", ()))
+        frontier.status = dict(state.get("status", {}))
+        frontier.attempts = dict(state.get("attempts", {}))
+        frontier.errors = dict(state.get("errors", {}))
+        return frontier
+
+
+class CrawlJob:
+    def __init__(
+        self,
+        seeds: Iterable[str] = (),
+        sitemaps: Iterable[str] = (),
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = (),
+        concurrency: int = 4,
+        per_host_concurrency: int = 2,
+        max_attempts: int = 3,
+        backoff_s: float = 2.0,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_every: int = 10,
+        timeouts: Optional[HostTimeouts] = None,
+        fetch: Callable[[str], bytes] = fetch_bytes,
+    ):
+        self.seeds = list(seeds)
+        self.sitemaps = list(sitemaps)
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.concurrency = max(1, concurrency)
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_s = backoff_s
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.timeouts = timeouts or HostTimeouts()
+        self.fetch = fetch
+        self.frontier: Optional[UrlFrontier] = None
+        self._since_checkpoint = 0
+
+    def build_frontier(self) -> UrlFrontier:
+        """Resume from the checkpoint if there is one, else read seeds and sitemaps."""
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                self.frontier = UrlFrontier.from_dict(json.load(f))
+            return self.frontier
+        self.frontier = UrlFrontier(self.include, self.exclude)
+        for url in self.seeds + discover_sitemap_urls(self.sitemaps, self.fetch):
+            self.frontier.add(url)
+        self.checkpoint()
+        return self.frontier
+
+    def checkpoint(self):
+        """Atomically write the frontier state to the checkpoint file."""
+        self._since_checkpoint = 0
+        if not self.checkpoint_path or self.frontier is None:
+            return
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.frontier.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp, self.checkpoint_path)
+
+    def _backoff(self, attempt: int) -> float:
+        return self.backoff_s * (2 ** (attempt - 1)) * random.uniform(0.75, 1.25)
+
+    async def run(
+        self,
+        scan: Callable[[str, float], Awaitable[Dict]],
+        on_result: Optional[Callable[[Dict], None]] = None,
+    ) -> Dict[str, int]:
+        """
+        Scan every pending URL with `await scan(url, timeout_s)`, which returns a
+        result dict with an "error" key (None on success) and ideally "load_s".
+        on_result receives each final result (success or last failed attempt).
+        Returns the frontier's status counts.
+        """
+        frontier = self.frontier or self.build_frontier()
+        by_host: Dict[str, deque] = {}
+        for url in frontier.pending():
+            by_host.setdefault(urlsplit(url).netloc, deque()).append(url)
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def scan_with_retries(url: str):
+            host = urlsplit(url).netloc
+            while True:
+                frontier.attempts[url] = frontier.attempts.get(url, 0) + 1
+                timeout_s = self.timeouts.timeout_s(host)
+                started = time.perf_counter()
+                async with slots:
+                    try:
+                        result = await scan(url, timeout_s)
+                    except Exception as e:
+                        result = {"url": url, "error": str(e)}
+                if not result.get("error"):
+                    self.timeouts.observe(host, result.get("load_s") or time.perf_counter() - started)
+                    frontier.status[url] = DONE
+                    frontier.errors.pop(url, None)
+                    return result
+                frontier.errors[url] = str(result["error"])
+                if frontier.attempts[url] >= self.max_attempts:
+                    frontier.status[url] = FAILED
+                    return result
+                await asyncio.sleep(self._backoff(frontier.attempts[url]))
+
+        async def host_worker(queue: deque):
+            while queue:
+                result = await scan_with_retries(queue.popleft())
+                if on_result:
+                    on_result(result)
+                self._since_checkpoint += 1
+                if self._since_checkpoint >= self.checkpoint_every:
+                    self.checkpoint()
+
+        workers = [
+            host_worker(queue)
+            for queue in by_host.values()
+            for _ in range(min(self.per_host_concurrency, len(queue)))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            self.checkpoint()
+        return frontier.counts()
+
+
+async def run_crawl(job: CrawlJob, output: Optional[str] = None, tabs: int = 1, **collector_kwargs) -> Dict[str, int]:
+    """Run a crawl job on one crawl4ai collector, appending results to a JSONL file."""
+    from app.agents.scanning_pages.crawl_4_ai import GA4EventCollector
+
+    collector = GA4EventCollector(concurrency=job.concurrency, **collector_kwargs)
+    await collector.start()
+    out = open(output, "a", encoding="utf-8") if output else sys.stdout
+    started = time.perf_counter()
+    done = 0
+
+    async def scan(url: str, timeout_s: float) -> Dict:
+        return await collector.scan_page(url, tabs=tabs, page_timeout_ms=int(timeout_s * 1000))
+
+    def on_result(result: Dict):
+        nonlocal done
+        done += 1
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+        rate = done / max(time.perf_counter() - started, 1e-9) * 60
+        status = "error: " + result["error"] if result.get("error") else f"{len(result.get('ga4', []))} GA4 events"
+        print(f"[{done}] {result['url']} ({status}) - {rate:.1f} pages/min", file=sys.stderr)
+
+    try:
+        job.build_frontier()
+        print(f"Frontier: {job.frontier.counts()}", file=sys.stderr)
+        return await job.run(scan, on_result)
+    finally:
+        await collector.close()
+        if output:
+            out.close()
+
+
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Crawl a site from sitemaps/seed URLs and scan every page for GA4 events.")
+    parser.add_argument("seeds", nargs="*", help="Seed URLs")
+    parser.add_argument("--sitemap", action="append", default=[], help="Sitemap (or sitemap index) URL; repeatable")
+    parser.add_argument("--include", action="append", default=[], help="Glob on the URL path to include, e.g. '/*/range-rover/*'")
+    parser.add_argument("--exclude", action="append", default=[], help="Glob on the URL path to exclude")
+    parser.add_argument("--concurrency", type=int, default=4, help="Pages scanned at once (default: 4)")
+    parser.add_argument("--per-host", type=int, default=2, help="Pages scanned at once per host (default: 2)")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Attempts per page (default: 3)")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file; an existing one is resumed")
+    parser.add_argument("--output", default=None, help="JSONL file results are appended to (default: stdout)")
+    parser.add_argument("--tabs", type=int, default=1, help="Tabs per page to fan clicks out across (default: 1)")
+    parser.add_argument("--asset-cache", default=None, help="Serve static JS/CSS/fonts/images from a local cache in this directory")
+    parser.add_argument("--fast-forward", action="store_true", help="Disable animations and compress page timers to cut click waits")
+    parser.add_argument("--block-resources", action="store_true",
+                        help="Abort images, media, fonts and denylisted third-party hosts (analytics is never blocked)")
+    return parser.parse_args(argv)
+
+
+def cli(argv=None):
+    args = parse_args(argv)
+    if not args.seeds and not args.sitemap and not args.checkpoint:
+        sys.exit("No seed URLs, sitemaps or checkpoint given.")
+    job = CrawlJob(
+        seeds=args.seeds,
+        sitemaps=args.sitemap,
+        include=args.include,
+        exclude=args.exclude,
+        concurrency=args.concurrency,
+        per_host_concurrency=args.per_host,
+        max_attempts=args.max_attempts,
+        checkpoint_path=args.checkpoint,
+    )
+    collector_kwargs = {"fast_forward": args.fast_forward}
+    if args.asset_cache:
+        from app.agents.scanning_pages.asset_cache import AssetCache
+
+        collector_kwargs["asset_cache"] = AssetCache(args.asset_cache)
+    if args.block_resources:
+        from app.agents.scanning_pages.interception import DEFAULT_PROFILE
+
+        collector_kwargs["resource_profile"] = DEFAULT_PROFILE
+    counts = asyncio.run(run_crawl(job, output=args.output, tabs=args.tabs, **collector_kwargs))
+    print(f"Crawl finished: {counts}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    cli()
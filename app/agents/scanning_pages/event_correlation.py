@@ -0,0 +1,161 @@
+# dataLayer / GA4 Hit Correlation
+# ===============================
+#
+# Scans return dataLayer pushes and GA4 hits as two unrelated lists. This
+# stage links every hit to the push that caused it:
+#   - both streams become typed frames: page_url, click (the click's target
+#     index; -1 for events captured while the page loaded), timestamp
+#     (datetime64[ns, UTC]) and the event name (the push's `event`, or the
+#     name of a gtag('event', ...) call; the hit's `en`). Hits come from
+#     decode_hits, so a batched request yields one row per hit
+#   - correlate() sorts both frames by time once and runs a single
+#     pd.merge_asof: each hit is joined to the latest push of the same page and
+#     click at or before it, at most window_ms earlier (optionally also
+#     requiring the same event name)
+#   - hits without a push and pushes without a hit are flagged as orphans
+# The join is vectorized end to end, so archives of millions of events
+# correlate in seconds instead of nested loops over dicts.
+
+import json
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.agents.scanning_pages.ga4_decoder import decode_hits
+
+DEFAULT_WINDOW_MS = 2000
+PAGE_LOAD = -1
+
+
+def _push_name(event: Dict):
+    data = event.get("data") if isinstance(event, dict) else None
+    if not isinstance(data, dict):
+        return None
+    if data.get("event"):
+        return str(data["event"])
+    if data.get("0") == "event" and data.get("1"):
+        return str(data["1"])  # gtag('event', name, params) pushes its arguments object.
+    return None
+
+
+def _by_click(events: List[Dict], clicks: List[Dict], key: str) -> List[Tuple[int, Dict]]:
+    """
+    (click, event) pairs of one result's stream. Fan-out results list the
+    page-load events first and then every click's events, which the click
+    entries repeat; results without clicks are all page load.
+    """
+    attributed = [(click.get("index", i), e) for i, click in enumerate(clicks) for e in click.get(key) or []]
+    loaded = max(len(events) - len(attributed), 0)
+    return [(PAGE_LOAD, e) for e in events[:loaded]] + attributed
+
+
+def event_frames(results: Iterable[Dict]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Typed push and hit frames from scan results ({"url", "dataLayer", "ga4",
+    "clicks"?}). Pushes: page_url, click, timestamp, event. Hits: the
+    decode_hits columns plus page_url and click.
+    """
+    push_rows, hit_events, hit_pages, hit_clicks = [], [], [], []
+    for result in results:
+        url = result.get("url", "")
+        clicks = result.get("clicks") or []
+        for click, event in _by_click(result.get("dataLayer") or [], clicks, "dataLayer"):
+            push_rows.append((url, click, event.get("timestamp") if isinstance(event, dict) else None, _push_name(event)))
+        for click, event in _by_click(result.get("ga4") or [], clicks, "ga4"):
+            hit_events.append(event)
+            hit_pages.append(url)
+            hit_clicks.append(click)
+    pushes = pd.DataFrame(push_rows, columns=["page_url", "click", "timestamp", "event"])
+    pushes["click"] = pushes["click"].astype("int64")
+    pushes["timestamp"] = pd.to_datetime(pushes["timestamp"], utc=True, errors="coerce", format="ISO8601")
+    pushes["event"] = pushes["event"].astype("string")
+    hits = decode_hits(hit_events, hit_pages)
+    # decode_hits leaves the columns untyped when there are no hits (e.g. GA4
+    # blocked or no consent); merge_asof needs matching dtypes.
+    hits["timestamp"] = pd.to_datetime(hits["timestamp"], utc=True)
+    if "page_url" not in hits:
+        hits["page_url"] = pd.Series(dtype=object)
+    hits["click"] = np.asarray(hit_clicks, dtype="int64")[hits["request_index"].to_numpy(dtype="int64")]
+    if "en" not in hits:
+        hits["en"] = pd.Series(pd.NA, index=hits.index, dtype="string")
+    return pushes, hits
+
+
+def correlate(
+    pushes: pd.DataFrame,
+    hits: pd.DataFrame,
+    window_ms: float = DEFAULT_WINDOW_MS,
+    by_event: bool = False,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Link hits to pushes (frames as returned by event_frames). Returns
+    (pushes, hits) in their input order with added columns:
+      pushes: push_row, hit_count, orphan (no hit followed within the window)
+      hits:   push_row (<NA> for orphans), push_event, lag_ms, orphan
+    With by_event, a hit only matches a push with the same event name.
+    """
+    pushes = pushes.reset_index(drop=True).assign(push_row=np.arange(len(pushes), dtype="int64"))
+    hits = hits.reset_index(drop=True).assign(hit_row=np.arange(len(hits), dtype="int64"))
+    pages, _ = pd.factorize(pd.concat([pushes["page_url"], hits["page_url"]], ignore_index=True))
+    pushes["_page"], hits["_page"] = pages[: len(pushes)], pages[len(pushes):]
+    keys = ["_page", "click"]
+    if by_event:
+        pushes["_event"] = pushes["event"].fillna("").astype(str)
+        hits["_event"] = hits["en"].fillna("").astype(str)
+        keys.append("_event")
+
+    right = (
+        pushes.loc[pushes["timestamp"].notna(), keys + ["timestamp", "push_row", "event"]]
+        .rename(columns={"timestamp": "push_timestamp", "event": "push_event"})
+        .sort_values("push_timestamp", kind="stable")
+    )
+    timed = hits["timestamp"].notna()
+    joined = pd.merge_asof(
+        hits.loc[timed, keys + ["timestamp", "hit_row"]].sort_values("timestamp", kind="stable"),
+        right,
+        left_on="timestamp",
+        right_on="push_timestamp",
+        by=keys,
+        direction="backward",
+        tolerance=pd.Timedelta(milliseconds=window_ms),
+    ).set_index("hit_row")
+
+    out = hits.drop(columns=keys[:1] + keys[2:])
+    out["push_row"] = joined["push_row"].reindex(out["hit_row"]).to_numpy()
+    out["push_row"] = out["push_row"].astype("Int64")
+    out["push_event"] = joined["push_event"].reindex(out["hit_row"]).to_numpy()
+    out["push_event"] = out["push_event"].astype("string")
+    lag = (joined["timestamp"] - joined["push_timestamp"]).dt.total_seconds() * 1000
+    out["lag_ms"] = lag.reindex(out["hit_row"]).to_numpy(dtype="float64")
+    out["orphan"] = out["push_row"].isna().to_numpy()
+    out = out.drop(columns="hit_row")
+
+    counts = out["push_row"].dropna().astype("int64").value_counts()
+    pushes["hit_count"] = counts.reindex(pushes["push_row"], fill_value=0).to_numpy()
+    pushes["orphan"] = pushes["hit_count"] == 0
+    return pushes.drop(columns=keys[:1] + keys[2:]), out
+
+
+def correlation_summary(pushes: pd.DataFrame, hits: pd.DataFrame) -> Dict:
+    """Counts of correlated and orphaned events plus the median push-to-hit lag."""
+    lag = hits.loc[~hits["orphan"], "lag_ms"]
+    return {
+        "pushes": int(len(pushes)),
+        "hits": int(len(hits)),
+        "orphan_pushes": int(pushes["orphan"].sum()),
+        "orphan_hits": int(hits["orphan"].sum()),
+        "median_lag_ms": round(float(lag.median()), 1) if len(lag) else None,
+    }
+
+
+def correlate_scan_archive(paths: Iterable[str], window_ms: float = DEFAULT_WINDOW_MS, by_event: bool = False):
+    """Correlate the results of one or more JSONL scan archives (one result per line)."""
+    def results():
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    return correlate(*event_frames(results()), window_ms=window_ms, by_event=by_event)
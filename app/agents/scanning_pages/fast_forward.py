@@ -0,0 +1,165 @@
+# Fast-Forward Mode
+# =================
+#
+# Many CTAs push to the dataLayer only after a CSS transition, a carousel step
+# or a setTimeout debounce, so each click waited out real animation time before
+# the page settled. Fast-forward mode removes most of that wait:
+#   - NO_ANIMATIONS_JS injects a stylesheet that shortens every CSS animation
+#     and transition to 1ms (not 0: a zero-length transition never fires
+#     transitionend, which handlers often wait on) and, once jQuery is present,
+#     turns jQuery effects off
+#   - FAST_TIMERS_JS divides setTimeout delays of up to max_delay_ms by
+#     `factor`, so debounced pushes fire almost immediately. Longer timers
+#     (newsletter popups, session timeouts) and setInterval (carousel
+#     autoplay) keep their real timing
+#   - the scanner's own timers (settle polling, capture waits, the visibility
+#     fallback) use window.__ga4NativeSetTimeout and are never compressed
+# Both scripts are init scripts; the collectors also emulate
+# prefers-reduced-motion: reduce.
+#
+# CDP virtual time (Emulation.setVirtualTimePolicy) was considered instead of
+# the timer patch: it freezes the page clock whenever its budget runs out, and
+# it would also fast-forward the settle detector's own clock.
+#
+# Every captured item carries `t` (performance.now() when it was captured) and
+# every click its `clicked_at`, so click_latency_ms() measures the time from a
+# click to its first dataLayer push or GA4 hit, with or without this mode.
+
+import json
+import random
+from statistics import median
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_TIMER_FACTOR = 10
+DEFAULT_MAX_DELAY_MS = 5000
+
+NO_ANIMATIONS_CSS = (
+    "*, *::before, *::after {"
+    " animation-duration: 1ms !important; animation-delay: 0s !important;"
+    " animation-iteration-count: 1 !important;"
+    " transition-duration: 1ms !important; transition-delay: 0s !important;"
+    " scroll-behavior: auto !important; }"
+)
+
+NO_ANIMATIONS_JS = r"""
+(function(css) {
+    if (window.__ga4NoAnimations) return;
+    window.__ga4NoAnimations = true;
+    const inject = function() {
+        const style = document.createElement('style');
+        style.setAttribute('data-ga4-fast-forward', '');
+        style.textContent = css;
+        (document.head || document.documentElement).appendChild(style);
+    };
+    if (document.documentElement) inject();
+    else new MutationObserver(function(records, observer) {
+        if (!document.documentElement) return;
+        observer.disconnect();
+        inject();
+    }).observe(document, { childList: true });
+    document.addEventListener('DOMContentLoaded', function() {
+        if (window.jQuery && window.jQuery.fx) window.jQuery.fx.off = true;
+    });
+})(__CSS__);
+"""
+
+FAST_TIMERS_JS = r"""
+(function(factor, maxDelayMs) {
+    if (window.__ga4NativeSetTimeout) return;
+    const nativeSetTimeout = window.setTimeout;
+    window.__ga4NativeSetTimeout = nativeSetTimeout.bind(window);
+    window.setTimeout = function(handler, delay) {
+        const args = Array.prototype.slice.call(arguments);
+        const ms = Number(delay) || 0;
+        if (ms > 0 && ms <= maxDelayMs) args[1] = ms / factor;
+        return nativeSetTimeout.apply(window, args);
+    };
+})(__FACTOR__, __MAX_DELAY_MS__);
+"""
+
+
+def fast_forward_scripts(factor: float = DEFAULT_TIMER_FACTOR, max_delay_ms: int = DEFAULT_MAX_DELAY_MS) -> List[str]:
+    """Init scripts of fast-forward mode: the no-animation stylesheet and the timer patch."""
+    if factor < 1:
+        raise ValueError("factor must be at least 1.")
+    timers = FAST_TIMERS_JS.replace("__FACTOR__", repr(float(factor))).replace("__MAX_DELAY_MS__", str(int(max_delay_ms)))
+    return [NO_ANIMATIONS_JS.replace("__CSS__", json.dumps(NO_ANIMATIONS_CSS)), timers]
+
+
+def click_latency_ms(events: Iterable[Dict], clicked_at: Optional[float]) -> Optional[float]:
+    """
+    Milliseconds from a click (performance.now() at click time) to the first
+    item captured after it; None if the click captured nothing measurable.
+    Items captured before the click (e.g. during page load) are ignored.
+    """
+    if clicked_at is None:
+        return None
+    times = [
+        event["t"] for event in events or []
+        if isinstance(event, dict) and isinstance(event.get("t"), (int, float)) and event["t"] >= clicked_at
+    ]
+    if not times:
+        return None
+    return round(min(times) - clicked_at, 1)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class LatencyStats:
+    """
+    Running `latency_ms` / `wait_ms` statistics over a whole run. Only the
+    two numbers of each click are kept, in a reservoir sample of at most
+    max_samples values per metric, so memory stays bounded however many
+    clicks (and captured events) a run has.
+    """
+
+    def __init__(self, max_samples: int = 10000, seed: Optional[int] = None):
+        self.max_samples = max_samples
+        self.clicks = 0
+        self._seen = {"latency_ms": 0, "wait_ms": 0}
+        self._samples: Dict[str, List[float]] = {"latency_ms": [], "wait_ms": []}
+        self._random = random.Random(seed)
+
+    def add(self, click: Dict, count: int = 1):
+        """
+        Count one click record ({"latency_ms", "wait_ms"}; missing values are
+        skipped). `count` is the number of clicks the record stands for, e.g. a
+        page whose targets were all clicked at once.
+        """
+        self.clicks += count
+        for key, samples in self._samples.items():
+            value = click.get(key)
+            if value is None:
+                continue
+            self._seen[key] += 1
+            if len(samples) < self.max_samples:
+                samples.append(value)
+            else:
+                slot = self._random.randrange(self._seen[key])
+                if slot < self.max_samples:
+                    samples[slot] = value
+
+    def summary(self) -> Dict:
+        """Counts plus median and p95 of each metric (estimated once sampling kicks in)."""
+        summary = {"clicks": self.clicks}
+        for key, values in self._samples.items():
+            summary[key] = {
+                "count": self._seen[key],
+                "median": round(median(values), 1) if values else None,
+                "p95": round(_percentile(values, 0.95), 1) if values else None,
+            }
+        return summary
+
+
+def latency_summary(clicks: Iterable[Dict]) -> Dict:
+    """
+    Summarise the `latency_ms` (click to first event) and `wait_ms` (click to
+    settled) of click records: counts plus median and p95 of each.
+    """
+    stats = LatencyStats()
+    for click in clicks:
+        stats.add(click)
+    return stats.summary()
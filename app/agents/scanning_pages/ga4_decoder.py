@@ -0,0 +1,162 @@
+# GA4 /g/collect Batch Decoder
+# ============================
+#
+# Decodes thousands of captured GA4 requests into one columnar table with one
+# row per hit. GA4 batches several hits into a single POST body (one hit per
+# line), while parameters shared by the batch (tid, cid, dl, ...) sit in the
+# URL query string. Both are split into long (row, key, value) form with a
+# single vectorized regex pass, URL-decoded once per distinct string, and
+# pivoted into columns:
+#   - ep.* / up.*    -> string columns
+#   - epn.* / upn.*  -> numeric columns
+# Shared URL parameters are parsed once per request; hit-level values win.
+#
+# Accepts both capture shapes used in this package: the crawl4ai fetch hook
+# ({"url", "body", "timestamp"}) and Chrome performance-log messages
+# ({"params": {"request": {"url", "postData"}, "wallTime"}}).
+
+import json
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import unquote_plus
+
+import numpy as np
+import pandas as pd
+
+PARAM_PATTERN = r"(?:^|&)(?P<key>[^&=]+)=?(?P<value>[^&]*)"
+NUMERIC_PREFIXES = ("epn.", "upn.")
+# Core GA4 parameters that are numeric on the wire.
+NUMERIC_PARAMS = {"_s", "_et", "_p", "sct", "seg"}
+
+
+def _request_parts(event: Dict) -> Dict:
+    """Normalize one captured request to url/body/timestamp/button_text."""
+    if "params" in event and "request" in event.get("params", {}):
+        request = event["params"]["request"]
+        wall_time = event["params"].get("wallTime")
+        timestamp = pd.to_datetime(wall_time, unit="s", utc=True) if wall_time else None
+        return {
+            "url": request.get("url", ""),
+            "body": request.get("postData", "") or "",
+            "timestamp": timestamp,
+            "button_text": event.get("button_text", ""),
+        }
+    return {
+        "url": event.get("url", ""),
+        "body": event.get("body", "") or "",
+        "timestamp": event.get("timestamp"),
+        "button_text": event.get("button_text", ""),
+    }
+
+
+def _unquote(values: pd.Series) -> pd.Series:
+    """URL-decode a series, decoding each distinct string only once."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    decoded = np.array([unquote_plus(u) for u in uniques], dtype=object)
+    return pd.Series(decoded[codes], index=values.index)
+
+
+def _long_params(strings: pd.Series) -> pd.DataFrame:
+    """Split query strings into long form: one (index, key, value) row per parameter."""
+    pairs = strings.str.extractall(PARAM_PATTERN)
+    if pairs.empty:
+        # Keep the index name (request_index / hit_row) so callers can still
+        # reset_index() and merge on it.
+        empty = pd.Index([], dtype="int64", name=strings.index.name)
+        return pd.DataFrame({
+            "key": pd.Series(dtype=object, index=empty),
+            "value": pd.Series(dtype=object, index=empty),
+        })
+    pairs = pairs.reset_index(level="match", drop=True)
+    pairs["key"] = _unquote(pairs["key"])
+    pairs["value"] = _unquote(pairs["value"])
+    return pairs
+
+
+def _type_columns(hits: pd.DataFrame, param_columns: List[str]) -> pd.DataFrame:
+    """Cast decoded parameter columns to numeric or string dtypes."""
+    for column in param_columns:
+        if column.startswith(NUMERIC_PREFIXES) or column in NUMERIC_PARAMS:
+            hits[column] = pd.to_numeric(hits[column], errors="coerce")
+        else:
+            hits[column] = hits[column].astype("string")
+    return hits
+
+
+def decode_hits(events: Iterable[Dict], page_urls: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Decode captured GA4 requests into a DataFrame with one row per hit.
+
+    Columns: request_index, hit_index (position in a batched body), endpoint,
+    timestamp, button_text, page_url (if given) and one column per decoded
+    parameter (e.g. en, tid, ep.event_action, epn.value).
+    """
+    requests = pd.DataFrame([_request_parts(event) for event in events],
+                            columns=["url", "body", "timestamp", "button_text"])
+    if page_urls is not None:
+        requests["page_url"] = list(page_urls)
+    meta_columns = ["endpoint", "timestamp", "button_text"] + (["page_url"] if page_urls is not None else [])
+    if requests.empty:
+        return pd.DataFrame(columns=["request_index", "hit_index"] + meta_columns)
+
+    requests.index.name = "request_index"
+    url_parts = requests["url"].fillna("").str.partition("?")
+    requests["endpoint"] = url_parts[0]
+    shared = _long_params(url_parts[2])
+
+    # One row per hit: batched bodies are split on newlines (GA4 sends CRLF);
+    # a request without a body (or with blank lines only) is a single hit
+    # carried by its URL.
+    bodies = requests["body"].fillna("")
+    bodies = bodies.where(bodies.str.strip() != "", "")
+    lines = bodies.str.split(r"\r?\n", regex=True).explode()
+    lines = lines[(lines != "") | (bodies.reindex(lines.index) == "")]
+    hits = lines.rename("line").reset_index()
+    hits["hit_index"] = hits.groupby("request_index").cumcount()
+    hits.index.name = "hit_row"
+
+    own = _long_params(hits["line"]).reset_index()
+    own["priority"] = 1
+    inherited = hits[["request_index"]].reset_index().merge(
+        shared.reset_index(), on="request_index", how="inner"
+    )[["hit_row", "key", "value"]]
+    inherited["priority"] = 0
+
+    params = pd.concat([inherited, own], ignore_index=True)
+    params = params.sort_values("priority", kind="stable").drop_duplicates(["hit_row", "key"], keep="last")
+    wide = params.pivot(index="hit_row", columns="key", values="value")
+    wide.columns.name = None
+    param_columns = list(wide.columns)
+
+    table = (
+        hits[["request_index", "hit_index"]]
+        .join(requests[meta_columns], on="request_index")
+        .join(wide)
+        .reset_index(drop=True)
+    )
+    table["timestamp"] = pd.to_datetime(table["timestamp"], utc=True, errors="coerce")
+    return _type_columns(table, param_columns)
+
+
+def decode_hits_arrow(events: Iterable[Dict], page_urls: Optional[Iterable[str]] = None):
+    """Same as decode_hits but returns a pyarrow.Table."""
+    import pyarrow as pa
+
+    return pa.Table.from_pandas(decode_hits(events, page_urls), preserve_index=False)
+
+
+def load_scan_archive(paths: Iterable[str]) -> pd.DataFrame:
+    """
+    Decode the GA4 hits of one or more JSONL scan archives (as written by the
+    crawl4ai batch CLI: one {"url", "ga4": [...]} object per line).
+    """
+    events, page_urls = [], []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                for event in record.get("ga4") or []:
+                    events.append(event)
+                    page_urls.append(record.get("url", ""))
+    return decode_hits(events, page_urls)
@@ -0,0 +1,465 @@
+# GTM Container Static Analysis
+# =============================
+#
+# A published gtm.js carries the container's whole configuration in its
+# `data.resource` object:
+#   - macros      variables, e.g. {"function": "__v", "vtp_name": "gtm.elementClasses"}
+#   - predicates  conditions, e.g. {"function": "_cn", "arg0": ["macro", 2], "arg1": "cta"}
+#   - rules       triggers: [["if", <predicate>...], ["unless", <predicate>...],
+#                 ["add", <tag>...]]
+#   - tags        e.g. GA4 event tags {"function": "__gaawe", "vtp_eventName": ...}
+# parse_container() turns the rules that add a GA4 event tag into triggers:
+#   - "click" / "link_click" when the rule tests the event name against
+#     gtm.click / gtm.linkClick; its other predicates become conditions on Click
+#     Classes/ID/Text/URL/Target/Element, element attributes or Page URL/Path/
+#     Hostname. Conditions on any other variable (custom JS, dataLayer
+#     variables, gtm.triggers) are kept with variable None and assumed true
+#   - "custom" when the rule waits for a custom dataLayer event; such triggers
+#     cannot be predicted from the DOM but are reported when they never fire
+# Every trigger lists the GA4 event names and static event parameters (e.g.
+# event_action) of the tags it adds.
+#
+# A click trigger is "predictive" when at least one of its conditions can be
+# tested against an element (click variables, attributes, CSS selectors).
+# Others (e.g. "All Elements", or only page/custom-variable conditions) would
+# match every element, so they never pick targets: trigger_report() checks
+# them against every click, and a page without any predictive trigger falls
+# back to the collectors' default targets.
+#
+# PREDICT_TARGETS_FN evaluates the predictive triggers against every element
+# of a section, so a scan clicks only elements that some trigger accepts, and
+# trigger_report() lists the triggers no click or push fired. GtmContainers
+# loads each container once per run and parses it once per version; gtm.js is
+# read from a fixture directory, from an AssetCache, or fetched over HTTP (and
+# stored in the cache).
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.agents.scanning_pages.click_targets import ELEMENT_INFO_FN, VISIBLE_FN
+from app.agents.scanning_pages.ga4_decoder import decode_hits
+from app.agents.scanning_pages.page_fingerprint import GTM_JS_URL, GTM_VERSION_PATTERN, USER_AGENT
+
+CLICK = "click"
+LINK_CLICK = "link_click"
+CUSTOM = "custom"
+
+CLICK_EVENTS = {"gtm.click": CLICK, "gtm.linkClick": LINK_CLICK}
+# Built-in events that are not user interactions.
+LIFECYCLE_EVENT_PATTERN = re.compile(r"^gtm\.(js|dom|load|init.*|historyChange.*|scrollDepth|timer|video|formSubmit|elementVisibility)")
+
+GA4_EVENT_TAGS = ("__gaawe",)
+
+# Predicate functions -> condition operators.
+OPERATORS = {
+    "_eq": "equals",
+    "_cn": "contains",
+    "_sw": "starts_with",
+    "_ew": "ends_with",
+    "_re": "regex",
+    "_css": "css",
+}
+
+# Data layer keys behind the built-in click variables.
+ELEMENT_KEYS = {
+    "gtm.element": "click_element",
+    "gtm.elementClasses": "click_classes",
+    "gtm.elementId": "click_id",
+    "gtm.elementTarget": "click_target",
+    "gtm.elementUrl": "click_url",
+}
+AUTO_EVENT_TYPES = {
+    "ELEMENT": "click_element",
+    "CLASSES": "click_classes",
+    "ID": "click_id",
+    "TARGET": "click_target",
+    "URL": "click_url",
+    "TEXT": "click_text",
+}
+URL_COMPONENTS = {"URL": "page_url", "PATH": "page_path", "HOST": "page_hostname"}
+
+DATA_PATTERN = re.compile(r"var\s+data\s*=\s*")
+
+
+def extract_resource(gtm_js: str) -> Dict:
+    """The `data.resource` object of a gtm.js source."""
+    match = DATA_PATTERN.search(gtm_js)
+    if not match:
+        raise ValueError("No container data found in gtm.js.")
+    data, _ = json.JSONDecoder().raw_decode(gtm_js, match.end())
+    return data.get("resource", {})
+
+
+def _variable(macro: Dict) -> Optional[str]:
+    """Click/page variable a macro reads, or None if it cannot be evaluated in the page."""
+    function = macro.get("function")
+    if function == "__e":
+        return "event"
+    if function == "__v":
+        return ELEMENT_KEYS.get(macro.get("vtp_name"))
+    if function == "__aev":
+        if macro.get("vtp_varType") == "ATTRIBUTE" and macro.get("vtp_attribute"):
+            return "attribute:" + macro["vtp_attribute"]
+        return AUTO_EVENT_TYPES.get(macro.get("vtp_varType"))
+    if function == "__u":
+        return URL_COMPONENTS.get(macro.get("vtp_component", "URL"))
+    return None
+
+
+def _macro(value, macros: List[Dict]) -> Optional[Dict]:
+    if isinstance(value, list) and len(value) == 2 and value[0] == "macro" and isinstance(value[1], int):
+        if 0 <= value[1] < len(macros):
+            return macros[value[1]]
+    return None
+
+
+def _condition(predicate: Dict, macros: List[Dict], negate: bool) -> Dict:
+    macro = _macro(predicate.get("arg0"), macros)
+    operator = OPERATORS.get(predicate.get("function"))
+    value = predicate.get("arg1")
+    variable = _variable(macro) if macro else None
+    if operator is None or not isinstance(value, str):
+        variable = None  # Numeric comparisons and dynamic values are not evaluated.
+    return {
+        "variable": variable,
+        "op": operator,
+        "value": value if isinstance(value, str) else None,
+        "negate": bool(predicate.get("negate")) != negate,
+        "ignore_case": bool(predicate.get("ignore_case")),
+    }
+
+
+def _tests_element(condition: Dict) -> bool:
+    """True if the condition narrows down which elements a click trigger accepts."""
+    variable = condition["variable"]
+    if not variable or condition["value"] is None:
+        return False
+    return condition["op"] == "css" or variable.startswith(("click_", "attribute:"))
+
+
+def _matches(condition: Dict, text: str) -> bool:
+    value, op = condition["value"], condition["op"]
+    if op == "equals":
+        result = text == value
+    elif op == "contains":
+        result = value in text
+    elif op == "starts_with":
+        result = text.startswith(value)
+    elif op == "ends_with":
+        result = text.endswith(value)
+    elif op == "regex":
+        result = re.search(value, text, re.IGNORECASE if condition["ignore_case"] else 0) is not None
+    else:
+        return False
+    return result != condition["negate"]
+
+
+def _template(value, macros: List[Dict]):
+    """Static string of a tag field, "{{<variable>}}" for a variable, else None."""
+    if isinstance(value, str):
+        return value
+    macro = _macro(value, macros)
+    if macro:
+        return "{{%s}}" % (_variable(macro) or macro.get("vtp_name") or macro.get("function"))
+    return None
+
+
+def _ga4_tag(tag: Dict, index: int, macros: List[Dict]) -> Dict:
+    params = {}
+    for row in tag.get("vtp_eventSettingsTable") or tag.get("vtp_eventParameters") or []:
+        if not (isinstance(row, list) and row and row[0] == "map"):
+            continue
+        fields = dict(zip(row[1::2], row[2::2]))
+        name = fields.get("parameter") or fields.get("name")
+        if isinstance(name, str):
+            params[name] = _template(fields.get("parameter_value", fields.get("value")), macros)
+    event_name = tag.get("vtp_eventName")
+    return {
+        "tag": tag.get("tag_id", index),
+        "event_name": event_name if isinstance(event_name, str) else None,
+        "params": params,
+    }
+
+
+class GtmContainer:
+    """Triggers of one GTM container version that can send a GA4 event."""
+
+    def __init__(self, container_id: str, version: str, triggers: List[Dict]):
+        self.container_id = container_id
+        self.version = version
+        self.triggers = triggers
+
+    @property
+    def click_triggers(self) -> List[Dict]:
+        return [t for t in self.triggers if t["kind"] in (CLICK, LINK_CLICK)]
+
+    @property
+    def custom_triggers(self) -> List[Dict]:
+        return [t for t in self.triggers if t["kind"] == CUSTOM]
+
+
+def parse_container(gtm_js: str, container_id: str = "") -> GtmContainer:
+    """Parse a gtm.js source into its GA4 click and custom-event triggers."""
+    resource = extract_resource(gtm_js)
+    macros = resource.get("macros", [])
+    predicates = resource.get("predicates", [])
+    tags = resource.get("tags", [])
+    version = str(resource.get("version") or "sha1:" + hashlib.sha1(gtm_js.encode("utf-8")).hexdigest()[:16])
+    triggers = []
+    for index, rule in enumerate(resource.get("rules", [])):
+        clauses = {}
+        for clause in rule:
+            if isinstance(clause, list) and clause and isinstance(clause[0], str):
+                clauses.setdefault(clause[0], []).extend(i for i in clause[1:] if isinstance(i, int))
+        ga4_tags = [
+            _ga4_tag(tags[i], i, macros) for i in clauses.get("add", [])
+            if 0 <= i < len(tags) and tags[i].get("function") in GA4_EVENT_TAGS
+        ]
+        if not ga4_tags:
+            continue
+        conditions = [
+            _condition(predicates[i], macros, negate=(keyword == "unless"))
+            for keyword in ("if", "unless") for i in clauses.get(keyword, [])
+            if 0 <= i < len(predicates)
+        ]
+        event_conditions = [c for c in conditions if c["variable"] == "event"]
+        kind = event = None
+        for name, click_kind in CLICK_EVENTS.items():
+            if event_conditions and all(_matches(c, name) for c in event_conditions):
+                kind, event = click_kind, name
+                break
+        if kind is None:
+            names = [c["value"] for c in event_conditions if c["op"] == "equals" and not c["negate"]]
+            if not names or LIFECYCLE_EVENT_PATTERN.match(names[0]):
+                continue
+            kind, event = CUSTOM, names[0]
+        conditions = [c for c in conditions if c["variable"] != "event"]
+        triggers.append({
+            "id": f"{container_id}:{index}" if container_id else str(index),
+            "kind": kind,
+            "event": event,
+            "conditions": conditions,
+            "predictive": kind != CUSTOM and any(_tests_element(c) for c in conditions),
+            "tags": ga4_tags,
+        })
+    return GtmContainer(container_id, version, triggers)
+
+
+class GtmContainers:
+    """
+    Loads GTM containers once per run and parses each version once.
+    fixture_dir: directory of <container id>.js files used instead of fetching.
+    asset_cache: AssetCache that gtm.js is read from and stored in.
+    """
+
+    def __init__(self, fixture_dir: Optional[str] = None, asset_cache=None, session=None, timeout: float = 15):
+        self.fixture_dir = fixture_dir
+        self.asset_cache = asset_cache
+        self.session = session
+        self.timeout = timeout
+        self._by_id: Dict[str, GtmContainer] = {}
+        self._by_version: Dict[Tuple[str, str], GtmContainer] = {}
+        self._lock = threading.Lock()
+
+    def source(self, container_id: str) -> str:
+        """The gtm.js source of a container."""
+        if self.fixture_dir:
+            path = os.path.join(self.fixture_dir, f"{container_id}.js")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    return f.read()
+        url = GTM_JS_URL.format(container_id)
+        cached = self.asset_cache.lookup(url) if self.asset_cache else None
+        if cached:
+            return cached["body"].decode("utf-8")
+        import requests
+
+        response = (self.session or requests).get(url, timeout=self.timeout, headers={"User-Agent": USER_AGENT})
+        response.raise_for_status()
+        if self.asset_cache:
+            self.asset_cache.store(url, response.status_code, dict(response.headers), response.content)
+        return response.text
+
+    def load(self, container_id: str) -> GtmContainer:
+        with self._lock:
+            if container_id in self._by_id:
+                return self._by_id[container_id]
+        source = self.source(container_id)
+        match = GTM_VERSION_PATTERN.search(source)
+        version = match.group(1) if match else "sha1:" + hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            container = self._by_version.get((container_id, version))
+            if container is None:
+                container = self._by_version[(container_id, version)] = parse_container(source, container_id)
+            self._by_id[container_id] = container
+        return container
+
+    def load_all(self, container_ids: Iterable[str]) -> List[GtmContainer]:
+        return [self.load(container_id) for container_id in sorted(set(container_ids))]
+
+
+def predictive_triggers(containers: Iterable[GtmContainer]) -> List[Dict]:
+    """Click triggers that can pick click targets from the DOM."""
+    return [trigger for container in containers for trigger in container.click_triggers if trigger["predictive"]]
+
+
+def _ga4_event_names(hits: List[Dict]) -> set:
+    if not hits:
+        return set()
+    decoded = decode_hits(hits)
+    return set(decoded["en"].dropna().astype(str)) if "en" in decoded else set()
+
+
+def trigger_report(containers: Iterable[GtmContainer], clicks: List[Dict], data_layer: List[Dict]) -> Dict:
+    """
+    Which triggers fired during a scan. A click trigger fired when a click on an
+    element it matched (info["rules"]) sent a GA4 hit named like one of its tags
+    (any hit if the name is a variable); a non-predictive click trigger matches
+    every clicked element (every link for link clicks). A custom trigger fired
+    when its event was pushed to the dataLayer. Returns {"containers", "fired",
+    "unfired"}.
+    """
+    containers = list(containers)
+    pushed = {
+        str(event["data"]["event"]) for event in data_layer or []
+        if isinstance(event, dict) and isinstance(event.get("data"), dict) and event["data"].get("event")
+    }
+    sent = {}
+    sent_by_any, sent_by_link = set(), set()
+    for click in clicks:
+        info = click.get("info") or {}
+        names = _ga4_event_names(click.get("ga4") or [])
+        for rule in info.get("rules") or []:
+            sent.setdefault(rule, set()).update(names)
+        sent_by_any.update(names)
+        if info.get("href"):
+            sent_by_link.update(names)
+    fired, unfired = [], []
+    for container in containers:
+        for trigger in container.triggers:
+            if trigger["kind"] == CUSTOM:
+                ok = trigger["event"] in pushed
+            else:
+                names = {tag["event_name"] for tag in trigger["tags"]}
+                if trigger.get("predictive", True):
+                    hits = sent.get(trigger["id"], set())
+                else:
+                    hits = sent_by_link if trigger["kind"] == LINK_CLICK else sent_by_any
+                ok = bool(hits & names) or (None in names and bool(hits))
+            (fired if ok else unfired).append(trigger["id"])
+    by_id = {t["id"]: t for container in containers for t in container.triggers}
+    return {
+        "containers": {container.container_id: container.version for container in containers},
+        "fired": fired,
+        "unfired": [
+            {"id": i, "kind": by_id[i]["kind"], "event": by_id[i]["event"],
+             "ga4_events": [tag["event_name"] for tag in by_id[i]["tags"]]}
+            for i in unfired
+        ],
+    }
+
+
+# JS: () -> ids of the GTM containers loaded on the page.
+CONTAINER_IDS_FN = (
+    "() => Object.keys(window.google_tag_manager || {})"
+    ".filter(function(key) { return /^GTM-[A-Z0-9]+$/.test(key); })"
+)
+
+# JS async function(sectionSelector, triggers) -> [{element, info}] like
+# CLICK_TARGETS_FN, for the visible elements of the section that at least one
+# predictive click trigger accepts; info["rules"] lists the ids of those
+# triggers. An element is left out when a descendant matched every one of its
+# triggers: the innermost match is the element GTM sees as gtm.element on a
+# real click.
+PREDICT_TARGETS_FN = r"""
+async function(sectionSelector, triggers) {
+    const elementInfo = (__ELEMENT_INFO_FN__);
+    function text(el) {
+        return (el.innerText || el.textContent || '').replace(/\s+/g, ' ').trim();
+    }
+    function value(el, variable) {
+        if (variable === 'click_classes') return el.getAttribute('class') || '';
+        if (variable === 'click_id') return el.id || '';
+        if (variable === 'click_target') return el.getAttribute('target') || '';
+        if (variable === 'click_url') return el.href || el.action || '';
+        if (variable === 'click_text') return text(el);
+        if (variable === 'page_url') return location.href;
+        if (variable === 'page_path') return location.pathname;
+        if (variable === 'page_hostname') return location.hostname;
+        if (variable.indexOf('attribute:') === 0) return el.getAttribute(variable.slice(10)) || '';
+        return null;
+    }
+    function test(condition, el) {
+        if (!condition.variable || condition.value === null) return true;
+        let result;
+        if (condition.op === 'css') {
+            try { result = el.matches(condition.value); } catch (e) { return true; }
+        } else {
+            const actual = value(el, condition.variable);
+            if (actual === null) return true;
+            if (condition.op === 'equals') result = actual === condition.value;
+            else if (condition.op === 'contains') result = actual.indexOf(condition.value) >= 0;
+            else if (condition.op === 'starts_with') result = actual.indexOf(condition.value) === 0;
+            else if (condition.op === 'ends_with') result = actual.endsWith(condition.value);
+            else if (condition.op === 'regex') {
+                try { result = new RegExp(condition.value, condition.ignore_case ? 'i' : '').test(actual); }
+                catch (e) { return true; }
+            } else return true;
+        }
+        return condition.negate ? !result : result;
+    }
+    const section = document.querySelector(sectionSelector);
+    if (!section) return [];
+    // Non-predictive triggers would match every element; they never pick targets.
+    const clickTriggers = triggers.filter(function(t) {
+        return (t.kind === 'click' || t.kind === 'link_click') && t.predictive !== false;
+    });
+    const matched = new Map();
+    for (const el of section.querySelectorAll('*')) {
+        const isLink = el.tagName === 'A' && el.hasAttribute('href');
+        const rules = clickTriggers.filter(function(t) {
+            return (t.kind === 'click' || isLink) && t.conditions.every(function(c) { return test(c, el); });
+        }).map(function(t) { return t.id; });
+        if (rules.length) matched.set(el, rules);
+    }
+    // Text and class conditions also match wrappers (main, divs) around the
+    // CTA, so an ancestor is dropped when a descendant matches all its rules.
+    const covered = new Set();
+    matched.forEach(function(rules, el) {
+        for (let up = el.parentElement; up; up = up.parentElement) {
+            const outer = matched.get(up);
+            if (outer && outer.every(function(r) { return rules.indexOf(r) >= 0; })) covered.add(up);
+        }
+    });
+    const candidates = [];
+    matched.forEach(function(rules, el) { if (!covered.has(el)) candidates.push(el); });
+    const visible = await (__VISIBLE_FN__)(candidates);
+    return candidates.filter(function(el, i) { return visible[i]; }).map(function(el) {
+        const info = elementInfo(el, (el.innerText || '').trim());
+        info.rules = matched.get(el);
+        return { element: el, info: info };
+    });
+}
+""".replace("__VISIBLE_FN__", VISIBLE_FN.strip()).replace("__ELEMENT_INFO_FN__", ELEMENT_INFO_FN.strip())
+
+# Playwright evaluate: ([sectionSelector, triggers]) -> [info]; keeps the
+# targets on window.__ga4ClickTargets like LIST_CLICK_TARGETS_FN.
+LIST_PREDICTED_TARGETS_FN = (
+    "async ([sectionSelector, triggers]) => {"
+    f" window.__ga4ClickTargets = await ({PREDICT_TARGETS_FN})(sectionSelector, triggers);"
+    " return window.__ga4ClickTargets.map(function(t) { return t.info; });"
+    " }"
+)
+
+
+def find_predicted_targets(driver, section_selector: str, triggers: List[Dict]) -> List[Dict]:
+    """Selenium counterpart of LIST_PREDICTED_TARGETS_FN: [{"element", "info"}] in one call."""
+    return driver.execute_script(
+        f"return ({PREDICT_TARGETS_FN}).apply(null, arguments);",
+        section_selector,
+        triggers,
+    ) or []
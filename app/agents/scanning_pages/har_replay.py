@@ -0,0 +1,117 @@
+# Offline HAR Record and Replay
+# =============================
+#
+# Record mode stores every request a scan makes (page HTML, site JS/CSS, the
+# GTM container, ...) in HAR files via Playwright's context.route_from_har
+# with update=True; the files are written when the browser closes. Replay
+# mode serves the scan from those files: requests found in the archive are
+# answered from it, and everything else (including GA4 hits, whose
+# parameters change on every run) is handled by the NetworkInterceptor in
+# offline mode, which aborts it or, with the sinkhole on, records it. No
+# request reaches the network, so a replayed scan needs no connectivity.
+#
+# For repeatable results, replay also seeds Math.random and starts the page
+# clock at a fixed epoch (see DETERMINISTIC_JS), so client ids and session
+# ids generated by gtag come out the same on every run.
+#
+# crawl4ai may open more than one browser context; each recorded context gets
+# its own file: <name>.har, <name>-1.har, ...
+
+import os
+from typing import List
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Deterministic PRNG (mulberry32) and a clock that starts at a fixed epoch and
+# advances with real elapsed time. __SEED__ / __EPOCH_MS__ are substituted.
+DETERMINISTIC_JS = r"""
+(function(seed, epochMs) {
+    if (window.__ga4Deterministic) return;
+    window.__ga4Deterministic = true;
+    let state = seed >>> 0;
+    Math.random = function() {
+        state = (state + 0x6D2B79F5) >>> 0;
+        let t = state;
+        t = Math.imul(t ^ (t >>> 15), t | 1);
+        t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+    const RealDate = Date;
+    const offset = epochMs - RealDate.now();
+    const PinnedDate = function(...args) {
+        if (!(this instanceof PinnedDate)) return new RealDate(RealDate.now() + offset).toString();
+        return args.length ? new RealDate(...args) : new RealDate(RealDate.now() + offset);
+    };
+    PinnedDate.prototype = RealDate.prototype;
+    PinnedDate.now = function() { return RealDate.now() + offset; };
+    PinnedDate.parse = RealDate.parse;
+    PinnedDate.UTC = RealDate.UTC;
+    window.Date = PinnedDate;
+})(__SEED__, __EPOCH_MS__);
+"""
+
+DEFAULT_SEED = 20250101
+DEFAULT_EPOCH_MS = 1735689600000  # 2025-01-01T00:00:00Z
+
+
+def deterministic_js(seed: int = DEFAULT_SEED, epoch_ms: int = DEFAULT_EPOCH_MS) -> str:
+    return DETERMINISTIC_JS.replace("__SEED__", str(int(seed))).replace("__EPOCH_MS__", str(int(epoch_ms)))
+
+
+def har_file(path: str, index: int) -> str:
+    """Archive file of the index-th recorded context."""
+    if index == 0:
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}-{index}{ext or '.har'}"
+
+
+def recorded_files(path: str) -> List[str]:
+    """Every archive file recorded under `path`, in recording order."""
+    files = []
+    while os.path.exists(har_file(path, len(files))):
+        files.append(har_file(path, len(files)))
+    return files
+
+
+class HarArchive:
+    def __init__(self, path: str, mode: str = REPLAY, seed: int = DEFAULT_SEED, epoch_ms: int = DEFAULT_EPOCH_MS):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown HAR mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.seed = seed
+        self.epoch_ms = epoch_ms
+        self._recorded = 0
+        if mode == REPLAY and not recorded_files(path):
+            raise FileNotFoundError(f"No HAR archive recorded at {path}")
+        if mode == RECORD:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            for stale in recorded_files(path):
+                os.remove(stale)
+
+    @property
+    def offline(self) -> bool:
+        return self.mode == REPLAY
+
+    async def install(self, context):
+        """
+        Attach the archive to a browser context (once per context). Install it
+        after the NetworkInterceptor: Playwright consults the most recently
+        registered route first, so archived responses win and misses fall back
+        to the interceptor.
+        """
+        if getattr(context, "_ga4_har", None) is self:
+            return
+        context._ga4_har = self
+        if self.mode == RECORD:
+            path = har_file(self.path, self._recorded)
+            self._recorded += 1
+            await context.route_from_har(path, update=True, update_content="embed", update_mode="minimal")
+            return
+        await context.add_init_script(deterministic_js(self.seed, self.epoch_ms))
+        for path in recorded_files(self.path):
+            await context.route_from_har(path, not_found="fallback")
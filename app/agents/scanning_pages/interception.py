@@ -0,0 +1,242 @@
+# Network Interception for Scans
+# ==============================
+#
+# A scan only needs the page's HTML, its own JS/CSS and the Google tag
+# (GTM/gtag) traffic. ResourceBlockingProfile decides which requests to drop:
+#   - googletagmanager / google-analytics traffic is always allowed
+#   - hosts on the allowlist are always allowed
+#   - hosts on the denylist (third-party widgets, video players) are blocked
+#   - heavy resource types (images, media, fonts) are blocked
+# NetworkInterceptor applies a profile to Playwright browser contexts via
+# context.route; apply_profile_to_chrome does the closest equivalent for
+# Selenium (CDP Network.setBlockedURLs). Blocking is opt-in: the collectors
+# only block when given a profile, so default scans load everything.
+#
+# GA4Sinkhole optionally stops g/collect / mp/collect hits from leaving the
+# machine: each hit's full URL and body is recorded and the request is
+# answered locally with a 204, so clicks finish in local time and production
+# analytics receive no bot traffic.
+#
+# With an AssetCache (asset_cache.py), static assets that pass the profile are
+# answered from a local on-disk store and only fetched on a miss.
+
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from app.agents.scanning_pages.network_capture import GA4_HIT_MARKERS, is_ga4_hit_url
+
+ANALYTICS_HOSTS = (
+    "googletagmanager.com",
+    "google-analytics.com",
+    "analytics.google.com",
+)
+
+HEAVY_RESOURCE_TYPES = ("image", "media", "font")
+
+DEFAULT_DENIED_HOSTS = (
+    "youtube.com",
+    "ytimg.com",
+    "vimeo.com",
+    "vimeocdn.com",
+    "brightcove.net",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "livechatinc.com",
+    "doubleclick.net",
+)
+
+# URL suffixes used to approximate resource types where only URL patterns are
+# available (CDP Network.setBlockedURLs).
+RESOURCE_TYPE_EXTENSIONS = {
+    "image": ("jpg", "jpeg", "png", "gif", "webp", "avif", "bmp", "ico"),
+    "media": ("mp4", "webm", "m3u8", "ts", "mov", "mp3", "ogg"),
+    "font": ("woff", "woff2", "ttf", "otf", "eot"),
+}
+
+
+def host_matches(host: str, domains: Iterable[str]) -> bool:
+    """True if host equals one of the domains or is a subdomain of one."""
+    host = (host or "").lower()
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class ResourceBlockingProfile:
+    def __init__(
+        self,
+        blocked_types: Iterable[str] = HEAVY_RESOURCE_TYPES,
+        denied_hosts: Iterable[str] = DEFAULT_DENIED_HOSTS,
+        allowed_hosts: Iterable[str] = (),
+    ):
+        self.blocked_types = frozenset(blocked_types)
+        self.denied_hosts = tuple(h.lower() for h in denied_hosts)
+        # Analytics hosts can never be blocked by configuration.
+        self.allowed_hosts = ANALYTICS_HOSTS + tuple(h.lower() for h in allowed_hosts)
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        """Decide whether a request should be aborted."""
+        host = urlparse(url).hostname or ""
+        if host_matches(host, self.allowed_hosts):
+            return False
+        if host_matches(host, self.denied_hosts):
+            return True
+        return resource_type in self.blocked_types
+
+    def url_patterns(self) -> list:
+        """
+        Approximate the profile as CDP URL block patterns. Extension patterns
+        cannot express the allowlist, which is harmless for analytics hosts
+        (their hits carry no such extensions) but means allowlisted hosts still
+        lose images/media/fonts under Selenium.
+        """
+        patterns = []
+        for host in self.denied_hosts:
+            patterns += [f"*://{host}/*", f"*://*.{host}/*"]
+        for resource_type in sorted(self.blocked_types):
+            for ext in RESOURCE_TYPE_EXTENSIONS.get(resource_type, ()):
+                patterns += [f"*.{ext}", f"*.{ext}?*"]
+        return patterns
+
+
+DEFAULT_PROFILE = ResourceBlockingProfile()
+
+
+class GA4Sinkhole:
+    """Records intercepted GA4 hits per page instead of sending them."""
+
+    def __init__(self):
+        self._hits: Dict[object, List[Dict]] = {}
+        self.total = 0
+
+    def record(self, page, url: str, body: str, method: str = "POST") -> Dict:
+        hit = {
+            "url": url,
+            "body": body or "",
+            "method": method,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        self._hits.setdefault(page, []).append(hit)
+        self.total += 1
+        return hit
+
+    def hits_for(self, page, since: int = 0) -> List[Dict]:
+        """Hits recorded for a page, from index `since`."""
+        return list(self._hits.get(page, [])[since:])
+
+    def forget(self, page):
+        """Drop the hits of a page that is being closed."""
+        self._hits.pop(page, None)
+
+
+class NetworkInterceptor:
+    """
+    Routes every request of a Playwright browser context through one handler.
+    Note that Playwright disables the browser HTTP cache for routed contexts,
+    so contexts are only routed when a feature needs it (see `active`).
+    """
+
+    def __init__(
+        self,
+        profile: Optional[ResourceBlockingProfile] = None,
+        sinkhole: Optional[GA4Sinkhole] = None,
+        offline: bool = False,
+        asset_cache=None,
+    ):
+        self.profile = profile
+        self.sinkhole = sinkhole
+        # Offline: abort whatever would otherwise go to the network (used when
+        # replaying a HAR archive, see har_replay.py).
+        self.offline = offline
+        self.asset_cache = asset_cache
+        # "blocked:<type>", "sinkholed", "cache:hit", "cache:miss", "offline", "allowed" counts.
+        self.stats = Counter()
+
+    @property
+    def active(self) -> bool:
+        """True if any feature needs routing: blocking, sinkhole, offline or asset cache."""
+        return bool(self.profile or self.sinkhole or self.offline or self.asset_cache)
+
+    async def install(self, context):
+        """
+        Route the context's requests through this interceptor (once per
+        context). Without an active feature nothing is routed, so requests skip
+        the Python round trip and keep the browser HTTP cache.
+        """
+        if not self.active or getattr(context, "_ga4_interceptor", None) is self:
+            return
+        context._ga4_interceptor = self
+        await context.route("**/*", self.handle)
+
+    async def handle(self, route):
+        request = route.request
+        if self.sinkhole and is_ga4_hit_url(request.url):
+            try:
+                page = request.frame.page
+            except Exception:
+                page = None  # e.g. requests from service workers
+            self.sinkhole.record(page, request.url, request.post_data or "", request.method)
+            self.stats["sinkholed"] += 1
+            await route.fulfill(status=204, body="")
+            return
+        if self.profile and self.profile.should_block(request.url, request.resource_type):
+            self.stats[f"blocked:{request.resource_type}"] += 1
+            await route.abort("blockedbyclient")
+            return
+        if self.asset_cache and self.asset_cache.cacheable(request.url, request.resource_type, request.method):
+            if await self._serve_cached(route):
+                return
+        if self.offline:
+            self.stats["offline"] += 1
+            await route.abort("internetdisconnected")
+            return
+        self.stats["allowed"] += 1
+        await route.continue_()
+
+    async def _serve_cached(self, route) -> bool:
+        """
+        Answer a static asset from the asset cache, fetching and storing it on a
+        miss. Returns False if the request was left unhandled (offline miss).
+        Cache reads and writes (file I/O and hashing) run on the default
+        executor so they do not stall the event loop other pages share.
+        """
+        url = route.request.url
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, self.asset_cache.lookup, url)
+        if cached:
+            self.stats["cache:hit"] += 1
+            await route.fulfill(status=cached["status"], headers=cached["headers"], body=cached["body"])
+            return True
+        if self.offline:
+            return False
+        self.stats["cache:miss"] += 1
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            await route.abort("failed")
+            return True
+        await loop.run_in_executor(None, self.asset_cache.store, url, response.status, response.headers, body)
+        await route.fulfill(response=response, body=body)
+        return True
+
+
+def apply_profile_to_chrome(driver, profile: Optional[ResourceBlockingProfile] = None, sinkhole_ga4: bool = False):
+    """
+    Block the profile's URL patterns in a running Chrome via CDP. Images are
+    blocked by extension only, never with Chrome's global image setting, which
+    would also stop analytics pixels.
+    With sinkhole_ga4, GA4 hits are blocked too. CDP cannot answer requests
+    without an event loop, so they fail locally instead of getting a 204, but
+    Chrome still logs them (URL and POST body) in the performance log, where
+    GA4HitStream records them.
+    """
+    patterns = profile.url_patterns() if profile else []
+    if sinkhole_ga4:
+        patterns += [f"*{marker}*" for marker in GA4_HIT_MARKERS]
+    if not patterns:
+        return
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
@@ -0,0 +1,107 @@
+# Multi-Market Locale Fan-Out
+# ===========================
+#
+# Compares one nameplate page across many locales, e.g. the template
+#   https://www.rangerover.com/{locale}/range-rover/index.html
+# with locales de-de, en-gb, fr-fr, ... Instead of every locale handling the
+# consent banner in a cold context, consent is accepted once and the resulting
+# storage state (cookies + localStorage, as returned by Playwright's
+# context.storage_state()) is seeded into every context before its first
+# navigation: cookies via context.add_cookies, localStorage via an init script
+# that runs before the consent manager reads it.
+#
+# event_matrix() summarises the scans as one row per (source, event name) and
+# one column per locale, holding the number of times the event fired.
+
+import json
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from app.agents.scanning_pages.ga4_decoder import decode_hits
+
+# "Accept all" buttons of the consent managers seen on our markets.
+CONSENT_ACCEPT_SELECTORS = [
+    "#onetrust-accept-btn-handler",
+    "#truste-consent-button",
+    "#CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll",
+    "#didomi-notice-agree-button",
+    "button[data-testid='uc-accept-all-button']",
+    ".cc-allow",
+]
+
+# Playwright evaluate: (selectors) -> selector of the clicked button, or null.
+ACCEPT_CONSENT_FN = r"""
+(selectors) => {
+    for (const selector of selectors) {
+        const button = document.querySelector(selector);
+        if (button && button.getClientRects().length) {
+            if (window.__ga4Settle) window.__ga4Settle.arm();
+            button.click();
+            return selector;
+        }
+    }
+    return null;
+}
+"""
+
+
+def expand_locales(path_template: str, locales: Iterable[str]) -> Dict[str, str]:
+    """Map each locale to its URL by filling `{locale}` in the template."""
+    if "{locale}" not in path_template:
+        raise ValueError("path_template must contain '{locale}'.")
+    locales = list(locales)
+    if not locales:
+        raise ValueError("At least one locale is required.")
+    return {locale: path_template.replace("{locale}", locale) for locale in locales}
+
+
+def storage_init_script(storage_state: Dict) -> Optional[str]:
+    """
+    Init script that restores the localStorage entries of a Playwright storage
+    state on matching origins (None if the state has none).
+    """
+    origins = {
+        entry["origin"]: {item["name"]: item["value"] for item in entry.get("localStorage", [])}
+        for entry in storage_state.get("origins", [])
+        if entry.get("localStorage")
+    }
+    if not origins:
+        return None
+    return (
+        "(function(origins) {"
+        " const items = origins[window.location.origin];"
+        " if (!items) return;"
+        " try { Object.keys(items).forEach(function(k) { if (localStorage.getItem(k) === null) localStorage.setItem(k, items[k]); }); }"
+        " catch (e) {}"
+        f" }})({json.dumps(origins, ensure_ascii=False)});"
+    )
+
+
+def _data_layer_names(events: List[Dict]) -> List[str]:
+    names = []
+    for event in events or []:
+        data = event.get("data") if isinstance(event, dict) else None
+        if isinstance(data, dict) and data.get("event"):
+            names.append(str(data["event"]))
+    return names
+
+
+def event_matrix(results: Dict[str, Dict]) -> pd.DataFrame:
+    """
+    Per-locale event matrix from {locale: scan result}: rows are (source, event)
+    with source "dataLayer" (the pushed `event`) or "ga4" (the hit's `en`),
+    columns are locales in input order, values are fire counts.
+    """
+    rows = []
+    for locale, result in results.items():
+        rows += [(locale, "dataLayer", name) for name in _data_layer_names(result.get("dataLayer"))]
+        hits = decode_hits(result.get("ga4") or [])
+        if "en" in hits:
+            rows += [(locale, "ga4", str(name)) for name in hits["en"].dropna()]
+    frame = pd.DataFrame(rows, columns=["locale", "source", "event"])
+    if frame.empty:
+        return pd.DataFrame(columns=list(results), index=pd.MultiIndex.from_tuples([], names=["source", "event"]))
+    matrix = frame.pivot_table(index=["source", "event"], columns="locale", aggfunc="size", fill_value=0)
+    matrix.columns.name = None
+    return matrix.reindex(columns=list(results), fill_value=0)
@@ -0,0 +1,82 @@
+# Incremental GA4 Network Capture (Selenium)
+# ==========================================
+#
+# Chrome's performance log is drained by every driver.get_log("performance")
+# call, so re-reading it per click and slicing with earlier counts loses hits.
+# GA4HitStream drains the log into an indexed buffer addressed by a monotonic
+# cursor. Draining happens on the calling thread at click boundaries (the
+# Selenium client is not thread-safe across one session), so callers poll()
+# before taking a cursor and since() polls again after the click. Only
+# g/collect and mp/collect requests are kept, and POST bodies that Chrome did
+# not inline are fetched once via Network.getRequestPostData. Reading the hits
+# after a click therefore costs O(new events).
+
+import json
+from typing import Dict, List
+
+GA4_HIT_MARKERS = ("g/collect", "mp/collect")
+
+
+def is_ga4_hit_url(url: str) -> bool:
+    """Return True for GA4 collection endpoints."""
+    return any(marker in url for marker in GA4_HIT_MARKERS)
+
+
+class GA4HitStream:
+    def __init__(self, driver, fetch_post_data: bool = True):
+        self.driver = driver
+        self.fetch_post_data = fetch_post_data
+        self._hits: List[Dict] = []  # Buffered hits; _hits[0] has cursor _base.
+        self._base = 0
+
+    @property
+    def cursor(self) -> int:
+        """Cursor just past the newest buffered hit."""
+        return self._base + len(self._hits)
+
+    def poll(self) -> int:
+        """Drain new performance-log entries into the buffer; return the number of new hits."""
+        entries = self.driver.get_log("performance")
+        new_hits = []
+        for entry in entries:
+            raw = entry.get("message", "")
+            # Cheap substring pre-filter so most entries are never JSON-decoded.
+            if "Network.requestWillBeSent" not in raw or "collect" not in raw:
+                continue
+            try:
+                message = json.loads(raw)["message"]
+                if message.get("method") != "Network.requestWillBeSent":
+                    continue
+                request = message["params"]["request"]
+                if not is_ga4_hit_url(request.get("url", "")):
+                    continue
+            except Exception:
+                continue
+            if self.fetch_post_data and request.get("hasPostData") and "postData" not in request:
+                self._attach_post_data(message)
+            new_hits.append(message)
+        self._hits.extend(new_hits)
+        return len(new_hits)
+
+    def _attach_post_data(self, message: Dict):
+        """Fetch a POST body Chrome did not inline in the log entry."""
+        try:
+            body = self.driver.execute_cdp_cmd(
+                "Network.getRequestPostData", {"requestId": message["params"]["requestId"]}
+            )
+            message["params"]["request"]["postData"] = body.get("postData", "")
+        except Exception:
+            # The request may already be gone from the browser's buffer.
+            pass
+
+    def since(self, cursor: int, poll: bool = True) -> List[Dict]:
+        """Return the hits captured at or after `cursor` (draining the log first by default)."""
+        if poll:
+            self.poll()
+        return list(self._hits[max(cursor - self._base, 0):])
+
+    def discard_until(self, cursor: int):
+        """Drop buffered hits before `cursor`; cursors stay valid."""
+        drop = min(max(cursor - self._base, 0), len(self._hits))
+        del self._hits[:drop]
+        self._base += drop
@@ -0,0 +1,155 @@
+# Incremental Re-scan Fingerprints
+# ================================
+#
+# Weekly re-scans of a market mostly revisit pages that have not changed.
+# Before the browser pass, each URL is fetched with a plain HTTP request and
+# fingerprinted from three parts:
+#   - the version of every GTM container the page loads (read from gtm.js,
+#     fetched once per container per run)
+#   - the inline dataLayer bootstrap scripts (whitespace and long digit runs
+#     such as timestamps normalized away)
+#   - the clickable elements (tag, classes, text, href) that pass the same
+#     text/class filters as the click targets
+# FingerprintStore keeps the last fingerprint and scan result per URL; when a
+# fresh fingerprint matches, the stored events are reused and the click pass is
+# skipped. CTAs that only exist after client-side rendering are not part of
+# the static HTML, so they only invalidate a page through the other parts.
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from app.agents.scanning_pages.click_targets import DEFAULT_CLASS_SNIPPETS
+
+GTM_ID_PATTERN = re.compile(r"\bGTM-[A-Z0-9]{4,10}\b")
+GTM_VERSION_PATTERN = re.compile(r'"version"\s*:\s*"(\d+)"')
+VOLATILE_PATTERN = re.compile(r"\d{8,}")
+GTM_JS_URL = "https://www.googletagmanager.com/gtm.js?id={}"
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+
+def _digest(value) -> str:
+    raw = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def html_fingerprint(html: str, target_text: Optional[str] = None, snippets: Optional[Iterable[str]] = None) -> Dict:
+    """
+    Fingerprint a page's static HTML. Returns {"gtm_containers", "data_layer",
+    "clickables", "clickable_count"}; GTM container versions are added by
+    fetch_fingerprint.
+    """
+    from bs4 import BeautifulSoup
+
+    snippets = DEFAULT_CLASS_SNIPPETS if snippets is None else list(snippets)
+    wanted = target_text.upper() if target_text else None
+    soup = BeautifulSoup(html, "html.parser")
+
+    bootstrap = []
+    for script in soup.find_all("script"):
+        source = script.string or ""
+        if "dataLayer" in source:
+            bootstrap.append(VOLATILE_PATTERN.sub("0", " ".join(source.split())))
+
+    clickables = []
+    for el in soup.select("button, a, span"):
+        classes = " ".join(el.get("class") or [])
+        text = " ".join(el.get_text(" ").split())
+        if not (wanted and wanted in text.upper()) and not any(s in classes for s in snippets):
+            continue
+        clickables.append([el.name, classes, text, el.get("href") or ""])
+
+    return {
+        "gtm_containers": sorted(set(GTM_ID_PATTERN.findall(html))),
+        "data_layer": _digest(bootstrap),
+        "clickables": _digest(clickables),
+        "clickable_count": len(clickables),
+    }
+
+
+def gtm_container_version(container_id: str, http, timeout: float = 15) -> str:
+    """Published version of a GTM container (a digest of gtm.js if it has none)."""
+    response = http.get(GTM_JS_URL.format(container_id), timeout=timeout, headers={"User-Agent": USER_AGENT})
+    response.raise_for_status()
+    match = GTM_VERSION_PATTERN.search(response.text)
+    return match.group(1) if match else "sha1:" + _digest(response.text)
+
+
+def fetch_fingerprint(
+    url: str,
+    session=None,
+    timeout: float = 15,
+    gtm_versions: Optional[Dict[str, str]] = None,
+    target_text: Optional[str] = None,
+    snippets: Optional[Iterable[str]] = None,
+) -> Dict:
+    """
+    Fetch a page without a browser and fingerprint it. gtm_versions is a
+    container id -> version cache shared across the pages of a run.
+    """
+    import requests
+
+    http = session or requests
+    response = http.get(url, timeout=timeout, headers={"User-Agent": USER_AGENT})
+    response.raise_for_status()
+    fingerprint = html_fingerprint(response.text, target_text=target_text, snippets=snippets)
+    versions = {}
+    for container in fingerprint["gtm_containers"]:
+        if gtm_versions is not None and container in gtm_versions:
+            versions[container] = gtm_versions[container]
+            continue
+        versions[container] = gtm_container_version(container, http, timeout)
+        if gtm_versions is not None:
+            gtm_versions[container] = versions[container]
+    fingerprint["gtm_versions"] = versions
+    fingerprint["digest"] = _digest([versions, fingerprint["data_layer"], fingerprint["clickables"]])
+    return fingerprint
+
+
+class FingerprintStore:
+    """One JSON file per URL holding its last fingerprint and scan result."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.scanned = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[Dict]:
+        path = self._path(url)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def unchanged(self, url: str, fingerprint: Dict) -> Optional[Dict]:
+        """The stored result if the page's fingerprint matches the stored one."""
+        entry = self.get(url)
+        if not entry or entry["fingerprint"].get("digest") != fingerprint.get("digest"):
+            return None
+        with self._lock:
+            self.reused += 1
+        return entry["result"]
+
+    def put(self, url: str, fingerprint: Dict, result: Dict):
+        """Store a page's fingerprint with the result of a full scan."""
+        entry = {
+            "url": url,
+            "fingerprint": fingerprint,
+            "scanned_at": datetime.now(timezone.utc).isoformat(),
+            "result": result,
+        }
+        path = self._path(url)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, default=str)
+        os.replace(path + ".tmp", path)
+        with self._lock:
+            self.scanned += 1
@@ -1,6 +1,10 @@
+# Run from the repository root (the scanner modules are imported as
+# app.agents.scanning_pages.*):
+#   PYTHONPATH=. streamlit run app/agents/scanning_pages/page_scaner_steamlit.py
 import json
+import os
 import time
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import urlparse, parse_qs
 import pandas as pd
 from selenium import webdriver
@@ -12,6 +16,35 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 import streamlit as st
 
+from app.agents.scanning_pages.browser_pool import BrowserPool, process_tree_rss_mb
+from app.agents.scanning_pages.capture_scripts import DATA_LAYER_BUFFER, DEFAULT_BUFFER_CAPACITY, capture_scripts
+from app.agents.scanning_pages.click_targets import VISIBLE_FN, find_click_targets
+from app.agents.scanning_pages.click_yield import ClickYieldModel
+from app.agents.scanning_pages.component_registry import ComponentRegistry, reused_click, with_reused_events
+from app.agents.scanning_pages.fast_forward import click_latency_ms, fast_forward_scripts, latency_summary
+from app.agents.scanning_pages.gtm_container import (
+    CONTAINER_IDS_FN,
+    GtmContainers,
+    find_predicted_targets,
+    predictive_triggers,
+    trigger_report,
+)
+from app.agents.scanning_pages.interception import (
+    ResourceBlockingProfile,
+    apply_profile_to_chrome,
+)
+from app.agents.scanning_pages.network_capture import GA4HitStream
+from app.agents.scanning_pages.page_fingerprint import FingerprintStore, fetch_fingerprint
+from app.agents.scanning_pages.selector_cache import SelectorCache
+from app.agents.scanning_pages.settle import DEFAULT_CAP_MS, DEFAULT_QUIET_MS, SETTLE_JS
+from app.agents.scanning_pages.sinks import EventSink
+
+# Persistent Chrome HTTP cache of the app's driver pool; set GA4_CHROME_CACHE_DIR
+# to move it, or to an empty string to disable it.
+CHROME_CACHE_DIR = os.getenv(
+    "GA4_CHROME_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ga4_scanner", "chrome")
+)
+
 # ------------------------------------------------------------------
 # Helper Functions and GA4EventCollector class (modified)
 # ------------------------------------------------------------------
@@ -67,51 +100,202 @@ def parse_ga4_event(event: Dict) -> Dict:
     except Exception as ex:
         return {"error": str(ex)}
 
+def create_driver(
+    resource_profile: Optional[ResourceBlockingProfile] = None,
+    sinkhole_ga4: bool = False,
+    disk_cache_dir: Optional[str] = None,
+) -> webdriver.Chrome:
+    """
+    Launch a headless Chrome with performance logging enabled. With a
+    resource_profile (e.g. DEFAULT_PROFILE), heavy resources and denylisted
+    hosts are blocked; GTM traffic is always allowed. With sinkhole_ga4, GA4 hits are recorded
+    from the performance log but never reach Google Analytics. disk_cache_dir
+    keeps Chrome's HTTP cache on disk there, so static assets survive driver
+    restarts; it must not be shared by two running drivers.
+    """
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')  # Run in headless mode.
+    if disk_cache_dir:
+        chrome_options.add_argument(f"--disk-cache-dir={disk_cache_dir}")
+    # Enable performance logging.
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    driver = webdriver.Chrome(options=chrome_options)
+    apply_profile_to_chrome(driver, resource_profile, sinkhole_ga4=sinkhole_ga4)
+    return driver
+
+def install_init_scripts(driver: webdriver.Chrome, scripts: List[str]):
+    """
+    Run the scripts at document start of every navigation via CDP
+    Page.addScriptToEvaluateOnNewDocument. Scripts registered by a previous
+    collector on the same (pooled) driver are removed first.
+    """
+    for identifier in getattr(driver, "_ga4_init_script_ids", []):
+        driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": identifier})
+    driver._ga4_init_script_ids = [
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": script})["identifier"]
+        for script in scripts
+    ]
+
+
+def reset_driver(driver: webdriver.Chrome):
+    """
+    Isolate the next scan on a pooled driver: clear cookies and the storage of
+    the origin just scanned, then park the tab on about:blank.
+    The HTTP cache is kept on purpose so static assets stay warm.
+    """
+    origin = driver.execute_script("return location.origin;")
+    if origin and origin.startswith("http"):
+        driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    driver.get("about:blank")
+
+def driver_is_healthy(driver: webdriver.Chrome) -> bool:
+    """A driver is healthy if its session still executes scripts."""
+    return driver.execute_script("return 1;") == 1
+
+def driver_rss_mb(driver: webdriver.Chrome) -> float:
+    """Memory of chromedriver plus the Chrome processes it spawned."""
+    return process_tree_rss_mb(driver.service.process.pid)
+
+@st.cache_resource
+def get_browser_pool(
+    size: int = 2,
+    max_pages: int = 100,
+    max_rss_mb: float = 1500,
+    sinkhole_ga4: bool = False,
+    disk_cache_dir: Optional[str] = None,
+) -> BrowserPool:
+    """
+    Process-wide pool of warm Chrome drivers, shared across Streamlit reruns.
+    With disk_cache_dir, every live driver gets its own persistent HTTP cache
+    slot below it; a recycled driver's replacement inherits a free slot, so
+    static assets stay cached across recycles and app restarts.
+    """
+    free_slots = list(range(max(1, size)))  # The pool never holds more than `size` live drivers.
+
+    def factory():
+        slot = free_slots.pop(0) if disk_cache_dir and free_slots else None
+        cache_dir = os.path.join(disk_cache_dir, f"slot-{slot}") if slot is not None else None
+        try:
+            driver = create_driver(sinkhole_ga4=sinkhole_ga4, disk_cache_dir=cache_dir)
+        except Exception:
+            if slot is not None:
+                free_slots.append(slot)
+            raise
+        driver._ga4_cache_slot = slot
+        return driver
+
+    def dispose(driver):
+        try:
+            driver.quit()
+        finally:
+            slot = getattr(driver, "_ga4_cache_slot", None)
+            if slot is not None:
+                free_slots.append(slot)
+
+    return BrowserPool(
+        factory=factory,
+        dispose=dispose,
+        size=size,
+        max_pages=max_pages,
+        max_rss_mb=max_rss_mb,
+        health_check=driver_is_healthy,
+        reset=reset_driver,
+        rss_of=driver_rss_mb,
+    )
+
 class GA4EventCollector:
-    def __init__(self):
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')  # Run in headless mode.
-        # Enable performance logging.
-        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
-        self.driver = webdriver.Chrome(options=chrome_options)
+    def __init__(
+        self,
+        driver: Optional[webdriver.Chrome] = None,
+        quiet_ms: int = DEFAULT_QUIET_MS,
+        cap_ms: int = DEFAULT_CAP_MS,
+        buffer_capacity: int = DEFAULT_BUFFER_CAPACITY,
+        debug: bool = False,
+        sink: Optional[EventSink] = None,
+        sinkhole_ga4: bool = False,
+        components: Optional[ComponentRegistry] = None,
+        selector_cache: Optional[SelectorCache] = None,
+        fingerprint_store: Optional[FingerprintStore] = None,
+        fast_forward: bool = False,
+        gtm: Optional[GtmContainers] = None,
+        click_yield: Optional[ClickYieldModel] = None,
+    ):
+        # A driver passed in (e.g. leased from get_browser_pool) is borrowed and
+        # left running on close(); otherwise the collector launches its own.
+        # sinkhole_ga4 only applies to an owned driver (pooled drivers are
+        # configured by get_browser_pool).
+        self._owns_driver = driver is None
+        self.driver = driver or create_driver(sinkhole_ga4=sinkhole_ga4)
         self.events = []      # Captured dataLayer events.
         self.ga4_events = []  # Captured raw GA4 network events.
+        # With a sink, each page is written out as it completes and only the
+        # current page's events are kept in self.events / self.ga4_events.
+        self.sink = sink
+        # With a ComponentRegistry, CTAs shared across pages of a site (header,
+        # footer, nav) are clicked on the first page only.
+        self.components = components
+        # Per-template CTA selectors, so pages of a known template skip the
+        # full element walk (see selector_cache.py).
+        self.selector_cache = selector_cache
+        # With a FingerprintStore, pages unchanged since the last scan reuse
+        # their stored events (see page_fingerprint.py).
+        self.fingerprint_store = fingerprint_store
+        # With GTM containers, only elements the page's GTM click triggers accept
+        # are clicked; gtm_report holds the last page's trigger report (see
+        # gtm_container.py).
+        self.gtm = gtm
+        self.gtm_report: Optional[Dict] = None
+        # With a click-yield model, targets are not filtered by class snippets;
+        # elements with a history of firing nothing are skipped and every click
+        # outcome is learned (see click_yield.py).
+        self.click_yield = click_yield
+        self._gtm_versions: Dict[str, str] = {}
+        self.quiet_ms = quiet_ms  # Quiet window that counts as "settled".
+        self.cap_ms = cap_ms      # Hard cap on any settle wait.
+        self.capture_js = capture_scripts(capacity=buffer_capacity, debug=debug, include_fetch=False)
+        # Fast-forward mode cuts animation and debounce waits after clicks (see
+        # fast_forward.py). The current page's click latencies and waits are
+        # kept in click_timings.
+        self.fast_forward = fast_forward
+        self.click_timings: List[Dict] = []
+        # The last page's clicks ({"info", "dataLayer", "ga4"}; skipped shared
+        # components carry reused_from/reused_click, see component_registry.py).
+        self.last_clicks: List[Dict] = []
+        # Drains the performance log into a cursor-indexed hit buffer at click boundaries.
+        self.hit_stream = GA4HitStream(self.driver)
+        if not self._owns_driver:
+            # Drop hits left in the log by the driver's previous scan.
+            self.hit_stream.poll()
+            self.hit_stream.discard_until(self.hit_stream.cursor)
         self.inject_datalayer_collector()
 
     def inject_datalayer_collector(self):
-        """Inject JavaScript to capture dataLayer.push calls into window.collectedEvents."""
-        script = """
-        window.collectedEvents = [];
-        window.dataLayer = window.dataLayer || [];
-        let originalPush = window.dataLayer.push;
-        window.dataLayer.push = function() {
-            const event = arguments[0];
-            const cleanEvent = { timestamp: new Date().toISOString(), data: event };
-            window.collectedEvents.push(cleanEvent);
-            console.log('Captured dataLayer event:', cleanEvent);
-            return originalPush.apply(this, arguments);
-        };
         """
-        self.driver.execute_script(script)
+        Register the ring-buffered dataLayer capture (window.__ga4Capture, see
+        capture_scripts.py) plus the settle detector used to wait after clicks
+        as init scripts, so they run before the page's own scripts on every
+        navigation. GA4 hits come from the performance log, so the fetch hook
+        is not needed. In fast-forward mode the fast-forward scripts come first
+        and reduced motion is emulated (reset otherwise, as the driver may be
+        pooled).
+        """
+        scripts = (fast_forward_scripts() if self.fast_forward else []) + self.capture_js + [SETTLE_JS]
+        install_init_scripts(self.driver, scripts)
+        features = [{"name": "prefers-reduced-motion", "value": "reduce"}] if self.fast_forward else []
+        self.driver.execute_cdp_cmd("Emulation.setEmulatedMedia", {"features": features})
 
     def find_clickable_elements(self, section_selector="body"):
         """
         Find all visible clickable elements (buttons, anchors, spans) within the given section.
         """
         script = f"""
-        function isVisible(el) {{
-            if (!el) return false;
-            if (!el.offsetParent) return false;
-            if (el.offsetWidth === 0 || el.offsetHeight === 0) return false;
-            const style = getComputedStyle(el);
-            return !(style.visibility === 'hidden' || style.display === 'none' || style.opacity === '0');
-        }}
-        let section = document.querySelector('{section_selector}');
+        let section = document.querySelector(arguments[0]);
         if (!section) return [];
         let elems = Array.from(section.querySelectorAll("button, a, span"));
-        return elems.filter(isVisible);
+        return ({VISIBLE_FN})(elems).then(visible => elems.filter((el, i) => visible[i]));
         """
-        return self.driver.execute_script(script)
+        return self.driver.execute_script(script, section_selector)
 
     def get_element_info(self, element) -> dict:
         """Return details of an element."""
@@ -126,38 +310,52 @@ class GA4EventCollector:
             'target': element.get_attribute('target')
         }
 
+    def wait_for_events_after(self, cursor: int, timeout=5) -> Tuple[List[Dict], int]:
+        """
+        Wait in the browser for dataLayer events past `cursor` and return
+        (new_events, new_cursor) in a single round trip. Resolves once pushes
+        stop for quiet_ms after the first new event, or after timeout seconds.
+        """
+        self.driver.set_script_timeout(timeout + 5)
+        result = self.driver.execute_async_script(
+            """
+            const done = arguments[arguments.length - 1];
+            if (!window.__ga4Capture) { done({ events: [], next_seq: arguments[1] }); return; }
+            window.__ga4Capture.waitFor(arguments[0], arguments[1], arguments[2], arguments[3]).then(done);
+            """,
+            DATA_LAYER_BUFFER,
+            cursor,
+            int(timeout * 1000),
+            self.quiet_ms,
+        ) or {}
+        return result.get("events") or [], result.get("next_seq", cursor)
+
+    def get_event_cursor(self) -> int:
+        """Return the next dataLayer sequence number (the cursor for new events)."""
+        return self.driver.execute_script(
+            "return window.__ga4Capture ? window.__ga4Capture.seq(arguments[0]) : 0;", DATA_LAYER_BUFFER
+        ) or 0
+
     def wait_for_new_event(self, initial_count, timeout=5):
-        """Wait until window.collectedEvents grows beyond initial_count."""
-        start = time.time()
-        while time.time() - start < timeout:
-            events = self.get_collected_events()
-            if len(events) > initial_count:
-                return True
-            time.sleep(0.5)
-        return False
-
-    def get_collected_events(self) -> List[Dict]:
-        """Return collected dataLayer events."""
-        events = self.driver.execute_script("return window.collectedEvents;")
-        return events if events else []
-
-    def get_ga4_events(self) -> List[Dict]:
+        """Wait until dataLayer events past the initial_count cursor are captured."""
+        new_events, _ = self.wait_for_events_after(initial_count, timeout=timeout)
+        return bool(new_events)
+
+    def get_collected_events(self, since: int = 0) -> List[Dict]:
+        """Return collected dataLayer events from sequence number `since`."""
+        result = self.driver.execute_script(
+            "return window.__ga4Capture ? window.__ga4Capture.read(arguments[0], arguments[1], false) : null;",
+            DATA_LAYER_BUFFER,
+            since,
+        )
+        return result["events"] if result else []
+
+    def get_ga4_events(self, since: int = 0) -> List[Dict]:
         """
-        Retrieve GA4 network events from performance logs.
-        Filters for requests where URL contains 'g/collect' or 'mp/collect'.
+        Retrieve GA4 network events (g/collect, mp/collect requests) captured at
+        or after the `since` cursor of the hit stream.
         """
-        logs = self.driver.get_log("performance")
-        ga4_events = []
-        for entry in logs:
-            try:
-                message = json.loads(entry["message"])["message"]
-                if message.get("method") == "Network.requestWillBeSent":
-                    url = message["params"]["request"]["url"]
-                    if "g/collect" in url or "mp/collect" in url:
-                        ga4_events.append(message)
-            except Exception:
-                continue
-        return ga4_events
+        return self.hit_stream.since(since)
 
     def intercept_navigation(self):
         """
@@ -179,52 +377,82 @@ class GA4EventCollector:
         """
         Filter clickable elements by target_text (if provided) or by class substring.
         For each filtered element, click it and capture dataLayer and GA4 events.
+        With GTM containers the elements are those the page's GTM click triggers
+        accept instead (unless none of them can be evaluated against the DOM),
+        and the page's trigger report is kept in gtm_report.
+        With a click-yield model the class snippets are not used; the model
+        picks and orders the targets and learns from each click.
         Returns a tuple: (dataLayer_events, ga4_events).
         """
         captured_dl_events = []
         captured_ga4_events = []
-        elements = self.find_clickable_elements(section_selector)
-        print(f"Found {len(elements)} clickable elements")
-        
-        snippets = ["primary-link icon-dx-search-inventory", "cta-content", "secondary-link", "cta"]
-        filtered_elements = []
-        for el in elements:
-            info = self.get_element_info(el)
-            if target_text:
-                if info.get('text') and target_text.upper() in info.get('text').upper():
-                    filtered_elements.append(el)
-                    continue
-            class_attr = el.get_attribute("class") or ""
-            for snippet in snippets:
-                if snippet in class_attr:
-                    filtered_elements.append(el)
-                    break
+        clicks = self.last_clicks = []
+        containers = triggers = None
+        if self.gtm is not None:
+            containers = self.gtm.load_all(self.driver.execute_script(f"return ({CONTAINER_IDS_FN})();") or [])
+            triggers = predictive_triggers(containers)
+        if triggers:
+            targets = find_predicted_targets(self.driver, section_selector, triggers)
+        else:
+            # Visibility, text and class filtering all happen in the page; only the
+            # handles that will be clicked come back, each with its metadata.
+            targets = find_click_targets(
+                self.driver, section_selector, target_text=target_text, cache=self.selector_cache,
+                class_filter=self.click_yield is None,
+            )
+        page_url = self.driver.current_url
+        if self.click_yield is not None:
+            found = len(targets)
+            targets = [targets[i] for i in self.click_yield.rank(page_url, [t["info"] for t in targets])]
+            print(f"Click-yield model kept {len(targets)} of {found} candidates")
+        print(f"Found {len(targets)} matching clickable elements")
 
-        if not filtered_elements:
+        if not targets:
             print("No matching elements found for given criteria.")
+            if containers is not None:
+                self.gtm_report = trigger_report(containers, [], self.get_collected_events())
             return (captured_dl_events, captured_ga4_events)
 
         # Prevent navigation so that we can capture network logs.
         self.intercept_navigation()
+        dl_cursor = self.get_event_cursor()
 
-        for target_element in filtered_elements:
-            info = self.get_element_info(target_element)
+        for target in targets:
+            target_element = target["element"]
+            info = target["info"]
             button_text = info.get("text", "")
+            fingerprint = None
+            if self.components:
+                fingerprint, entry = self.components.claim(page_url, info)
+                if entry is not None:
+                    # Not clicked again; the page's lists keep only its own events.
+                    print(f"Skipping shared component already clicked on {entry['first_url']}: {button_text}")
+                    clicks.append(reused_click(info, fingerprint, entry))
+                    continue
             print(f"\nClicking target element: {info}")
             try:
                 self.driver.execute_script("arguments[0].scrollIntoView(true);", target_element)
                 WebDriverWait(self.driver, 5).until(EC.element_to_be_clickable(target_element))
-                initial_dl_count = len(self.get_collected_events())
-                initial_ga4_count = len(self.get_ga4_events())
-                self.driver.execute_script("arguments[0].click();", target_element)
-                time.sleep(3)  # Allow time for events to be sent.
-                if self.wait_for_new_event(initial_dl_count, timeout=5):
-                    new_dl = self.get_collected_events()[initial_dl_count:]
+                self.hit_stream.poll()  # Flush earlier hits so they are not attributed to this click.
+                ga4_cursor = self.hit_stream.cursor
+                clicked = time.perf_counter()
+                clicked_at = self.driver.execute_script(
+                    "if (window.__ga4Settle) window.__ga4Settle.arm();"
+                    " const t = performance.now(); arguments[0].click(); return t;",
+                    target_element,
+                )
+                new_dl, dl_cursor = self.wait_for_events_after(dl_cursor, timeout=self.cap_ms / 1000)
+                self.click_timings.append({
+                    "text": button_text,
+                    "latency_ms": click_latency_ms(new_dl, clicked_at),
+                    "wait_ms": round((time.perf_counter() - clicked) * 1000, 1),
+                })
+                if new_dl:
                     print("Captured new dataLayer event(s):", new_dl)
                     captured_dl_events.extend(new_dl)
                 else:
                     print("No new dataLayer event detected after click.")
-                new_ga4 = self.get_ga4_events()[initial_ga4_count:]
+                new_ga4 = self.get_ga4_events(since=ga4_cursor)
                 if new_ga4:
                     # Attach the original GTM Button text to each GA4 event
                     for event in new_ga4:
@@ -233,23 +461,61 @@ class GA4EventCollector:
                     captured_ga4_events.extend(new_ga4)
                 else:
                     print("No new GA4 network requests detected after click.")
+                if fingerprint:
+                    self.components.record(page_url, fingerprint, {"dataLayer": new_dl, "ga4": new_ga4})
+                clicks.append({"info": info, "dataLayer": new_dl, "ga4": new_ga4})
+                if self.click_yield is not None:
+                    self.click_yield.record(page_url, info, bool(new_dl or new_ga4))
             except Exception as e:
                 print(f"Error during click on element: {str(e)}")
+        if self.click_yield is not None:
+            self.click_yield.save()
+        if containers is not None:
+            # Reused components count with the events of their first click.
+            if self.components:
+                self.components.resolve(page_url, clicks)
+            reported = with_reused_events(clicks)
+            pushed = self.get_collected_events() + [e for click in reported if "reused_from" in click for e in click["dataLayer"]]
+            self.gtm_report = trigger_report(containers, reported, pushed)
+            print(f"GTM triggers never fired: {self.gtm_report['unfired']}")
+        print(f"Click timings{' (fast-forward)' if self.fast_forward else ''}: {latency_summary(self.click_timings)}")
         return (captured_dl_events, captured_ga4_events)
 
     def collect_events_from_url(self, url: str, wait_time: int = 5, section_selector="body", target_text=None):
         """
         Load the URL, wait for the page to load, trigger clicks on target elements,
-        and capture both dataLayer and GA4 events.
+        and capture both dataLayer and GA4 events. With a sink the page's events
+        are streamed out immediately and replace the previous page's in memory.
+        With a fingerprint store, an unchanged page reuses its stored events.
         """
         try:
-            self.driver.get(url)
-            print(f"Loaded URL: {url}")
-            WebDriverWait(self.driver, wait_time).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-            self.inject_datalayer_collector()
-            dl_events, ga4_events = self.trigger_target_elements(section_selector, target_text=target_text)
-            self.events.extend(dl_events)
-            self.ga4_events.extend(ga4_events)
+            self.click_timings = []  # Per page, so each page's summary covers its own clicks.
+            fingerprint = stored = None
+            if self.fingerprint_store is not None:
+                try:
+                    fingerprint = fetch_fingerprint(url, gtm_versions=self._gtm_versions, target_text=target_text)
+                    stored = self.fingerprint_store.unchanged(url, fingerprint)
+                except Exception as e:
+                    print(f"Could not fingerprint {url}, scanning it fully: {str(e)}")
+            if stored is not None:
+                print(f"Page unchanged since the last scan, reusing stored events: {url}")
+                dl_events, ga4_events = stored["dataLayer"], stored["ga4"]
+            else:
+                self.driver.get(url)
+                print(f"Loaded URL: {url}")
+                WebDriverWait(self.driver, wait_time).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+                dl_events, ga4_events = self.trigger_target_elements(section_selector, target_text=target_text)
+                # Hits for this page are copied out; release them from the stream.
+                self.hit_stream.discard_until(self.hit_stream.cursor)
+                if fingerprint:
+                    self.fingerprint_store.put(url, fingerprint, {"dataLayer": make_serializable(dl_events), "ga4": ga4_events})
+            if self.sink:
+                self.sink.write_page(url, make_serializable(dl_events), ga4_events)
+                self.events = dl_events
+                self.ga4_events = ga4_events
+            else:
+                self.events.extend(dl_events)
+                self.ga4_events.extend(ga4_events)
             print(f"DataLayer events collected: {self.events}")
             print(f"GA4 events collected: {self.ga4_events}")
             return {"dataLayer": self.events, "ga4": self.ga4_events}
@@ -276,8 +542,11 @@ class GA4EventCollector:
         df_ga4.to_csv(f"{filename}_GA4.csv", index=False)
 
     def close(self):
-        """Close the browser."""
-        self.driver.quit()
+        """Close the sink and close the browser (if owned)."""
+        if self.sink:
+            self.sink.close()
+        if self._owns_driver:
+            self.driver.quit()
 
 # -----------------------------------------------
 # Streamlit Interface for the GA4 Event Collector
@@ -295,11 +564,12 @@ def main():
         if not url.strip():
             st.error("Please enter a valid URL.")
         else:
-            with st.spinner("Collecting events, please wait..."):
-                collector = GA4EventCollector()
+            with st.spinner("Collecting events, please wait..."), get_browser_pool(disk_cache_dir=CHROME_CACHE_DIR or None).lease() as lease:
+                collector = GA4EventCollector(driver=lease.resource)
                 try:
                     # Collect events from the URL (using default selectors and no target text filtering)
                     events = collector.collect_events_from_url(url, wait_time=5, section_selector="body", target_text=None)
+                    lease.pages += 1
                     # Export GA4 events to the local folder
                     collector.export_events("gtm_and_ga4_events")
                     st.success("GA4 events collected and exported successfully!")
@@ -0,0 +1,84 @@
+# Per-Template Selector Cache
+# ===========================
+#
+# Our pages come from a handful of AEM templates, yet every scan walked every
+# button/anchor/span of every page to find its CTAs. SelectorCache remembers,
+# per page template (DOM signature from click_targets.TEMPLATE_SIGNATURE_FN)
+# and filter settings, the tag+class selectors of the CTAs found on the first
+# page of that template. Later pages of the template only query those
+# selectors.
+#   - every `refresh_every`-th lookup of a template misses on purpose, so a full
+#     scan runs and newly authored CTA styles are merged in
+#   - templates whose CTAs include an element without classes are not cached,
+#     since a tag+class selector could not find it again
+#   - the cache is a JSON file, rewritten atomically after every update
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+
+class SelectorCache:
+    def __init__(self, path: Optional[str] = None, refresh_every: int = 50):
+        """
+        path: JSON file to load from and persist to (None keeps it in memory).
+        refresh_every: force a full scan on every n-th lookup of a template.
+        """
+        self.path = path
+        self.refresh_every = refresh_every
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+
+    @staticmethod
+    def key(signature: str, section_selector: str, target_text: Optional[str], snippets: Optional[Iterable[str]]) -> str:
+        """Cache key for a template signature plus the click-target filters (snippets None: unfiltered)."""
+        filters = list(snippets) if snippets is not None else None
+        raw = json.dumps([signature, section_selector, target_text or None, filters], ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Cached selectors for a key, or None when a full scan should run."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry["uses"] += 1
+            if self.refresh_every and entry["uses"] % self.refresh_every == 0:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return list(entry["selectors"])
+
+    def put(self, key: str, selectors: List[Optional[str]]):
+        """Merge the selectors found by a full scan into the template's entry."""
+        if not selectors or any(selector is None for selector in selectors):
+            return
+        with self._lock:
+            entry = self._entries.setdefault(key, {"selectors": [], "uses": 0})
+            entry["selectors"] = sorted(set(entry["selectors"]) | set(selectors))
+            entry["updated"] = datetime.now(timezone.utc).isoformat()
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"templates": len(self._entries), "hits": self.hits, "misses": self.misses}
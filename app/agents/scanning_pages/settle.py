@@ -0,0 +1,123 @@
+# Page Quiescence Detection
+# =========================
+#
+# Replaces fixed sleeps after page loads and clicks with an adaptive "settle"
+# check. The injected script tracks three activity sources inside the page:
+#   - network requests to g/collect / mp/collect (PerformanceObserver)
+#   - growth of the capture buffers (window.__ga4Capture, see capture_scripts.py)
+#   - DOM mutations (MutationObserver)
+# The page counts as settled once none of them has changed for `quiet_ms`,
+# or once `cap_ms` has passed since the wait was armed (hard cap).
+
+DEFAULT_QUIET_MS = 500
+DEFAULT_CAP_MS = 10000
+
+SETTLE_JS = r"""
+(function() {
+    if (window.__ga4Settle) return;
+    const state = { lastActivity: performance.now(), armedAt: null, lastEventCount: -1 };
+    const touch = function() { state.lastActivity = performance.now(); };
+
+    try {
+        new PerformanceObserver(function(list) {
+            for (const entry of list.getEntries()) {
+                if (entry.name.includes('g/collect') || entry.name.includes('mp/collect')) touch();
+            }
+        }).observe({ type: 'resource' });
+    } catch (e) {}
+
+    // Style-only attribute changes (carousels, animations) are ignored so they
+    // cannot keep the page "busy" forever.
+    const observeDom = function() {
+        new MutationObserver(touch).observe(document.documentElement, {
+            childList: true, subtree: true, characterData: true,
+            attributes: true, attributeFilter: ['class', 'hidden', 'aria-hidden', 'aria-expanded']
+        });
+    };
+    if (document.documentElement) observeDom();
+    else document.addEventListener('DOMContentLoaded', observeDom);
+
+    function eventCount() {
+        return window.__ga4Capture ? window.__ga4Capture.totalSeq() : 0;
+    }
+
+    function isSettled(quietMs, capMs) {
+        const now = performance.now();
+        if (state.armedAt === null) state.armedAt = now;
+        const count = eventCount();
+        if (count !== state.lastEventCount) {
+            state.lastEventCount = count;
+            touch();
+        }
+        return (now - state.lastActivity >= quietMs) || (now - state.armedAt >= capMs);
+    }
+
+    window.__ga4Settle = {
+        arm: function() {
+            state.armedAt = performance.now();
+            touch();
+        },
+        isSettled: isSettled,
+        waitForSettle: function(quietMs, capMs) {
+            // Re-arm: a page that was already quiet must still stay quiet for
+            // quietMs from now, or a push that follows a debounce is missed.
+            const start = performance.now();
+            state.armedAt = start;
+            state.lastActivity = start;
+            return new Promise(function(resolve) {
+                (function tick() {
+                    if (isSettled(quietMs, capMs)) {
+                        const now = performance.now();
+                        resolve({ settled: now - state.lastActivity >= quietMs, waited_ms: Math.round(now - start) });
+                    } else {
+                        (window.__ga4NativeSetTimeout || setTimeout)(tick, 50);
+                    }
+                })();
+            });
+        }
+    };
+})();
+"""
+
+
+def settle_condition(quiet_ms: int = DEFAULT_QUIET_MS, cap_ms: int = DEFAULT_CAP_MS) -> str:
+    """
+    Build a Crawl4AI `wait_for` JS condition that becomes true once the page has
+    settled. If the detector is missing (e.g. the page navigated away) the
+    condition is true immediately instead of hanging until the page timeout.
+    """
+    return f"js:() => !window.__ga4Settle || window.__ga4Settle.isSettled({int(quiet_ms)}, {int(cap_ms)})"
+
+
+def wait_for_settle(driver, quiet_ms: int = DEFAULT_QUIET_MS, cap_ms: int = DEFAULT_CAP_MS) -> dict:
+    """
+    Block a Selenium driver until the page has settled, resolving inside the
+    browser via execute_async_script (one round trip).
+    Returns {"settled": bool, "waited_ms": int}; settled is False when the
+    hard cap was hit or the detector was not installed.
+    """
+    driver.set_script_timeout(cap_ms / 1000 + 5)
+    result = driver.execute_async_script(
+        """
+        const done = arguments[arguments.length - 1];
+        if (!window.__ga4Settle) { done({ settled: false, waited_ms: 0 }); return; }
+        window.__ga4Settle.waitForSettle(arguments[0], arguments[1]).then(done);
+        """,
+        int(quiet_ms),
+        int(cap_ms),
+    )
+    return result or {"settled": False, "waited_ms": 0}
+
+
+async def wait_for_settle_async(page, quiet_ms: int = DEFAULT_QUIET_MS, cap_ms: int = DEFAULT_CAP_MS) -> dict:
+    """
+    Async counterpart of wait_for_settle for a live Playwright page: the wait
+    resolves inside the browser in a single evaluate call.
+    """
+    result = await page.evaluate(
+        "([quietMs, capMs]) => window.__ga4Settle"
+        " ? window.__ga4Settle.waitForSettle(quietMs, capMs)"
+        " : { settled: false, waited_ms: 0 }",
+        [int(quiet_ms), int(cap_ms)],
+    )
+    return result or {"settled": False, "waited_ms": 0}
@@ -0,0 +1,159 @@
+# Streaming Event Sinks
+# =====================
+#
+# Writes scan output page by page as it arrives instead of holding every event
+# in memory until an end-of-run export. JsonlSink appends one JSON record per
+# captured event to rotating JSONL files (flushed after every page, so a crash
+# loses at most the page in flight) and periodically compacts the rotated
+# files into Parquet partitioned by scan_date and host.
+#
+# Record layout (JSONL and Parquet):
+#   scan_id, scan_date, host, page_url, kind ("dataLayer" | "ga4"),
+#   timestamp, payload (the event as a JSON string)
+
+import glob
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+
+class EventSink(ABC):
+    """Interface for page-by-page scan output."""
+
+    @abstractmethod
+    def write_page(self, page_url: str, data_layer_events: List[Dict], ga4_events: List[Dict], meta: Optional[Dict] = None):
+        """Write one page's events."""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JsonlSink(EventSink):
+    def __init__(
+        self,
+        directory: str,
+        parquet_dir: Optional[str] = None,
+        max_bytes: int = 64 * 1024 * 1024,
+        compact_every: int = 1,
+        scan_id: Optional[str] = None,
+    ):
+        """
+        directory: where JSONL files are written.
+        parquet_dir: if set, rotated files are compacted into Parquet here.
+        max_bytes: rotate the current JSONL file once it grows past this size.
+        compact_every: compact after this many rotations (and always on close).
+        """
+        self.directory = directory
+        self.parquet_dir = parquet_dir
+        self.max_bytes = max_bytes
+        self.compact_every = max(1, compact_every)
+        self.scan_id = scan_id or uuid.uuid4().hex[:12]
+        self.scan_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        self._part = 0
+        self._rotations = 0
+        self._file = None
+        os.makedirs(directory, exist_ok=True)
+        self._open_next()
+
+    def _open_next(self):
+        path = os.path.join(self.directory, f"events-{self.scan_date}-{self.scan_id}-{self._part:05d}.jsonl.open")
+        self._file = open(path, "a", encoding="utf-8")
+        self._part += 1
+
+    def _seal_current(self):
+        """Close the current file and rename it so compaction may pick it up."""
+        path = self._file.name
+        self._file.close()
+        if os.path.getsize(path):
+            os.replace(path, path[: -len(".open")])
+        else:
+            os.remove(path)
+
+    def write_page(self, page_url: str, data_layer_events: List[Dict], ga4_events: List[Dict], meta: Optional[Dict] = None):
+        """Append one page's events and flush them to disk."""
+        base = {
+            "scan_id": self.scan_id,
+            "scan_date": self.scan_date,
+            "host": urlparse(page_url).netloc,
+            "page_url": page_url,
+        }
+        if meta:
+            base.update(meta)
+        lines = []
+        for kind, events in (("dataLayer", data_layer_events), ("ga4", ga4_events)):
+            for event in events:
+                record = dict(base, kind=kind, timestamp=_event_timestamp(event))
+                record["payload"] = json.dumps(event, ensure_ascii=False, default=str)
+                lines.append(json.dumps(record, ensure_ascii=False))
+        if lines:
+            self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if self._file.tell() >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        """Start a new JSONL file; compact sealed files every compact_every rotations."""
+        self._seal_current()
+        self._open_next()
+        self._rotations += 1
+        if self.parquet_dir and self._rotations % self.compact_every == 0:
+            compact_to_parquet(self.directory, self.parquet_dir)
+
+    def close(self):
+        if self._file is None:
+            return
+        self._seal_current()
+        self._file = None
+        if self.parquet_dir:
+            compact_to_parquet(self.directory, self.parquet_dir)
+
+
+def _event_timestamp(event: Dict) -> Optional[str]:
+    """Best-effort ISO timestamp for dataLayer, fetch-hook and performance-log events."""
+    if event.get("timestamp"):
+        return str(event["timestamp"])
+    wall_time = (event.get("params") or {}).get("wallTime")
+    if wall_time:
+        return datetime.fromtimestamp(wall_time, tz=timezone.utc).isoformat()
+    return None
+
+
+def compact_to_parquet(jsonl_dir: str, parquet_dir: str) -> int:
+    """
+    Move every sealed JSONL file in jsonl_dir into a Parquet dataset under
+    parquet_dir, partitioned by scan_date and host. Compacted JSONL files are
+    deleted. Returns the number of records written.
+    """
+    import pandas as pd
+
+    paths = sorted(glob.glob(os.path.join(jsonl_dir, "*.jsonl")))
+    if not paths:
+        return 0
+    frames = [pd.read_json(path, lines=True, dtype=False) for path in paths if os.path.getsize(path)]
+    frames = [frame for frame in frames if not frame.empty]
+    written = 0
+    if frames:
+        table = pd.concat(frames, ignore_index=True)
+        table["host"] = table["host"].replace("", "unknown")
+        table.to_parquet(
+            parquet_dir,
+            engine="pyarrow",
+            partition_cols=["scan_date", "host"],
+            index=False,
+            basename_template=f"part-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+        )
+        written = len(table)
+    for path in paths:
+        os.remove(path)
+    return written
@@ -0,0 +1,10 @@
+
+// Copyright 2012 Google Inc. All rights reserved.
+ 
+(function(){
+
+var data = {"resource": {"version": "214", "macros": [{"function": "__e"}, {"function": "__v", "vtp_name": "gtm.elementClasses", "vtp_dataLayerVersion": 1}, {"function": "__aev", "vtp_varType": "TEXT"}, {"function": "__v", "vtp_name": "gtm.elementUrl", "vtp_dataLayerVersion": 1}, {"function": "__u", "vtp_component": "PATH", "vtp_enableMultiQueryKeys": false}, {"function": "__v", "vtp_name": "gtm.triggers", "vtp_dataLayerVersion": 2, "vtp_setDefaultValue": true, "vtp_defaultValue": ""}, {"function": "__jsm", "vtp_javascript": ["template", "(function(){return document.title})();"]}, {"function": "__v", "vtp_name": "gtm.element", "vtp_dataLayerVersion": 1}], "tags": [{"function": "__googtag", "vtp_tagId": "G-TEST123", "tag_id": 1}, {"function": "__gaawe", "once_per_event": true, "vtp_eventName": "cta_click", "vtp_eventSettingsTable": ["list", ["map", "parameter", "event_action", "parameter_value", "Click"], ["map", "parameter", "event_label", "parameter_value", ["macro", 2]]], "vtp_measurementIdOverride": "G-TEST123", "tag_id": 7}, {"function": "__gaawe", "once_per_event": true, "vtp_eventName": "outbound_link", "vtp_eventSettingsTable": ["list", ["map", "parameter", "link_url", "parameter_value", ["macro", 3]]], "vtp_measurementIdOverride": "G-TEST123", "tag_id": 9}, {"function": "__gaawe", "once_per_event": true, "vtp_eventName": "configurator_start", "vtp_eventSettingsTable": ["list", ["map", "parameter", "event_category", "parameter_value", "Configurator"]], "vtp_measurementIdOverride": "G-TEST123", "tag_id": 11}, {"function": "__gaawe", "once_per_event": true, "vtp_eventName": "hero_video", "vtp_measurementIdOverride": "G-TEST123", "tag_id": 12}, {"function": "__cl", "tag_id": 20}, {"function": "__lcl", "vtp_waitForTags": false, "vtp_checkValidation": false, "vtp_uniqueTriggerId": "214_31", "tag_id": 21}, {"function": "__html", "vtp_html": "<script>console.log('x')</script>", "tag_id": 22}], "predicates": [{"function": "_eq", "arg0": ["macro", 0], "arg1": "gtm.js"}, {"function": "_eq", "arg0": ["macro", 0], "arg1": "gtm.click"}, {"function": "_cn", "arg0": ["macro", 1], "arg1": "cta"}, {"function": "_eq", "arg0": ["macro", 0], "arg1": "gtm.linkClick"}, {"function": "_re", "arg0": ["macro", 5], "arg1": "(^$|((^|,)214_31($|,)))"}, {"function": "_re", "arg0": ["macro", 3], "arg1": "^https?://(www\\.)?rangerover\\.com", "ignore_case": true}, {"function": "_eq", "arg0": ["macro", 0], "arg1": "configurator_start"}, {"function": "_sw", "arg0": ["macro", 4], "arg1": "/de-de/"}, {"function": "_cn", "arg0": ["macro", 6], "arg1": "Range Rover"}, {"function": "_css", "arg0": ["macro", 7], "arg1": ".hero video, .hero .play-button"}, {"function": "_eq", "arg0": ["macro", 0], "arg1": "gtm.load"}], "rules": [[["if", 0], ["add", 0, 5, 6]], [["if", 1, 2, 7], ["add", 1]], [["if", 3, 4], ["unless", 5], ["add", 2]], [["if", 6], ["add", 3]], [["if", 1, 8, 9], ["add", 4]], [["if", 10], ["add", 7]]]}, "runtime": [[50, "__cl", [46, "a"], [2, [15, "a"], "gtmOnSuccess", [7]]]], "permissions": {}, "security_groups": {}};
+
+
+var ea,fa=function(a){var b=0;return function(){return b<a.length?{done:!1,value:a[b++]}:{done:!0}}};
+})()
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import time
+import pytest
+from app.agents.scanning_pages.asset_cache import AssetCache
+from app.agents.scanning_pages.interception import NetworkInterceptor
+
+class FakeResponse:
+    def __init__(self, body, status=200, headers=None):
+        self.status = status
+        self.headers = headers or {"content-type": "application/javascript", "content-encoding": "gzip"}
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+class FakeRoute:
+    def __init__(self, url, resource_type="script", response=None):
+        self.request = type("Request", (), {
+            "url": url, "post_data": None, "method": "GET", "resource_type": resource_type,
+        })()
+        self.response = response
+        self.fetches = 0
+        self.outcome = None
+
+    async def fetch(self):
+        self.fetches += 1
+        return self.response
+
+    async def fulfill(self, status=None, headers=None, body=None, response=None):
+        self.outcome = ("fulfill", status if response is None else response.status, headers, body)
+
+    async def abort(self, error_code):
+        self.outcome = ("abort", error_code)
+
+    async def continue_(self):
+        self.outcome = ("continue", None)
+
+def test_only_static_assets_are_cacheable(tmp_path):
+    cache = AssetCache(str(tmp_path))
+    assert cache.cacheable("https://www.rangerover.com/etc/clientlibs/site.js", "script")
+    assert cache.cacheable("https://www.rangerover.com/etc/clientlibs/site.css", "stylesheet")
+    assert cache.cacheable("https://www.googletagmanager.com/gtm.js?id=GTM-X", "script")
+    assert not cache.cacheable("https://www.rangerover.com/de-de/index.html", "document")
+    assert not cache.cacheable("https://www.rangerover.com/api/config", "fetch")
+    assert not cache.cacheable("https://www.rangerover.com/etc/clientlibs/site.js", "script", method="POST")
+    assert not cache.cacheable("https://region1.google-analytics.com/g/collect?v=2&en=click", "image")
+    assert not cache.cacheable("https://www.google-analytics.com/collect?v=1&t=event", "image")
+
+def test_store_is_content_addressed_and_honours_freshness(tmp_path):
+    cache = AssetCache(str(tmp_path), max_age_s=60)
+    assert cache.store("https://a.test/v1/app.js", 200, {"Content-Type": "text/javascript"}, b"console.log(1)")
+    assert cache.store("https://a.test/v2/app.js", 200, {"Content-Type": "text/javascript"}, b"console.log(1)")
+    assert not cache.store("https://a.test/err.js", 404, {}, b"missing")
+    assert not cache.store("https://a.test/private.js", 200, {"Cache-Control": "no-store"}, b"secret")
+    objects = [name for _, _, names in os.walk(tmp_path / "objects") for name in names]
+    assert len(objects) == 1
+    cached = cache.lookup("https://a.test/v2/app.js")
+    assert cached == {"status": 200, "headers": {"content-type": "text/javascript"}, "body": b"console.log(1)"}
+    assert cache.lookup("https://a.test/err.js") is None
+    stale = AssetCache(str(tmp_path), max_age_s=0)
+    time.sleep(0.01)
+    assert stale.lookup("https://a.test/v1/app.js") is None
+
+def test_interceptor_fetches_once_then_serves_from_cache(tmp_path):
+    cache = AssetCache(str(tmp_path))
+    interceptor = NetworkInterceptor(profile=None, asset_cache=cache)
+    url = "https://www.rangerover.com/etc/clientlibs/site.js"
+    first = FakeRoute(url, response=FakeResponse(b"var site = 1;"))
+    asyncio.run(interceptor.handle(first))
+    second = FakeRoute(url, response=FakeResponse(b"var site = 2;"))
+    asyncio.run(interceptor.handle(second))
+    page = FakeRoute("https://www.rangerover.com/de-de/index.html", resource_type="document")
+    asyncio.run(interceptor.handle(page))
+    assert (first.fetches, second.fetches) == (1, 0)
+    assert first.outcome[0] == "fulfill" and first.outcome[3] == b"var site = 1;"
+    assert second.outcome == ("fulfill", 200, {"content-type": "application/javascript"}, b"var site = 1;")
+    assert page.outcome == ("continue", None)
+    assert interceptor.stats["cache:miss"] == 1 and interceptor.stats["cache:hit"] == 1
+    assert cache.stats()["bytes_served"] == len(b"var site = 1;")
+
+def test_offline_miss_is_not_fetched(tmp_path):
+    interceptor = NetworkInterceptor(profile=None, offline=True, asset_cache=AssetCache(str(tmp_path)))
+    route = FakeRoute("https://www.rangerover.com/etc/clientlibs/site.js", response=FakeResponse(b"x"))
+    asyncio.run(interceptor.handle(route))
+    assert route.fetches == 0
+    assert route.outcome == ("abort", "internetdisconnected")
@@ -0,0 +1,77 @@
+import itertools
+from app.agents.scanning_pages.browser_pool import BrowserPool
+
+class FakeDrivers:
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.disposed = []
+        self.unhealthy = set()
+        self.failing_reset = set()
+        self.rss = {}
+        self.resets = []
+
+    def create(self):
+        return next(self.ids)
+
+    def health(self, driver):
+        return driver not in self.unhealthy
+
+    def reset(self, driver):
+        if driver in self.failing_reset:
+            raise RuntimeError("session is gone")
+        self.resets.append(driver)
+
+    def pool(self, **kwargs):
+        kwargs.setdefault("size", 1)
+        return BrowserPool(self.create, self.disposed.append, health_check=self.health, reset=self.reset,
+                           rss_of=lambda driver: self.rss.get(driver, 100), **kwargs)
+
+def use(pool, pages=1):
+    with pool.lease() as lease:
+        lease.pages += pages
+        return lease.resource
+
+def test_recycles_after_max_pages():
+    drivers = FakeDrivers()
+    pool = drivers.pool(max_pages=3)
+    assert [use(pool), use(pool)] == [1, 1]
+    assert use(pool) == 1
+    assert drivers.disposed == [1] and pool.recycled == 1
+    assert use(pool) == 2
+    assert drivers.resets == [1, 1, 2]
+
+def test_recycles_over_the_rss_limit():
+    drivers = FakeDrivers()
+    pool = drivers.pool(max_pages=0, max_rss_mb=500)
+    assert use(pool) == 1
+    drivers.rss[1] = 800
+    assert use(pool) == 1
+    assert drivers.disposed == [1] and pool.recycled == 1
+    assert use(pool) == 2
+
+def test_unhealthy_driver_is_replaced_on_checkout():
+    drivers = FakeDrivers()
+    pool = drivers.pool(size=2)
+    drivers.unhealthy.add(1)
+    assert use(pool) == 3
+    assert drivers.disposed == [1]
+    assert pool.stats()["live"] == 2
+
+def test_driver_is_retired_when_reset_fails():
+    drivers = FakeDrivers()
+    pool = drivers.pool()
+    drivers.failing_reset.add(1)
+    assert use(pool) == 1
+    assert drivers.disposed == [1]
+    assert pool.stats() == {"live": 0, "idle": 0, "pages": [], "recycled": 0}
+    assert use(pool) == 2
+
+def test_close_disposes_idle_and_returned_drivers():
+    drivers = FakeDrivers()
+    pool = drivers.pool(size=3)
+    with pool.lease() as lease:
+        pool.close()
+        assert sorted(drivers.disposed) == [2, 3]
+    assert lease.resource == 1
+    assert sorted(drivers.disposed) == [1, 2, 3]
+    assert pool.stats()["live"] == 0
@@ -0,0 +1,71 @@
+import json
+import shutil
+import subprocess
+import pytest
+from app.agents.scanning_pages.capture_scripts import capture_core_js
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+
+# Runs body_js (an async function body) under node with the capture core
+# loaded and returns its JSON result.
+def run_capture(body_js, capacity=3):
+    script = f"""
+globalThis.window = globalThis;
+{capture_core_js(capacity)}
+const capture = window.__ga4Capture;
+const push = (...names) => names.forEach(n => capture.push('dataLayer', {{ data: {{ event: n }} }}));
+const names = read => read.events.map(e => e.data.event);
+(async () => {{
+    const out = await (async () => {{ {body_js} }})();
+    console.log(JSON.stringify(out));
+}})();
+"""
+    out = subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True, timeout=30)
+    return json.loads(out.stdout)
+
+def test_overflow_evicts_the_oldest_items():
+    out = run_capture("""
+        push('a', 'b', 'c', 'd', 'e');
+        const read = capture.read('dataLayer', 0, false);
+        return [names(read), read.events.map(e => e.seq), read.next_seq, read.overflow, read.missed,
+                capture.stats().dataLayer.buffered];
+    """)
+    assert out == [["c", "d", "e"], [2, 3, 4], 5, 2, 2, 3]
+
+def test_cursor_reads_and_drains_only_new_items():
+    out = run_capture("""
+        push('a', 'b');
+        const first = capture.read('dataLayer', 0, true);
+        push('c', 'd', 'e');
+        const second = capture.read('dataLayer', first.next_seq, false);
+        const tail = capture.read('dataLayer', 4, false);
+        return [names(first), names(second), second.overflow, second.missed, names(tail), capture.seq('dataLayer')];
+    """)
+    # Drained items free their slots, so three more pushes fit without overflow.
+    assert out == [["a", "b"], ["c", "d", "e"], 0, 0, ["e"], 5]
+
+def test_wait_for_resolves_once_pushes_go_quiet():
+    out = run_capture("""
+        push('before');
+        const cursor = capture.seq('dataLayer');
+        const started = Date.now();
+        setTimeout(() => push('click'), 20);
+        setTimeout(() => push('hit'), 60);
+        const read = await capture.waitFor('dataLayer', cursor, 3000, 100);
+        return [names(read), Date.now() - started];
+    """, capacity=10)
+    events, elapsed = out
+    assert events == ["click", "hit"]
+    # Quiet window after the last push (60 + 100 ms), well before the cap.
+    assert 150 <= elapsed < 1500
+
+def test_wait_for_times_out_without_new_items():
+    out = run_capture("""
+        push('before');
+        const started = Date.now();
+        const read = await capture.waitFor('dataLayer', capture.seq('dataLayer'), 200, 50);
+        return [names(read), read.next_seq, Date.now() - started];
+    """)
+    events, next_seq, elapsed = out
+    assert events == [] and next_seq == 1
+    assert elapsed >= 190
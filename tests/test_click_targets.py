@@ -0,0 +1,10 @@
+import pytest
+from app.agents.scanning_pages.click_targets import partition_targets
+
+def test_partition_targets_round_robin():
+    assert partition_targets(7, 3) == [[0, 3, 6], [1, 4], [2, 5]]
+
+def test_partition_targets_never_opens_idle_tabs():
+    assert partition_targets(2, 4) == [[0], [1]]
+    assert partition_targets(0, 4) == []
+    assert partition_targets(3, 0) == [[0, 1, 2]]
@@ -0,0 +1,48 @@
+import pytest
+from app.agents.scanning_pages.click_yield import CLICK, SAMPLE, SKIP, ClickYieldModel, element_features
+
+PAGE = "https://www.rangerover.com/de-de/range-rover/index.html"
+
+def info(path, selector="a.cta", text="Configure", tag="a"):
+    return {"tag_name": tag, "text": text, "path": path, "selector": selector}
+
+def test_features_normalize_text_and_scope_paths_to_host():
+    features = element_features(PAGE, info("body>header>a:nth-of-type(2)", text="  Ab  39.900 EUR "))
+    assert features == {
+        "path": "www.rangerover.com|body>header>a:nth-of-type(2)",
+        "selector": "a.cta",
+        "text": "a|ab 0.0 eur",
+    }
+    assert element_features(PAGE, {"tag_name": "span", "text": ""}) == {"path": None, "selector": None, "text": None}
+
+def test_zero_yield_elements_are_skipped_or_sampled():
+    model = ClickYieldModel(min_observations=3, sample_rate=0)
+    dead = info("body>footer>span:nth-of-type(1)", selector="span.copyright", text="(c) 2025")
+    assert model.decide(PAGE, dead) == CLICK
+    for _ in range(3):
+        model.record(PAGE, dead, fired=False)
+    assert model.decide(PAGE, dead) == SKIP
+    model.sample_rate = 1
+    assert model.decide(PAGE, dead) == SAMPLE
+    assert model.stats() == {"clicked": 1, "sampled": 1, "skipped": 1, "recorded": 3, "elements": 1}
+
+def test_rank_backs_off_to_template_and_orders_by_yield():
+    model = ClickYieldModel(min_observations=2, sample_rate=0)
+    for n in range(4):
+        model.record(PAGE, info(f"body>main>a:nth-of-type({n})"), fired=n > 0)
+        model.record(PAGE, info(f"body>nav>span:nth-of-type({n})", selector="span.nav-label", text=f"Menu {n}"), fired=False)
+    candidates = [
+        info("body>nav>span:nth-of-type(9)", selector="span.nav-label", text="Models"),  # template never fired
+        info("body>aside>button:nth-of-type(1)", selector="button.chat", text="Chat"),  # no history
+        info("body>main>a:nth-of-type(9)", text="Book a test drive"),  # template fired 3 of 4
+    ]
+    assert model.rank(PAGE, candidates) == [2, 1]
+
+def test_table_persists_across_runs(tmp_path):
+    path = str(tmp_path / "yield" / "clicks.json")
+    model = ClickYieldModel(path, min_observations=1, sample_rate=0)
+    model.record(PAGE, info("body>a:nth-of-type(1)", selector="a.skip-link", text="Skip"), fired=False)
+    model.save()
+    reloaded = ClickYieldModel(path, min_observations=1, sample_rate=0)
+    assert reloaded.decide(PAGE, info("body>a:nth-of-type(1)", selector="a.skip-link", text="Skip")) == SKIP
+    assert reloaded.stats()["elements"] == 1
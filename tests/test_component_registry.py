@@ -0,0 +1,37 @@
+import pytest
+from app.agents.scanning_pages.component_registry import ComponentRegistry, component_fingerprint, reused_click, with_reused_events
+
+NAV_CTA = {"path": "#header>nav:nth-of-type(1)>a:nth-of-type(2)", "text": "Build  yours", "href": "https://example.com/build"}
+
+def test_shared_component_is_claimed_once_per_host():
+    registry = ComponentRegistry()
+    fingerprint, entry = registry.claim("https://example.com/a", NAV_CTA)
+    assert entry is None
+    registry.record("https://example.com/a", fingerprint, {"dataLayer": [{"event": "cta"}], "ga4": []})
+    again, entry = registry.claim("https://example.com/b", dict(NAV_CTA, text="Build yours"))
+    assert again == fingerprint
+    assert entry["first_url"] == "https://example.com/a"
+    assert entry["click"]["dataLayer"] == [{"event": "cta"}]
+    # Another site clicks its own copy.
+    assert registry.claim("https://other.example/a", NAV_CTA)[1] is None
+    assert registry.stats()["reused"] == 1
+
+def test_fingerprint_depends_on_path_text_and_href():
+    assert component_fingerprint(NAV_CTA) != component_fingerprint(dict(NAV_CTA, path="body>main:nth-of-type(1)>a:nth-of-type(2)"))
+    assert component_fingerprint(NAV_CTA) != component_fingerprint(dict(NAV_CTA, href="https://example.com/other"))
+
+def test_reused_click_has_no_events_until_reported():
+    registry = ComponentRegistry()
+    fingerprint, _ = registry.claim("https://example.com/a", NAV_CTA)
+    _, entry = registry.claim("https://example.com/b", NAV_CTA)
+    click = reused_click(NAV_CTA, fingerprint, entry, index=2)
+    assert click["dataLayer"] == [] and click["ga4"] == [] and click["index"] == 2
+    assert click["reused_from"] == "https://example.com/a" and click["reused_click"] is None
+    # The first page records its result after the claim.
+    registry.record("https://example.com/a", fingerprint, {"dataLayer": [{"event": "cta"}], "ga4": [{"url": "g/collect"}]})
+    own = {"info": {}, "dataLayer": [{"event": "own"}], "ga4": []}
+    registry.resolve("https://example.com/b", [click, own])
+    reported = with_reused_events([own, click])
+    assert reported[0] is own
+    assert reported[1]["dataLayer"] == [{"event": "cta"}] and reported[1]["ga4"] == [{"url": "g/collect"}]
+    assert click["dataLayer"] == []
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+
+pytest.importorskip("crawl4ai")
+pytest.importorskip("streamlit")
+from app.agents.scanning_pages.capture_scripts import DATA_LAYER_BUFFER, GA4_BUFFER
+from app.agents.scanning_pages.component_registry import ComponentRegistry
+from app.agents.scanning_pages.crawl_4_ai import GA4EventCollector
+
+def test_scan_urls_yields_a_result_for_a_failing_page():
+    collector = GA4EventCollector.__new__(GA4EventCollector)
+    collector.concurrency = 2
+
+    async def scan_page(url, **kwargs):
+        if url.endswith("broken"):
+            raise RuntimeError("Target page, context or browser has been closed")
+        return {"url": url, "dataLayer": [], "ga4": [], "error": None}
+
+    collector.scan_page = scan_page
+
+    async def run():
+        return [r async for r in collector.scan_urls(["https://a.test/ok", "https://a.test/broken", "https://a.test/ok2"])]
+
+    results = asyncio.run(asyncio.wait_for(run(), timeout=5))
+    assert sorted(r["url"] for r in results) == ["https://a.test/broken", "https://a.test/ok", "https://a.test/ok2"]
+    assert [r["error"] for r in results if r["url"].endswith("broken")] == ["Target page, context or browser has been closed"]
+
+def test_fan_out_reports_reused_components_under_their_click():
+    collector = GA4EventCollector.__new__(GA4EventCollector)
+    collector.click_yield = collector.gtm = collector.selector_cache = None
+    nav = {"path": "#header>nav:nth-of-type(1)>a:nth-of-type(1)", "text": "Build yours", "href": "https://a.test/build"}
+
+    async def load_page(url, session_id=None, page_timeout_ms=None):
+        return 0.1
+
+    async def evaluate(expression, arg=None, session_id=None):
+        return [nav]
+
+    async def get_captured_events(session_id=None):
+        return {DATA_LAYER_BUFFER: [{"data": {"event": "gtm.js"}}], GA4_BUFFER: [{"url": "g/collect?en=page_view"}]}
+
+    async def release_session(session_id):
+        pass
+
+    async def click_share(url, session_id, indexes, targets, listing, page_timeout_ms=None):
+        return [{"index": i, "tab": session_id, "info": targets[i], "dataLayer": [{"data": {"event": "cta"}}],
+                 "ga4": [{"url": "g/collect?en=cta_click"}], "navigated": False, "error": None} for i in indexes]
+
+    collector.load_page, collector.evaluate = load_page, evaluate
+    collector.get_captured_events, collector.release_session = get_captured_events, release_session
+    collector._click_share = click_share
+    components = ComponentRegistry()
+    first = asyncio.run(collector.fan_out_clicks("https://a.test/one", tabs=1, components=components))
+    second = asyncio.run(collector.fan_out_clicks("https://a.test/two", tabs=1, components=components))
+    assert [e["data"]["event"] for e in first["dataLayer"]] == ["gtm.js", "cta"]
+    # The reused component adds nothing to the page's own lists.
+    assert second["dataLayer"] == [{"data": {"event": "gtm.js"}}]
+    assert second["ga4"] == [{"url": "g/collect?en=page_view"}]
+    click = second["clicks"][0]
+    assert click["dataLayer"] == [] and click["ga4"] == []
+    assert click["reused_from"] == "https://a.test/one"
+    assert click["reused_click"]["ga4"] == [{"url": "g/collect?en=cta_click"}]
@@ -0,0 +1,97 @@
+import asyncio
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from app.agents.scanning_pages.crawl_job import DONE, CrawlJob, HostTimeouts, fetch_bytes
+
+FIXTURE_SITE = os.path.join(os.path.dirname(__file__), "fixtures", "sitemap_site")
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves the fixture site, pointing sitemap URLs at the live server."""
+
+    def do_GET(self):
+        if self.path.endswith(".xml"):
+            path = self.translate_path(self.path)
+            if not os.path.exists(path):
+                self.send_error(404)
+                return
+            with open(path, encoding="utf-8") as f:
+                body = f.read().replace("http://fixture.test", self.server.base_url)
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/xml")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def fixture_site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(FixtureHandler, directory=FIXTURE_SITE))
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.base_url
+    server.shutdown()
+
+class Interrupted(BaseException):
+    pass
+
+def test_crawl_filters_dedups_and_retries(fixture_site, tmp_path):
+    job = CrawlJob(sitemaps=[fixture_site + "/sitemap.xml"], include=["/*/range-rover/*"],
+                   backoff_s=0, checkpoint_path=str(tmp_path / "crawl.json"))
+    frontier = job.build_frontier()
+    assert sorted(url.rsplit("/", 1)[-1] for url in frontier.status) == ["index.html", "sport.html", "velar.html"]
+    calls = []
+
+    async def scan(url, timeout_s):
+        calls.append(url)
+        if url.endswith("sport.html") and calls.count(url) == 1:
+            return {"url": url, "error": "timeout"}
+        html = await asyncio.to_thread(fetch_bytes, url)
+        return {"url": url, "error": None, "load_s": 0.1, "html": html}
+
+    counts = asyncio.run(job.run(scan))
+    assert counts == {"pending": 0, "done": 3, "failed": 0}
+    assert len(calls) == 4
+    assert job.frontier.attempts[[u for u in calls if u.endswith("sport.html")][0]] == 2
+
+def test_interrupted_crawl_resumes_from_checkpoint(fixture_site, tmp_path):
+    checkpoint = str(tmp_path / "crawl.json")
+    succeeded = []
+
+    async def interrupting_scan(url, timeout_s):
+        if url.endswith("velar.html"):
+            raise Interrupted()
+        succeeded.append(url)
+        return {"url": url, "error": None}
+
+    first = CrawlJob(sitemaps=[fixture_site + "/sitemap.xml"], per_host_concurrency=1, checkpoint_path=checkpoint)
+    with pytest.raises(Interrupted):
+        asyncio.run(first.run(interrupting_scan))
+
+    async def scan(url, timeout_s):
+        succeeded.append(url)
+        return {"url": url, "error": None}
+
+    resumed = CrawlJob(sitemaps=[], checkpoint_path=checkpoint)
+    counts = asyncio.run(resumed.run(scan))
+    assert counts["done"] == 4
+    assert len(succeeded) == len(set(succeeded)) == 4
+    assert all(status == DONE for status in resumed.frontier.status.values())
+
+def test_host_timeouts_follow_load_percentile():
+    timeouts = HostTimeouts(default_s=60, min_timeout_s=5, max_timeout_s=30, factor=2, min_samples=3)
+    assert timeouts.timeout_s("a") == 60
+    for load_s in (1, 2, 4):
+        timeouts.observe("a", load_s)
+    assert timeouts.timeout_s("a") == 8
+    timeouts.observe("a", 40)
+    assert timeouts.timeout_s("a") == 30
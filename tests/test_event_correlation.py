@@ -0,0 +1,78 @@
+import json
+import pytest
+from app.agents.scanning_pages.event_correlation import correlate, correlate_scan_archive, correlation_summary, event_frames
+
+PAGE = "https://www.rangerover.com/de-de/range-rover/index.html"
+OTHER = "https://www.rangerover.com/de-de/defender/index.html"
+
+def push(event, ms, **data):
+    return {"timestamp": f"2025-03-01T10:00:{ms // 1000:02d}.{ms % 1000:03d}Z", "data": {"event": event, **data}}
+
+def hit(events, ms):
+    body = "\n".join(f"en={e}" for e in events) if len(events) > 1 else ""
+    query = "" if body else f"&en={events[0]}"
+    return {"url": f"https://region1.google-analytics.com/g/collect?v=2&tid=G-TEST123{query}",
+            "body": body, "timestamp": f"2025-03-01T10:00:{ms // 1000:02d}.{ms % 1000:03d}Z"}
+
+def scan():
+    load_pushes = [push("gtm.js", 0), push("page_view_ready", 100)]
+    load_hits = [hit(["page_view"], 150)]
+    clicks = [
+        {"index": 0, "dataLayer": [push("gtm.click", 5000)], "ga4": [hit(["cta_click", "scroll"], 5040)]},
+        {"index": 3, "dataLayer": [push("gtm.click", 5010)], "ga4": []},
+        {"index": 4, "dataLayer": [], "ga4": [hit(["video_start"], 9000)]},
+    ]
+    page = {
+        "url": PAGE,
+        "dataLayer": load_pushes + [e for c in clicks for e in c["dataLayer"]],
+        "ga4": load_hits + [e for c in clicks for e in c["ga4"]],
+        "clicks": clicks,
+    }
+    other = {"url": OTHER, "dataLayer": [{"timestamp": "2025-03-01T10:00:00.050Z", "data": {"0": "event", "1": "lead"}}],
+             "ga4": [hit(["lead"], 60), hit(["late"], 9000)]}
+    return [page, other]
+
+def test_frames_attribute_events_to_clicks():
+    pushes, hits = event_frames(scan())
+    assert list(pushes["click"]) == [-1, -1, 0, 3, -1]
+    assert list(pushes["event"]) == ["gtm.js", "page_view_ready", "gtm.click", "gtm.click", "lead"]
+    assert str(pushes["timestamp"].dtype) == "datetime64[ns, UTC]"
+    # The batched click request decodes to two hits of the same click.
+    assert list(zip(hits["en"], hits["click"])) == [
+        ("page_view", -1), ("cta_click", 0), ("scroll", 0), ("video_start", 4), ("lead", -1), ("late", -1),
+    ]
+
+def test_hits_join_latest_push_of_same_page_and_click():
+    pushes, hits = correlate(*event_frames(scan()), window_ms=2000)
+    assert list(hits["push_row"].astype("float").fillna(-1)) == [1, 2, 2, -1, 4, -1]
+    assert list(hits["push_event"].fillna("")) == ["page_view_ready", "gtm.click", "gtm.click", "", "lead", ""]
+    assert hits["lag_ms"].iloc[:3].tolist() == pytest.approx([50, 40, 40])
+    # video_start has no push in its click; "late" is outside the window.
+    assert list(hits["orphan"]) == [False, False, False, True, False, True]
+    assert list(pushes["hit_count"]) == [0, 1, 2, 0, 1]
+    assert list(pushes["orphan"]) == [True, False, False, True, False]
+    assert correlation_summary(pushes, hits) == {
+        "pushes": 5, "hits": 6, "orphan_pushes": 2, "orphan_hits": 2, "median_lag_ms": 40.0,
+    }
+
+def test_by_event_requires_matching_names():
+    pushes, hits = correlate(*event_frames(scan()), by_event=True)
+    assert list(hits["orphan"]) == [True, True, True, True, False, True]
+    assert pushes["hit_count"].tolist() == [0, 0, 0, 0, 1]
+
+def test_untimed_events_are_orphans_and_archives_load(tmp_path):
+    results = scan()
+    results[1]["dataLayer"][0]["timestamp"] = None
+    path = tmp_path / "scan.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in results) + "\n", encoding="utf-8")
+    pushes, hits = correlate_scan_archive([str(path)])
+    assert pushes["orphan"].iloc[-1]
+    assert hits["orphan"].tolist()[-2:] == [True, True]
+
+def test_pages_without_hits_and_empty_input_correlate():
+    pushes, hits = correlate(*event_frames([{"url": PAGE, "dataLayer": [push("gtm.js", 0)], "ga4": []}]))
+    assert pushes["orphan"].tolist() == [True]
+    assert hits.empty
+    pushes, hits = correlate(*event_frames([]))
+    assert pushes.empty and hits.empty
+    assert correlation_summary(pushes, hits)["median_lag_ms"] is None
@@ -0,0 +1,50 @@
+import json
+import pytest
+from app.agents.scanning_pages.fast_forward import (
+    NO_ANIMATIONS_CSS,
+    LatencyStats,
+    click_latency_ms,
+    fast_forward_scripts,
+    latency_summary,
+)
+
+def test_scripts_embed_css_and_timer_settings():
+    no_animations, timers = fast_forward_scripts(factor=20, max_delay_ms=3000)
+    assert json.dumps(NO_ANIMATIONS_CSS) in no_animations
+    assert "transition-duration: 1ms" in NO_ANIMATIONS_CSS
+    assert "(20.0, 3000)" in timers
+    with pytest.raises(ValueError):
+        fast_forward_scripts(factor=0.5)
+
+def test_click_latency_uses_first_captured_item():
+    events = [{"data": {"event": "cta"}, "t": 1250.5}, {"url": "g/collect", "t": 1210.0}, {"data": {}}]
+    assert click_latency_ms(events, 1200.0) == 10.0
+    assert click_latency_ms([{"data": {}}], 1200.0) is None
+    assert click_latency_ms(events, None) is None
+    # Page-load items captured before the click do not count.
+    assert click_latency_ms([{"t": 800.0}, {"t": 1300.0}], 1200.0) == 100.0
+
+def test_latency_summary_skips_unmeasured_clicks():
+    clicks = [
+        {"latency_ms": 100.0, "wait_ms": 600.0},
+        {"latency_ms": 20.0, "wait_ms": 520.0},
+        {"latency_ms": None, "wait_ms": 10000.0},
+        {"reused_from": "https://www.rangerover.com/de-de/index.html"},
+    ]
+    summary = latency_summary(clicks)
+    assert summary["clicks"] == 4
+    assert summary["latency_ms"] == {"count": 2, "median": 60.0, "p95": 100.0}
+    assert summary["wait_ms"] == {"count": 3, "median": 600.0, "p95": 10000.0}
+    assert latency_summary([])["latency_ms"]["median"] is None
+
+def test_latency_stats_keep_a_bounded_sample():
+    stats = LatencyStats(max_samples=100, seed=1)
+    for i in range(10000):
+        stats.add({"latency_ms": float(i % 100), "wait_ms": 500.0, "dataLayer": [{}] * 10})
+    stats.add({"latency_ms": None, "wait_ms": 900.0}, count=12)
+    summary = stats.summary()
+    assert summary["clicks"] == 10012
+    assert summary["latency_ms"]["count"] == 10000 and summary["wait_ms"]["count"] == 10001
+    assert all(len(values) <= 100 for values in stats._samples.values())
+    assert 30 <= summary["latency_ms"]["median"] <= 70
+    assert summary["wait_ms"]["median"] == 500.0
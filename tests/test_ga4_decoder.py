@@ -0,0 +1,61 @@
+import pytest
+import pandas as pd
+from app.agents.scanning_pages.ga4_decoder import decode_hits
+
+def test_decode_batched_body_one_row_per_hit():
+    events = [{
+        "url": "https://region1.google-analytics.com/g/collect?v=2&tid=G-TEST&cid=123",
+        "body": "en=click&ep.event_action=cta%20click&epn.value=3\nen=scroll&epn.value=7",
+        "timestamp": "2025-01-01T00:00:00Z",
+    }]
+    hits = decode_hits(events)
+    assert list(hits["en"]) == ["click", "scroll"]
+    assert list(hits["hit_index"]) == [0, 1]
+    # Shared URL parameters are inherited by every hit in the batch.
+    assert list(hits["tid"]) == ["G-TEST", "G-TEST"]
+    assert hits.loc[0, "ep.event_action"] == "cta click"
+    assert pd.api.types.is_numeric_dtype(hits["epn.value"])
+    assert list(hits["epn.value"]) == [3, 7]
+
+def test_decode_performance_log_message():
+    events = [{
+        "params": {
+            "request": {"url": "https://www.google-analytics.com/g/collect?v=2&en=page_view&ep.event_label=Hello+World"},
+            "wallTime": 1700000000,
+        },
+        "button_text": "Explore",
+    }]
+    hits = decode_hits(events, page_urls=["https://example.com/"])
+    assert len(hits) == 1
+    assert hits.loc[0, "ep.event_label"] == "Hello World"
+    assert hits.loc[0, "button_text"] == "Explore"
+    assert hits.loc[0, "page_url"] == "https://example.com/"
+
+def test_hit_params_override_shared_params():
+    events = [{"url": "https://x/g/collect?en=shared&tid=G-1", "body": "en=own"}]
+    hits = decode_hits(events)
+    assert hits.loc[0, "en"] == "own"
+    assert hits.loc[0, "tid"] == "G-1"
+
+def test_blank_body_keeps_the_url_hit():
+    events = [
+        {"url": "https://x/g/collect?en=page_view&tid=G-1", "body": "\n"},
+        {"url": "https://x/g/collect?en=scroll&tid=G-1", "body": "\n\n"},
+    ]
+    hits = decode_hits(events)
+    assert list(hits["en"]) == ["page_view", "scroll"]
+    assert list(hits["hit_index"]) == [0, 0]
+
+def test_body_only_batch_without_query_string():
+    hits = decode_hits([{"url": "https://www.google-analytics.com/mp/collect", "body": "en=a&epn.value=1\nen=b"}])
+    assert list(hits["en"]) == ["a", "b"]
+    assert list(hits["endpoint"]) == ["https://www.google-analytics.com/mp/collect"] * 2
+
+def test_crlf_batch_has_no_trailing_carriage_returns():
+    events = [{"url": "https://x/g/collect?v=2&tid=G-1", "body": "en=a&ep.x=1\r\nen=b&ep.x=2\r\n"}]
+    hits = decode_hits(events)
+    assert list(hits["en"]) == ["a", "b"]
+    assert list(hits["ep.x"]) == ["1", "2"]
+
+def test_decode_empty_input():
+    assert decode_hits([]).empty
@@ -0,0 +1,160 @@
+import json
+import os
+import shutil
+import subprocess
+import pytest
+from app.agents.scanning_pages.asset_cache import AssetCache
+from app.agents.scanning_pages.gtm_container import (
+    PREDICT_TARGETS_FN,
+    GtmContainers,
+    extract_resource,
+    parse_container,
+    predictive_triggers,
+    trigger_report,
+)
+from app.agents.scanning_pages.page_fingerprint import GTM_JS_URL
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "gtm")
+
+def load_fixture():
+    with open(os.path.join(FIXTURES, "GTM-TEST1.js"), encoding="utf-8") as f:
+        return f.read()
+
+class NoNetwork:
+    def get(self, *args, **kwargs):
+        raise AssertionError("gtm.js should not be fetched")
+
+def hit(event_name):
+    return {"url": f"https://region1.google-analytics.com/g/collect?v=2&tid=G-TEST123&en={event_name}", "body": ""}
+
+def test_parses_ga4_click_and_custom_triggers():
+    container = parse_container(load_fixture(), "GTM-TEST1")
+    assert container.version == "214"
+    triggers = {t["id"]: t for t in container.triggers}
+    # The pageview, listener and custom HTML rules add no GA4 event tag.
+    assert sorted(triggers) == ["GTM-TEST1:1", "GTM-TEST1:2", "GTM-TEST1:3", "GTM-TEST1:4"]
+    cta = triggers["GTM-TEST1:1"]
+    assert (cta["kind"], cta["event"]) == ("click", "gtm.click")
+    assert [(c["variable"], c["op"], c["value"]) for c in cta["conditions"]] == [
+        ("click_classes", "contains", "cta"),
+        ("page_path", "starts_with", "/de-de/"),
+    ]
+    assert cta["tags"] == [{"tag": 7, "event_name": "cta_click", "params": {"event_action": "Click", "event_label": "{{click_text}}"}}]
+    outbound = triggers["GTM-TEST1:2"]
+    assert outbound["kind"] == "link_click"
+    # gtm.triggers is a dataLayer variable: kept but not evaluated in the page.
+    assert outbound["conditions"][0]["variable"] is None
+    assert outbound["conditions"][1] == {"variable": "click_url", "op": "regex", "value": "^https?://(www\\.)?rangerover\\.com",
+                                         "negate": True, "ignore_case": True}
+    assert (triggers["GTM-TEST1:3"]["kind"], triggers["GTM-TEST1:3"]["event"]) == ("custom", "configurator_start")
+    assert not triggers["GTM-TEST1:3"]["predictive"]
+    assert triggers["GTM-TEST1:4"]["conditions"][1]["op"] == "css"
+    assert [t["id"] for t in container.click_triggers] == ["GTM-TEST1:1", "GTM-TEST1:2", "GTM-TEST1:4"]
+    assert [t["id"] for t in predictive_triggers([container])] == ["GTM-TEST1:1", "GTM-TEST1:2", "GTM-TEST1:4"]
+
+def test_rejects_sources_without_container_data():
+    with pytest.raises(ValueError):
+        extract_resource("console.log('not a container');")
+
+def test_containers_load_once_from_fixture_or_asset_cache(tmp_path):
+    containers = GtmContainers(fixture_dir=FIXTURES, session=NoNetwork())
+    first = containers.load("GTM-TEST1")
+    assert containers.load("GTM-TEST1") is first
+    assets = AssetCache(str(tmp_path))
+    assets.store(GTM_JS_URL.format("GTM-CACHED"), 200, {"Content-Type": "application/javascript"}, load_fixture().encode("utf-8"))
+    cached = GtmContainers(fixture_dir=FIXTURES, asset_cache=assets, session=NoNetwork()).load_all(["GTM-CACHED", "GTM-CACHED"])
+    assert [(c.container_id, c.version) for c in cached] == [("GTM-CACHED", "214")]
+    assert cached[0].triggers[0]["id"] == "GTM-CACHED:1"
+
+def test_report_lists_triggers_that_never_fired():
+    container = parse_container(load_fixture(), "GTM-TEST1")
+    clicks = [
+        {"info": {"text": "Configure", "rules": ["GTM-TEST1:1"]}, "ga4": [hit("cta_click")]},
+        {"info": {"text": "Play", "rules": ["GTM-TEST1:4"]}, "ga4": [hit("page_view")]},
+        {"info": {"text": "Dealer", "rules": ["GTM-TEST1:2"]}, "ga4": []},
+    ]
+    data_layer = [{"data": {"event": "gtm.click"}}, {"data": {"event": "configurator_start"}}]
+    report = trigger_report([container], clicks, data_layer)
+    assert report["containers"] == {"GTM-TEST1": "214"}
+    assert report["fired"] == ["GTM-TEST1:1", "GTM-TEST1:3"]
+    assert report["unfired"] == [
+        {"id": "GTM-TEST1:2", "kind": "link_click", "event": "gtm.linkClick", "ga4_events": ["outbound_link"]},
+        {"id": "GTM-TEST1:4", "kind": "click", "event": "gtm.click", "ga4_events": ["hero_video"]},
+    ]
+# Just enough DOM for PREDICT_TARGETS_FN to run under node: tag/class
+# selectors, attributes, text and a tree.
+FAKE_DOM_JS = r"""
+class El {
+    constructor(tag, attrs, children) {
+        this.tagName = tag.toUpperCase(); this.nodeType = 1; this.attrs = attrs || {};
+        this.id = this.attrs.id || ''; this.children = children || []; this.parentElement = null;
+        this.previousElementSibling = null;
+        this.children.forEach((c, i) => { c.parentElement = this; c.previousElementSibling = this.children[i - 1] || null; });
+    }
+    getAttribute(name) { return name in this.attrs ? this.attrs[name] : null; }
+    hasAttribute(name) { return name in this.attrs; }
+    get href() { return this.attrs.href || ''; }
+    get innerText() { return this.attrs.text || this.children.map(c => c.innerText).join(' '); }
+    matches(sel) {
+        return sel.split(',').some(s => { const [tag, ...cls] = s.trim().split('.');
+            const own = (this.getAttribute('class') || '').split(/\s+/);
+            return (!tag || tag.toUpperCase() === this.tagName) && cls.every(c => own.includes(c)); });
+    }
+    querySelectorAll() { const out = []; const walk = el => el.children.forEach(c => { out.push(c); walk(c); }); walk(this); return out; }
+    getClientRects() { return [1]; }
+    checkVisibility() { return true; }
+}
+const h = (tag, attrs, ...children) => new El(tag, attrs, children);
+globalThis.window = globalThis; globalThis.CSS = { escape: s => s };
+globalThis.location = { href: 'https://www.rangerover.com/de-de/', pathname: '/de-de/', hostname: 'www.rangerover.com' };
+"""
+
+def run_predict(body_js, triggers):
+    script = FAKE_DOM_JS + f"""
+const body = {body_js};
+globalThis.document = {{ body: body, querySelector: () => body }};
+(async () => {{
+    const targets = await ({PREDICT_TARGETS_FN})('body', {json.dumps(triggers)});
+    console.log(JSON.stringify(targets.map(t => [t.info.tag_name, t.info.text, t.info.rules])));
+}})();
+"""
+    out = subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+def test_predicted_target_is_the_innermost_matching_element():
+    container = parse_container(load_fixture(), "GTM-TEST1")
+    body = """h('body', {}, h('main', {class: 'page cta-zone'},
+        h('div', {class: 'hero cta-wrapper'}, h('button', {class: 'btn cta', text: 'Configure'})),
+        h('footer', {}, h('a', {href: 'https://example.com/dealer', text: 'Dealer'}))))"""
+    targets = run_predict(body, container.click_triggers)
+    # main and the wrapper div contain "cta" too; only the button is clicked.
+    assert [t[:2] for t in targets] == [["button", "Configure"], ["a", "Dealer"]]
+    assert targets[0][2] == ["GTM-TEST1:1"]
+    assert "GTM-TEST1:2" in targets[1][2]
+
+def all_elements_trigger(kind="click"):
+    # "All Elements": only a Page Path condition, which every element passes.
+    return {"id": "GTM-TEST1:99", "kind": kind, "event": "gtm.click", "predictive": False,
+            "conditions": [{"variable": "page_path", "op": "starts_with", "value": "/de-de/", "negate": False, "ignore_case": False}],
+            "tags": [{"tag": 30, "event_name": "any_click", "params": {}}]}
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+def test_non_predictive_trigger_does_not_pick_targets():
+    container = parse_container(load_fixture(), "GTM-TEST1")
+    container.triggers.append(all_elements_trigger())
+    assert "GTM-TEST1:99" not in [t["id"] for t in predictive_triggers([container])]
+    body = """h('body', {}, h('main', {class: 'page'},
+        h('div', {class: 'hero'}, h('button', {class: 'btn cta', text: 'Configure'}), h('span', {text: 'Details'}))))"""
+    # Passed in anyway, it still does not turn every element into a target.
+    targets = run_predict(body, container.click_triggers)
+    assert targets == [["button", "Configure", ["GTM-TEST1:1"]]]
+    assert run_predict(body, [all_elements_trigger()]) == []
+
+def test_report_checks_non_predictive_triggers_against_every_click():
+    container = parse_container(load_fixture(), "GTM-TEST1")
+    container.triggers += [all_elements_trigger(), dict(all_elements_trigger("link_click"), id="GTM-TEST1:98")]
+    clicks = [{"info": {"text": "Details", "href": None}, "ga4": [hit("any_click")]}]
+    report = trigger_report([container], clicks, [])
+    assert "GTM-TEST1:99" in report["fired"]
+    assert "GTM-TEST1:98" in [t["id"] for t in report["unfired"]]
@@ -0,0 +1,38 @@
+import asyncio
+import pytest
+from app.agents.scanning_pages.har_replay import RECORD, REPLAY, HarArchive, har_file, recorded_files
+
+class FakeContext:
+    def __init__(self):
+        self.calls = []
+
+    async def add_init_script(self, script):
+        self.calls.append(("init_script", None))
+
+    async def route_from_har(self, path, **kwargs):
+        self.calls.append(("har", path, kwargs.get("update", False), kwargs.get("not_found")))
+
+def test_record_gives_each_context_its_own_file(tmp_path):
+    path = str(tmp_path / "scan.har")
+    archive = HarArchive(path, RECORD)
+    first, second = FakeContext(), FakeContext()
+    asyncio.run(archive.install(first))
+    asyncio.run(archive.install(first))
+    asyncio.run(archive.install(second))
+    assert first.calls == [("har", path, True, None)]
+    assert second.calls == [("har", str(tmp_path / "scan-1.har"), True, None)]
+
+def test_replay_serves_every_recorded_file_with_fallback(tmp_path):
+    path = str(tmp_path / "scan.har")
+    with pytest.raises(FileNotFoundError):
+        HarArchive(path, REPLAY)
+    for index in range(2):
+        open(har_file(path, index), "w").close()
+    assert recorded_files(path) == [path, str(tmp_path / "scan-1.har")]
+    archive = HarArchive(path, REPLAY)
+    assert archive.offline
+    context = FakeContext()
+    asyncio.run(archive.install(context))
+    assert context.calls[0] == ("init_script", None)
+    assert [call[1] for call in context.calls[1:]] == recorded_files(path)
+    assert all(call[3] == "fallback" for call in context.calls[1:])
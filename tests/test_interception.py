@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from app.agents.scanning_pages.interception import GA4Sinkhole, NetworkInterceptor, ResourceBlockingProfile
+
+def test_analytics_hosts_are_never_blocked():
+    profile = ResourceBlockingProfile(denied_hosts=["google-analytics.com"])
+    assert not profile.should_block("https://region1.google-analytics.com/g/collect?v=2", "fetch")
+    assert not profile.should_block("https://www.googletagmanager.com/gtm.js?id=GTM-X", "script")
+    assert not profile.should_block("https://www.googletagmanager.com/logo.png", "image")
+
+def test_heavy_types_and_denied_hosts_are_blocked():
+    profile = ResourceBlockingProfile()
+    assert profile.should_block("https://www.rangerover.com/hero.jpg", "image")
+    assert profile.should_block("https://www.youtube.com/embed/abc", "document")
+    assert not profile.should_block("https://www.rangerover.com/app.js", "script")
+
+def test_allowlist_overrides_type_blocking():
+    profile = ResourceBlockingProfile(allowed_hosts=["assets.example.com"])
+    assert not profile.should_block("https://assets.example.com/font.woff2", "font")
+
+class FakeRoute:
+    def __init__(self, url, post_data=None, resource_type="fetch"):
+        self.request = type("Request", (), {
+            "url": url, "post_data": post_data, "method": "POST",
+            "resource_type": resource_type, "frame": type("Frame", (), {"page": "page-1"})(),
+        })()
+        self.outcome = None
+
+    async def fulfill(self, status, body=""):
+        self.outcome = ("fulfill", status)
+
+    async def abort(self, error_code):
+        self.outcome = ("abort", error_code)
+
+    async def continue_(self):
+        self.outcome = ("continue", None)
+
+def test_sinkhole_records_ga4_hits_and_answers_locally():
+    sinkhole = GA4Sinkhole()
+    interceptor = NetworkInterceptor(sinkhole=sinkhole)
+    hit = FakeRoute("https://region1.google-analytics.com/g/collect?v=2&tid=G-TEST", "en=click")
+    gtm = FakeRoute("https://www.googletagmanager.com/gtm.js?id=GTM-X", resource_type="script")
+    asyncio.run(interceptor.handle(hit))
+    asyncio.run(interceptor.handle(gtm))
+    assert hit.outcome == ("fulfill", 204)
+    assert gtm.outcome == ("continue", None)
+    hits = sinkhole.hits_for("page-1")
+    assert [h["body"] for h in hits] == ["en=click"]
+    assert interceptor.stats["sinkholed"] == 1
+    sinkhole.forget("page-1")
+    assert sinkhole.hits_for("page-1") == []
+
+def test_context_is_routed_only_when_a_feature_needs_it():
+    class FakeContext:
+        def __init__(self):
+            self.routes = []
+        async def route(self, pattern, handler):
+            self.routes.append(pattern)
+    idle, blocking, sinkholed = FakeContext(), FakeContext(), FakeContext()
+    asyncio.run(NetworkInterceptor().install(idle))
+    asyncio.run(NetworkInterceptor(ResourceBlockingProfile()).install(blocking))
+    interceptor = NetworkInterceptor(sinkhole=GA4Sinkhole())
+    asyncio.run(interceptor.install(sinkholed))
+    asyncio.run(interceptor.install(sinkholed))
+    assert (idle.routes, blocking.routes, sinkholed.routes) == ([], ["**/*"], ["**/*"])
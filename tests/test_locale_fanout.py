@@ -0,0 +1,32 @@
+import pytest
+from app.agents.scanning_pages.locale_fanout import event_matrix, expand_locales, storage_init_script
+
+def test_expand_locales():
+    urls = expand_locales("https://www.rangerover.com/{locale}/range-rover/index.html", ["de-de", "en-gb"])
+    assert urls["en-gb"] == "https://www.rangerover.com/en-gb/range-rover/index.html"
+    with pytest.raises(ValueError):
+        expand_locales("https://www.rangerover.com/range-rover/index.html", ["de-de"])
+    with pytest.raises(ValueError):
+        expand_locales("https://www.rangerover.com/{locale}/range-rover/index.html", [])
+
+def test_event_matrix_counts_events_per_locale():
+    results = {
+        "de-de": {
+            "dataLayer": [{"data": {"event": "cta_click"}}, {"data": {"event": "cta_click"}}, {"data": ["js", "x"]}],
+            "ga4": [{"url": "https://www.google-analytics.com/g/collect?v=2", "body": "en=page_view\nen=cta_click"}],
+        },
+        "en-gb": {"dataLayer": [{"data": {"event": "cta_click"}}], "ga4": []},
+        "fr-fr": {"dataLayer": [], "ga4": []},
+    }
+    matrix = event_matrix(results)
+    assert list(matrix.columns) == ["de-de", "en-gb", "fr-fr"]
+    assert matrix.loc[("dataLayer", "cta_click"), "de-de"] == 2
+    assert matrix.loc[("dataLayer", "cta_click"), "en-gb"] == 1
+    assert matrix.loc[("ga4", "page_view"), "en-gb"] == 0
+    assert matrix.loc[("ga4", "cta_click")].tolist() == [1, 0, 0]
+
+def test_storage_init_script_only_for_local_storage():
+    assert storage_init_script({"cookies": [{"name": "OptanonAlertBoxClosed"}], "origins": []}) is None
+    script = storage_init_script({"origins": [{"origin": "https://www.rangerover.com",
+                                               "localStorage": [{"name": "consent", "value": "all"}]}]})
+    assert '"https://www.rangerover.com": {"consent": "all"}' in script
@@ -0,0 +1,53 @@
+import json
+import pytest
+from app.agents.scanning_pages.network_capture import GA4HitStream, is_ga4_hit_url
+
+class FakeDriver:
+    def __init__(self):
+        self.log = []
+        self.post_data = {}
+    def get_log(self, kind):
+        entries, self.log = self.log, []
+        return entries
+    def execute_cdp_cmd(self, cmd, params):
+        return {"postData": self.post_data[params["requestId"]]}
+    def send(self, request_id, url, method="Network.requestWillBeSent", **request):
+        message = {"method": method, "params": {"requestId": request_id, "request": {"url": url, **request}}}
+        self.log.append({"message": json.dumps({"message": message})})
+
+COLLECT = "https://region1.google-analytics.com/g/collect?v=2&en="
+
+def test_is_ga4_hit_url():
+    assert is_ga4_hit_url(COLLECT + "page_view")
+    assert is_ga4_hit_url("https://www.google-analytics.com/mp/collect?api_secret=x")
+    assert not is_ga4_hit_url("https://www.rangerover.com/collections.js")
+
+def test_poll_keeps_only_ga4_requests_and_fetches_post_bodies():
+    driver = FakeDriver()
+    driver.send("1", COLLECT + "page_view")
+    driver.send("2", "https://www.rangerover.com/collect-info.js")
+    driver.send("3", COLLECT + "cta_click", method="Network.responseReceived")
+    driver.send("4", COLLECT + "scroll", hasPostData=True)
+    driver.post_data["4"] = "en=scroll\nen=cta_click"
+    stream = GA4HitStream(driver)
+    assert stream.poll() == 2
+    hits = stream.since(0)
+    assert [h["params"]["requestId"] for h in hits] == ["1", "4"]
+    assert hits[1]["params"]["request"]["postData"] == "en=scroll\nen=cta_click"
+
+def test_cursors_survive_discards_and_drains():
+    driver = FakeDriver()
+    stream = GA4HitStream(driver, fetch_post_data=False)
+    driver.send("1", COLLECT + "page_view")
+    stream.poll()
+    cursor = stream.cursor
+    driver.send("2", COLLECT + "cta_click")
+    driver.send("3", COLLECT + "scroll")
+    # The log is drained by each read, yet since() still returns every hit past the cursor.
+    assert [h["params"]["requestId"] for h in stream.since(cursor)] == ["2", "3"]
+    assert [h["params"]["requestId"] for h in stream.since(cursor)] == ["2", "3"]
+    stream.discard_until(stream.cursor)
+    assert stream.cursor == 3
+    assert stream.since(cursor) == []
+    driver.send("4", COLLECT + "video_start")
+    assert [h["params"]["requestId"] for h in stream.since(3)] == ["4"]
@@ -0,0 +1,29 @@
+import pytest
+from app.agents.scanning_pages.page_fingerprint import FingerprintStore, html_fingerprint
+
+PAGE = """
+<html><head>
+<script>dataLayer = [{"pageType": "home", "ts": 1718000000000}];</script>
+<script>(function(w,d,s,l,i){})(window,document,'script','dataLayer','GTM-ABC123');</script>
+</head><body>
+<a class="cta primary" href="/build">Build  yours</a>
+<span class="label">Not a CTA</span>
+</body></html>
+"""
+
+def test_store_reuses_result_only_for_matching_digest(tmp_path):
+    store = FingerprintStore(str(tmp_path))
+    url = "https://example.com/de-de/index.html"
+    assert store.unchanged(url, {"digest": "a"}) is None
+    store.put(url, {"digest": "a"}, {"dataLayer": [{"event": "cta"}], "ga4": []})
+    assert store.unchanged(url, {"digest": "a"})["dataLayer"] == [{"event": "cta"}]
+    assert store.unchanged(url, {"digest": "b"}) is None
+    assert store.reused == 1
+
+def test_html_fingerprint_ignores_volatile_values():
+    pytest.importorskip("bs4")
+    first = html_fingerprint(PAGE)
+    assert first["gtm_containers"] == ["GTM-ABC123"]
+    assert first["clickable_count"] == 1
+    assert html_fingerprint(PAGE.replace("1718000000000", "1719000000000")) == first
+    assert html_fingerprint(PAGE.replace("Build  yours", "Configure"))["clickables"] != first["clickables"]
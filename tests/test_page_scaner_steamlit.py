@@ -0,0 +1,54 @@
+import pytest
+
+pytest.importorskip("selenium")
+pytest.importorskip("streamlit")
+from app.agents.scanning_pages import page_scaner_steamlit as scanner
+from app.agents.scanning_pages.component_registry import ComponentRegistry
+
+NAV = {"path": "#header>nav:nth-of-type(1)>a:nth-of-type(1)", "text": "Build yours", "href": "https://a.test/build"}
+
+class FakeDriver:
+    current_url = ""
+
+    def execute_script(self, script, *args):
+        return 0
+
+class FakeWait:
+    def __init__(self, driver, timeout):
+        pass
+
+    def until(self, condition):
+        return True
+
+class FakeHitStream:
+    cursor = 0
+
+    def poll(self):
+        pass
+
+def collector_on(url, components):
+    collector = scanner.GA4EventCollector.__new__(scanner.GA4EventCollector)
+    collector.driver = FakeDriver()
+    collector.driver.current_url = url
+    collector.components = components
+    collector.gtm = collector.selector_cache = collector.click_yield = None
+    collector.cap_ms, collector.fast_forward, collector.click_timings = 1000, False, []
+    collector.hit_stream = FakeHitStream()
+    collector.wait_for_events_after = lambda cursor, timeout=5: ([{"data": {"event": "cta"}, "t": 5}], cursor + 1)
+    collector.get_ga4_events = lambda since=0: [{"params": {"request": {"url": "g/collect?en=cta_click"}}}]
+    return collector
+
+def test_reused_components_are_reported_under_their_click(monkeypatch):
+    monkeypatch.setattr(scanner, "find_click_targets", lambda *args, **kwargs: [{"element": object(), "info": NAV}])
+    monkeypatch.setattr(scanner, "WebDriverWait", FakeWait)
+    components = ComponentRegistry()
+    first = collector_on("https://a.test/one", components)
+    dl_events, ga4_events = first.trigger_target_elements()
+    assert dl_events == [{"data": {"event": "cta"}, "t": 5}] and len(ga4_events) == 1
+    second = collector_on("https://a.test/two", components)
+    # The reused component adds nothing to the page's own lists.
+    assert second.trigger_target_elements() == ([], [])
+    click = second.last_clicks[0]
+    assert click["dataLayer"] == [] and click["ga4"] == []
+    assert click["reused_from"] == "https://a.test/one"
+    assert click["reused_click"]["dataLayer"] == [{"data": {"event": "cta"}, "t": 5}]
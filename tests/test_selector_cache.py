@@ -0,0 +1,22 @@
+import pytest
+from app.agents.scanning_pages.selector_cache import SelectorCache
+
+def test_selectors_persist_and_merge(tmp_path):
+    path = str(tmp_path / "selectors.json")
+    cache = SelectorCache(path)
+    key = SelectorCache.key("tpl|page|div.hero", "body", None, ["cta"])
+    assert cache.get(key) is None
+    cache.put(key, ["a.cta", "button.cta"])
+    cache.put(key, ["a.cta-content"])
+    reloaded = SelectorCache(path)
+    assert reloaded.get(key) == ["a.cta", "a.cta-content", "button.cta"]
+
+def test_uncacheable_results_and_refresh():
+    cache = SelectorCache(refresh_every=2)
+    key = SelectorCache.key("tpl", "body", None, [])
+    cache.put(key, ["a.cta", None])
+    assert cache.get(key) is None
+    cache.put(key, ["a.cta"])
+    assert cache.get(key) == ["a.cta"]
+    # Every second lookup forces a full scan.
+    assert cache.get(key) is None
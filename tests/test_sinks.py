@@ -0,0 +1,44 @@
+import glob
+import json
+import os
+import pytest
+from app.agents.scanning_pages.sinks import EventSink, JsonlSink, compact_to_parquet
+
+PAGE = "https://www.rangerover.com/de-de/range-rover/index.html"
+
+def page_events(n):
+    data_layer = [{"timestamp": f"2025-03-01T10:00:0{i}.000Z", "data": {"event": f"event_{i}"}} for i in range(n)]
+    ga4 = [{"method": "Network.requestWillBeSent", "params": {"wallTime": 1740823200.5, "request": {"url": "https://region1.google-analytics.com/g/collect?en=page_view"}}}]
+    return data_layer, ga4
+
+def test_event_sink_is_abstract():
+    with pytest.raises(TypeError):
+        EventSink()
+
+def test_jsonl_sink_rotates_and_seals_files(tmp_path):
+    with JsonlSink(str(tmp_path), max_bytes=500, scan_id="scan1") as sink:
+        for _ in range(3):
+            sink.write_page(PAGE, *page_events(2), meta={"locale": "de-de"})
+        assert glob.glob(str(tmp_path / "*.jsonl.open"))
+    sealed = sorted(glob.glob(str(tmp_path / "*.jsonl")))
+    assert len(sealed) == 3
+    assert not glob.glob(str(tmp_path / "*.open"))
+    records = [json.loads(line) for path in sealed for line in open(path, encoding="utf-8")]
+    assert len(records) == 9
+    assert {r["kind"] for r in records} == {"dataLayer", "ga4"}
+    assert records[0]["host"] == "www.rangerover.com" and records[0]["locale"] == "de-de"
+    assert records[2]["timestamp"].startswith("2025-03-01T10:00:00.5")  # perf-log wallTime
+    assert json.loads(records[0]["payload"])["data"] == {"event": "event_0"}
+
+def test_close_compacts_to_partitioned_parquet(tmp_path):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    jsonl_dir, parquet_dir = str(tmp_path / "jsonl"), str(tmp_path / "parquet")
+    with JsonlSink(jsonl_dir, parquet_dir=parquet_dir, max_bytes=500, scan_id="scan1") as sink:
+        sink.write_page(PAGE, *page_events(2))
+        sink.write_page("https://www.landrover.de/", *page_events(1))
+    assert glob.glob(os.path.join(jsonl_dir, "*.jsonl")) == []
+    table = pd.read_parquet(parquet_dir)
+    assert len(table) == 5
+    assert sorted(table["host"].astype(str).unique()) == ["www.landrover.de", "www.rangerover.com"]
+    assert compact_to_parquet(jsonl_dir, parquet_dir) == 0